@@ -1,4 +1,6 @@
+import hashlib
 import json
+import os
 import shutil
 import subprocess
 import tempfile
@@ -9,17 +11,58 @@ from pathlib import Path
 import pytest
 from dagster_shared.serdes import deserialize_value, serialize_value
 
+from dagster_skills_evals.cache import default_cache_dir, hash_path
 from dagster_skills_evals.execution import ClaudeExecutionResult, ClaudeExecutionResultSummary
+from dagster_skills_evals.fs import atomic_write_text, file_lock
+from dagster_skills_evals.history import HistoryStore, Provenance, default_history_path
+from dagster_skills_evals.logstore import BlobStore, log_files, write_logs
+from dagster_skills_evals.retention import GcReport, collect_garbage_periodically
+from dagster_skills_evals.stats import DEFAULT_TOLERANCES, SUMMARY_METRICS, check_regression
+from dagster_skills_evals.workspace import WorkspaceSnapshots
 from dagster_skills_evals_tests.utils import unset_virtualenv
 
+_RESULTS_DIR_ENV = "DG_EVAL_RESULTS_DIR"
+# Fewest accepted runs the reference sample is built from before falling back to the
+# committed baseline.
+_MIN_REFERENCE_RUNS = 3
+_results_report_key = pytest.StashKey[Path]()
+_gc_report_key = pytest.StashKey[GcReport]()
+
+
+def _worker_id() -> str:
+    # set by pytest-xdist in worker processes
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
 
 class BaselineManager:
-    """Manages performance baselines with simple JSON storage."""
+    """Manages performance baselines with simple JSON storage.
+
+    Safe to use from several pytest-xdist workers at once: files are written atomically,
+    baselines under a lock, and each worker appends its results to its own file in
+    results_dir for the controller to merge.
+    """
 
-    def __init__(self, baseline_dir: Path, test_name: str, update_mode: bool = False):
+    def __init__(
+        self,
+        baseline_dir: Path,
+        test_name: str,
+        update_mode: bool = False,
+        results_dir: Path | None = None,
+        history: HistoryStore | None = None,
+        provenance: Provenance | None = None,
+        tolerances: dict[str, float] | None = None,
+        alpha: float = 0.05,
+        history_window: int = 30,
+    ):
         self.baseline_dir = baseline_dir
         self.test_name = test_name
         self.update_mode = update_mode
+        self.results_dir = results_dir
+        self.history = history
+        self.provenance = provenance or Provenance(skill_tree_hash=None, git_commit=None)
+        self.tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+        self.alpha = alpha
+        self.history_window = history_window
         self.baseline_dir.mkdir(exist_ok=True)
 
     @property
@@ -38,60 +81,109 @@ class BaselineManager:
             return deserialize_value(f.read(), ClaudeExecutionResultSummary)
 
     def save_baseline(self, summary: ClaudeExecutionResultSummary) -> None:
-        with self.baseline_path.open("w") as f:
-            f.write(serialize_value(summary, indent=2))
+        with file_lock(self.logs_dir / ".locks" / f"{self.test_name}.lock"):
+            atomic_write_text(self.baseline_path, serialize_value(summary, indent=2))
 
     def save_log(self, result: ClaudeExecutionResult) -> Path:
         """Save execution results to a timestamped run directory.
 
-        Creates: logs/{test_name}/{timestamp}/summary.json, stdout.txt, stderr.txt
+        Creates: logs/{test_name}/{timestamp}_{worker}/manifest.json. The summary.json,
+        stdout.txt and stderr.txt it lists are stored compressed and deduplicated in
+        logs/blobs; rebuild them with `dg-eval logs restore`.
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        run_dir = self.logs_dir / self.test_name / timestamp
-        run_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+        run_dir = self.logs_dir / self.test_name / f"{timestamp}_{_worker_id()}"
+        run_dir.mkdir(parents=True)
+        write_logs(run_dir, log_files(result), BlobStore(self.logs_dir / "blobs"))
+        return run_dir
 
-        with (run_dir / "summary.json").open("w") as f:
-            json.dump(result.messages, f, indent=2)
-        with (run_dir / "stdout.txt").open("w") as f:
-            f.write(result.stdout)
-        with (run_dir / "stderr.txt").open("w") as f:
-            f.write(result.stderr)
+    def record_result(
+        self, summary: ClaudeExecutionResultSummary, run_dir: Path, regression: str | None
+    ) -> None:
+        """Record this test's outcome in the history store and the worker's results file."""
+        if self.history is not None:
+            self.history.record(
+                self.test_name,
+                summary,
+                self.provenance,
+                is_baseline=self.update_mode,
+                regressed=regression is not None,
+                run_dir=run_dir,
+            )
+        if self.results_dir is None:
+            return
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        record = {
+            "test": self.test_name,
+            "worker": _worker_id(),
+            "run_dir": str(run_dir),
+            "input_tokens": summary.input_tokens,
+            "output_tokens": summary.output_tokens,
+            "cost_usd": summary.cost_usd,
+            "execution_time_ms": summary.execution_time_ms,
+            "tools_used": len(summary.tools_used),
+            "regression": regression,
+        }
+        with (self.results_dir / f"{_worker_id()}.jsonl").open("a") as f:
+            f.write(json.dumps(record) + "\n")
 
-        return run_dir
+    def _reference(self) -> dict[str, list[float]]:
+        """Per-metric reference sample: recent baseline runs and runs that passed the gate.
+
+        Regressed runs are left out so that they cannot drag the reference along with them.
+        With fewer than _MIN_REFERENCE_RUNS accepted runs, the committed baseline is used.
+        """
+        runs = []
+        if self.history is not None:
+            runs = [
+                run
+                for run in self.history.runs(self.test_name, last=self.history_window)
+                if not run.budget_aborted and (run.is_baseline or not run.regressed)
+            ]
+        if len(runs) >= _MIN_REFERENCE_RUNS:
+            return {
+                metric.name: [run.metric(metric.name) for run in runs] for metric in SUMMARY_METRICS
+            }
+        baseline = self.baseline
+        if baseline is None:
+            return {}
+        return {metric.name: [metric.extract(baseline)] for metric in SUMMARY_METRICS}
 
     def _assert_improvement(
         self,
-        old: ClaudeExecutionResultSummary | None,
+        reference: dict[str, list[float]],
         new: ClaudeExecutionResultSummary,
     ) -> None:
-        """Assert that the new summary is an improvement over the old summary."""
-        if old is None:
+        """Assert that the new summary is not a regression from the reference sample.
+
+        Uses a tolerance band plus a Mann-Whitney test per metric, so ordinary run-to-run
+        noise does not fail the test.
+        """
+        if not reference:
             return
 
+        checks = [
+            check_regression(
+                metric,
+                reference[metric.name],
+                [metric.extract(new)],
+                tolerance=self.tolerances[metric.name],
+                alpha=self.alpha,
+            )
+            for metric in SUMMARY_METRICS
+        ]
         metrics = {
-            "tools_used": {
-                "baseline": len(old.tools_used),
-                "current": len(new.tools_used),
-                "delta": len(new.tools_used) - len(old.tools_used),
-            },
-            "input_tokens": {
-                "baseline": old.input_tokens,
-                "current": new.input_tokens,
-                "delta": new.input_tokens - old.input_tokens,
-            },
-            "output_tokens": {
-                "baseline": old.output_tokens,
-                "current": new.output_tokens,
-                "delta": new.output_tokens - old.output_tokens,
-            },
-            "execution_time_ms": {
-                "baseline": old.execution_time_ms,
-                "current": new.execution_time_ms,
-                "delta": new.execution_time_ms - old.execution_time_ms,
-            },
+            check.metric.name: {
+                "reference_median": check.reference_median,
+                "reference_runs": len(reference[check.metric.name]),
+                "current": check.current_mean,
+                "limit": check.limit,
+                "p_value": check.p_value,
+            }
+            for check in checks
         }
 
-        regressions = [name for name, m in metrics.items() if m["delta"] > 0]
+        regressions = [check.metric.name for check in checks if check.regressed]
 
         if regressions:
             raise AssertionError(
@@ -100,11 +192,26 @@ class BaselineManager:
             )
 
     def assert_improved(self, result: ClaudeExecutionResult) -> None:
+        """Save the run and fail the test if it regresses from the reference.
+
+        In update mode the run becomes the new baseline and is recorded as accepted without
+        being gated.
+        """
+        run_dir = self.save_log(result)
         if self.update_mode:
             self.save_baseline(result.summary)
+            self.record_result(result.summary, run_dir, regression=None)
+            return
 
-        self.save_log(result)
-        self._assert_improvement(self.baseline, result.summary)
+        try:
+            self._assert_improvement(self._reference(), result.summary)
+        except AssertionError as exc:
+            self.record_result(result.summary, run_dir, regression=str(exc))
+            raise
+        self.record_result(result.summary, run_dir, regression=None)
+
+
+_BASELINE_DIR = Path(__file__).parent / "__baselines__"
 
 
 def pytest_addoption(parser: pytest.Parser):
@@ -114,14 +221,122 @@ def pytest_addoption(parser: pytest.Parser):
         default=False,
         help="Update baseline snapshots instead of comparing against them",
     )
+    parser.addoption(
+        "--regression-tolerance",
+        type=float,
+        default=None,
+        help="Relative change tolerated in every metric before it can count as a regression "
+        "(default: per-metric tolerances)",
+    )
+    parser.addoption(
+        "--regression-alpha",
+        type=float,
+        default=0.05,
+        help="Significance level of the regression test against recorded history",
+    )
+    parser.addoption(
+        "--history-window",
+        type=int,
+        default=30,
+        help="Number of recent recorded runs to compare each test against",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # The controller picks one results directory per session; xdist workers inherit it
+    # through the environment.
+    if not hasattr(config, "workerinput"):
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+        os.environ[_RESULTS_DIR_ENV] = str(_BASELINE_DIR / "logs" / "sessions" / timestamp)
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    """Merge the per-worker results files into a single report on the controller.
+
+    Also applies the retention policy to old run logs, keeping baseline runs.
+    """
+    if hasattr(session.config, "workerinput"):
+        return
+    logs_dir = _BASELINE_DIR / "logs"
+    history_path = default_history_path()
+    if logs_dir.exists():
+        gc_report = collect_garbage_periodically(
+            logs_dir / "gc.stamp",
+            logs_dirs=[logs_dir],
+            include_temp=False,
+            blob_stores=[BlobStore(logs_dir / "blobs")],
+            protected=(
+                HistoryStore(history_path).baseline_run_dirs() if history_path.exists() else []
+            ),
+        )
+        if gc_report is not None and (gc_report.removed or gc_report.blobs_removed):
+            session.config.stash[_gc_report_key] = gc_report
+    results_dir = Path(os.environ[_RESULTS_DIR_ENV])
+    if not results_dir.exists():
+        return
+    records = [
+        json.loads(line)
+        for path in sorted(results_dir.glob("*.jsonl"))
+        for line in path.read_text().splitlines()
+        if line
+    ]
+    records.sort(key=lambda record: record["test"])
+    report = {
+        "tests": records,
+        "totals": {
+            "sessions": len(records),
+            "regressions": sum(record["regression"] is not None for record in records),
+            "input_tokens": sum(record["input_tokens"] for record in records),
+            "output_tokens": sum(record["output_tokens"] for record in records),
+            "cost_usd": sum(record["cost_usd"] for record in records),
+        },
+    }
+    report_path = results_dir / "report.json"
+    atomic_write_text(report_path, json.dumps(report, indent=2) + "\n")
+    session.config.stash[_results_report_key] = report_path
+
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config) -> None:
+    gc_report = config.stash.get(_gc_report_key, None)
+    if gc_report is not None:
+        terminalreporter.write_sep("-", "log cleanup")
+        for path in gc_report.removed:
+            terminalreporter.write_line(f"Removed {path}")
+        terminalreporter.write_line(gc_report.describe())
+    report_path = config.stash.get(_results_report_key, None)
+    if report_path is None:
+        return
+    totals = json.loads(report_path.read_text())["totals"]
+    terminalreporter.write_sep("-", "benchmark report")
+    terminalreporter.write_line(
+        f"{totals['sessions']} sessions, {totals['regressions']} regressions, "
+        f"{totals['input_tokens']:,} input / {totals['output_tokens']:,} output tokens, "
+        f"${totals['cost_usd']:.2f}"
+    )
+    terminalreporter.write_line(f"Report: {report_path}")
+
+
+@pytest.fixture(scope="session")
+def _provenance() -> Provenance:
+    return Provenance.current()
 
 
 @pytest.fixture
-def baseline_manager(request) -> BaselineManager:
+def baseline_manager(request, _provenance: Provenance) -> BaselineManager:
     """Provides baseline management with --snapshot-update support."""
-    baseline_dir = Path(__file__).parent / "__baselines__"
     update_mode = request.config.getoption("--snapshot-update")
-    return BaselineManager(baseline_dir, test_name=request.node.name, update_mode=update_mode)
+    tolerance = request.config.getoption("--regression-tolerance")
+    return BaselineManager(
+        _BASELINE_DIR,
+        test_name=request.node.name,
+        update_mode=update_mode,
+        results_dir=Path(os.environ[_RESULTS_DIR_ENV]),
+        history=HistoryStore(default_history_path()),
+        provenance=_provenance,
+        tolerances=dict.fromkeys(DEFAULT_TOLERANCES, tolerance) if tolerance is not None else None,
+        alpha=request.config.getoption("--regression-alpha"),
+        history_window=request.config.getoption("--history-window"),
+    )
 
 
 @pytest.fixture(scope="session")
@@ -129,24 +344,64 @@ def project_name() -> str:
     return "acme_co_dataeng"
 
 
+def _scaffold_project(project_name: str, tree: Path) -> None:
+    subprocess.run(
+        ["uvx", "create-dagster", "project", project_name, "--no-uv-sync"],
+        cwd=tree,
+        check=True,
+    )
+    if not (tree / project_name / "pyproject.toml").exists():
+        raise RuntimeError(f"create-dagster did not produce a project in {tree / project_name}")
+    # Resolve once, so that synced templates are keyed by pinned versions rather than by
+    # whatever the unpinned requirements in pyproject.toml resolve to on the day.
+    subprocess.run(["uv", "lock"], cwd=tree / project_name, check=True)
+
+
 @pytest.fixture(scope="session")
 def _empty_project(project_name: str) -> Iterator[Path]:
     # base empty project that we'll copy into others to avoid having to
-    # run create-dagster for each test
+    # run create-dagster for each test. The scaffold itself is cached across
+    # sessions (and shared by concurrent ones) per create-dagster version.
+    version = subprocess.run(
+        ["uvx", "create-dagster", "--version"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+    key = hashlib.sha256(f"{version}\0{project_name}\0locked".encode()).hexdigest()
+    scaffolds = WorkspaceSnapshots(default_cache_dir() / "scaffolds", max_snapshots=4)
     with tempfile.TemporaryDirectory() as tmp_dir:
-        subprocess.run(
-            ["uvx", "create-dagster", "project", project_name, "--no-uv-sync"],
-            cwd=tmp_dir,
-            check=False,
-        )
-        yield Path(tmp_dir) / project_name
+        scaffold_dir = Path(tmp_dir) / "scaffold"
+        scaffolds.checkout(key, lambda tree: _scaffold_project(project_name, tree), scaffold_dir)
+        yield scaffold_dir / project_name
+
+
+def _sync_project(project: Path, tree: Path) -> None:
+    shutil.copytree(project, tree, dirs_exist_ok=True)
+    subprocess.run(["uv", "sync", "--frozen"], cwd=tree, check=True)
+
+
+@pytest.fixture(scope="session")
+def _project_templates() -> WorkspaceSnapshots:
+    # synced copies of the empty project, kept across sessions so that `uv sync`
+    # only runs when the scaffold's dependencies change
+    return WorkspaceSnapshots(default_cache_dir() / "project-templates", max_snapshots=4)
 
 
 @pytest.fixture
-def empty_project_path(_empty_project: Path) -> Iterator[Path]:
+def empty_project_path(
+    _empty_project: Path, _project_templates: WorkspaceSnapshots
+) -> Iterator[Path]:
+    # The scaffold's lockfile pins every dependency; the uv version covers changes to
+    # how uv lays out the venv it syncs from that lock.
+    uv_version = subprocess.run(
+        ["uv", "--version"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+    lockfiles = [_empty_project / name for name in ("pyproject.toml", "uv.lock")]
+    key = "-".join([uv_version, *(hash_path(path) for path in lockfiles)])
+    key = hashlib.sha256(key.encode()).hexdigest()
     with unset_virtualenv(), tempfile.TemporaryDirectory() as tmp_dir:
         project_dir = Path(tmp_dir) / _empty_project.name
-        shutil.copytree(_empty_project, project_dir)
-        # Create a fresh venv in the copy
-        subprocess.run(["uv", "sync"], cwd=project_dir, check=True)
+        # Clone a prebuilt venv (copy-on-write where supported, else a full copy) rather
+        # than syncing a fresh one in every test
+        _project_templates.checkout(
+            key, lambda tree: _sync_project(_empty_project, tree), project_dir
+        )
         yield project_dir
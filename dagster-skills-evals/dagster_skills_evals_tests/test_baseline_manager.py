@@ -0,0 +1,68 @@
+"""Unit tests for BaselineManager's regression gate and --snapshot-update mode."""
+
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from dagster_skills_evals.execution import ClaudeExecutionResult
+from dagster_skills_evals.history import HistoryStore
+from dagster_skills_evals_tests.conftest import _MIN_REFERENCE_RUNS, BaselineManager
+
+TEST = "test_asset"
+
+
+def _result(input_tokens: int) -> ClaudeExecutionResult:
+    events = [
+        {
+            "type": "result",
+            "subtype": "success",
+            "duration_ms": 1_000,
+            "total_cost_usd": 0.01,
+            "usage": {"input_tokens": input_tokens, "output_tokens": 100},
+        }
+    ]
+    return ClaudeExecutionResult(
+        cli_result=subprocess.CompletedProcess(
+            args=["claude"], returncode=0, stdout=json.dumps(events), stderr=""
+        )
+    )
+
+
+@pytest.fixture(autouse=True)
+def _no_narrative(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(ClaudeExecutionResult, "generate_narrative_summary", lambda *_: [])
+
+
+def _manager(tmp_path: Path, history: HistoryStore, *, update_mode: bool) -> BaselineManager:
+    return BaselineManager(tmp_path / "baselines", TEST, update_mode=update_mode, history=history)
+
+
+def _history(tmp_path: Path, input_tokens: int) -> HistoryStore:
+    history = HistoryStore(tmp_path / "history.sqlite3")
+    manager = _manager(tmp_path, history, update_mode=True)
+    for _ in range(_MIN_REFERENCE_RUNS):
+        manager.assert_improved(_result(input_tokens))
+    return history
+
+
+def test_regression_from_history_fails_and_is_recorded(tmp_path: Path):
+    history = _history(tmp_path, input_tokens=1_000)
+
+    with pytest.raises(AssertionError, match="input_tokens"):
+        _manager(tmp_path, history, update_mode=False).assert_improved(_result(10_000))
+    assert history.runs(TEST, last=1)[0].regressed
+
+
+def test_update_mode_saves_the_baseline_without_gating(tmp_path: Path):
+    history = _history(tmp_path, input_tokens=1_000)
+    manager = _manager(tmp_path, history, update_mode=True)
+
+    manager.assert_improved(_result(10_000))
+
+    assert manager.baseline is not None
+    assert manager.baseline.input_tokens == 10_000  # noqa: PLR2004
+    latest = history.runs(TEST, last=1)[0]
+    assert latest.is_baseline
+    assert not latest.regressed
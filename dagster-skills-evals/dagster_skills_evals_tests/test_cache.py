@@ -0,0 +1,200 @@
+"""Unit tests for the content-addressed session cache."""
+
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from dagster_skills_evals.cache import ResultCache, result_cache_key
+from dagster_skills_evals.cli import _shared
+from dagster_skills_evals.execution import ClaudeExecutionResult, RunBudget
+
+EVENTS = [
+    {"type": "system", "subtype": "init"},
+    {"type": "assistant", "message": {"content": [{"type": "text", "text": "done"}]}},
+    {
+        "type": "result",
+        "subtype": "success",
+        "duration_ms": 1200,
+        "total_cost_usd": 0.25,
+        "usage": {"input_tokens": 10, "output_tokens": 5},
+    },
+]
+
+
+def _result(events: list[dict], returncode: int = 0) -> ClaudeExecutionResult:
+    return ClaudeExecutionResult(
+        cli_result=subprocess.CompletedProcess(
+            args=["claude"], returncode=returncode, stdout=json.dumps(events), stderr="warn"
+        )
+    )
+
+
+def _script(path: Path, body: str) -> Path:
+    path.write_text(f"#!/bin/sh\n{body}\n")
+    path.chmod(0o755)
+    return path
+
+
+def _key(tmp_path: Path, **kwargs) -> str | None:
+    script = tmp_path / "setup.sh"
+    if not script.exists():
+        _script(script, "echo setup")
+    kwargs = {
+        "prompt": "Build an asset",
+        "extra_args": [],
+        "setup_scripts": [script, None],
+        "model": "sonnet",
+        **kwargs,
+    }
+    return result_cache_key(**kwargs)
+
+
+def test_key_is_stable_for_identical_inputs(tmp_path: Path):
+    assert _key(tmp_path) == _key(tmp_path)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"prompt": "Build a sensor"},
+        {"extra_args": ["--max-turns", "3"]},
+        {"model": "opus"},
+        {"trial": 1},
+        {"budget": RunBudget(max_tokens=1_000)},
+        {"prompt_caching": True},
+    ],
+)
+def test_key_changes_with_each_input(tmp_path: Path, change: dict):
+    assert _key(tmp_path, **change) != _key(tmp_path)
+
+
+def test_key_changes_with_setup_script_contents(tmp_path: Path):
+    before = _key(tmp_path)
+    _script(tmp_path / "setup.sh", "echo changed")
+    assert _key(tmp_path) != before
+
+
+def test_key_changes_with_plugin_dir_contents(tmp_path: Path):
+    skill = tmp_path / "plugins" / "skills" / "SKILL.md"
+    skill.parent.mkdir(parents=True)
+    skill.write_text("v1")
+    args = ["--plugin-dir", str(tmp_path / "plugins")]
+    before = _key(tmp_path, extra_args=args)
+    assert before is not None
+
+    skill.write_text("v2")
+    assert _key(tmp_path, extra_args=args) != before
+    assert _key(tmp_path, extra_args=[f"--plugin-dir={tmp_path / 'plugins'}"]) is not None
+
+
+def test_relative_plugin_dir_is_resolved_against_the_workspace(tmp_path: Path):
+    workspace = tmp_path / "workspace"
+    (workspace / "plugins").mkdir(parents=True)
+    (workspace / "plugins" / "SKILL.md").write_text("v1")
+    args = ["--plugin-dir", "plugins"]
+
+    assert _key(tmp_path, extra_args=args) is None
+    before = _key(tmp_path, extra_args=args, workspace=workspace)
+    assert before is not None
+    (workspace / "plugins" / "SKILL.md").write_text("v2")
+    assert _key(tmp_path, extra_args=args, workspace=workspace) != before
+
+
+def test_missing_plugin_dir_is_not_cacheable(tmp_path: Path):
+    assert _key(tmp_path, extra_args=["--plugin-dir", str(tmp_path / "missing")]) is None
+
+
+def test_put_get_round_trip(tmp_path: Path):
+    cache = ResultCache(tmp_path / "results")
+    assert cache.get("ab" * 32) is None
+    cache.put("ab" * 32, _result(EVENTS))
+
+    cached = cache.get("ab" * 32)
+    assert cached is not None
+    assert cached.events == EVENTS
+    assert cached.stderr == "warn"
+    assert cached.return_code == 0
+    assert cached.cost_usd == EVENTS[-1]["total_cost_usd"]
+
+
+def test_failed_and_truncated_sessions_are_not_stored(tmp_path: Path):
+    cache = ResultCache(tmp_path / "results")
+    cache.put("aa" * 32, _result(EVENTS, returncode=1))
+    cache.put("bb" * 32, _result(EVENTS[:-1]))
+    assert cache.get("aa" * 32) is None
+    assert cache.get("bb" * 32) is None
+
+
+def test_evict_removes_least_recently_used_entries(tmp_path: Path):
+    cache = ResultCache(tmp_path / "results", max_bytes=0)
+    cache.put("ab" * 32, _result(EVENTS))
+    assert cache.get("ab" * 32) is None
+
+
+class _FakeClaude:
+    def __init__(self):
+        self.workspaces: list[str] = []
+
+    def __call__(self, *, target_dir: str, **_kwargs) -> ClaudeExecutionResult:
+        self.workspaces.append(target_dir)
+        return _result(EVENTS)
+
+
+@pytest.fixture
+def claude(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> _FakeClaude:
+    fake = _FakeClaude()
+    monkeypatch.setattr(_shared, "execute_prompt_stream_json", fake)
+    # Keep the session workspaces under tmp_path.
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return fake
+
+
+def _run(cache: ResultCache, setup: Path, **kwargs):
+    return _shared.run_session(
+        "Build an asset",
+        setup_script=setup,
+        extra_args=kwargs.pop("extra_args", []),
+        timeout=10,
+        cache=cache,
+        **kwargs,
+    )
+
+
+def test_run_session_reuses_cached_sessions_unless_refreshed(tmp_path: Path, claude: _FakeClaude):
+    cache = ResultCache(tmp_path / "results")
+    setup = _script(tmp_path / "setup.sh", "true")
+
+    _, tmp_dir = _run(cache, setup)
+    assert tmp_dir is not None
+    result, tmp_dir = _run(cache, setup)
+    assert tmp_dir is None
+    assert result.events == EVENTS
+    assert len(claude.workspaces) == 1
+
+    _run(cache, setup, refresh_cache=True)
+    _run(cache, setup, trial=1)
+    assert len(claude.workspaces) == 1 + 2
+
+
+def test_run_session_hashes_relative_plugin_dirs_in_the_workspace(
+    tmp_path: Path, claude: _FakeClaude
+):
+    cache = ResultCache(tmp_path / "results")
+    version = tmp_path / "version"
+    version.write_text("v1")
+    setup = _script(tmp_path / "setup.sh", f"mkdir plugins && cp {version} plugins/SKILL.md")
+    args = ["--plugin-dir", "plugins"]
+
+    _run(cache, setup, extra_args=args)
+    _, tmp_dir = _run(cache, setup, extra_args=args)
+    assert tmp_dir is None
+    assert len(claude.workspaces) == 1
+
+    # The setup script is unchanged, but the skill it copies into the workspace is not.
+    version.write_text("v2")
+    _, tmp_dir = _run(cache, setup, extra_args=args)
+    assert tmp_dir is not None
+    assert len(claude.workspaces) == 1 + 1
@@ -0,0 +1,54 @@
+"""Unit tests for the context cost of link routes through a skill."""
+
+from pathlib import Path
+
+import pytest
+
+from dagster_skills_evals import context_cost
+from dagster_skills_evals.context_cost import analyze_context_cost
+
+# Files of a small skill and the files each one links to.
+SKILL = {
+    "SKILL.md": ["a.md", "b.md"],
+    "a.md": ["b.md", "c.md"],
+    "b.md": ["a.md", "SKILL.md"],
+    "c.md": [],
+}
+
+
+def _write_skill(root: Path, links: dict[str, list[str]]) -> Path:
+    for name, targets in links.items():
+        body = "\n".join(f"- [{target}](./{target})" for target in targets)
+        (root / name).write_text(f"# {name}\n\n{body}\n{name * 50}\n")
+    return root
+
+
+def _worst(root: Path) -> dict[str, tuple[str, ...]]:
+    return {
+        str(route.target): tuple(map(str, route.worst.files))
+        for route in analyze_context_cost(root).routes
+    }
+
+
+def test_worst_route_takes_the_costliest_simple_path(tmp_path: Path):
+    worst = _worst(_write_skill(tmp_path, SKILL))
+    assert worst["c.md"] == ("SKILL.md", "b.md", "a.md", "c.md")
+    assert worst["a.md"] == ("SKILL.md", "b.md", "a.md")
+
+
+def test_worst_route_does_not_depend_on_link_order(tmp_path: Path):
+    reordered = {name: targets[::-1] for name, targets in SKILL.items()}
+    (tmp_path / "one").mkdir()
+    (tmp_path / "two").mkdir()
+    assert _worst(_write_skill(tmp_path / "one", SKILL)) == _worst(
+        _write_skill(tmp_path / "two", reordered)
+    )
+
+
+def test_worst_route_falls_back_to_links_leading_away_from_entry(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(context_cost, "_MAX_ROUTE_STEPS", 1)
+    worst = _worst(_write_skill(tmp_path, SKILL))
+    assert worst["c.md"] == ("SKILL.md", "a.md", "c.md")
+    assert worst["b.md"] == ("SKILL.md", "b.md")
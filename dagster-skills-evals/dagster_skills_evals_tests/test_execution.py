@@ -0,0 +1,169 @@
+"""Unit tests for streaming sessions against a stand-in `claude` executable, and for the
+latencies derived from event arrival times."""
+
+import json
+import subprocess
+import sys
+import time
+from array import array
+from pathlib import Path
+
+import pytest
+
+from dagster_skills_evals.cli._shared import summary_to_dict
+from dagster_skills_evals.execution import (
+    LATENCY_FIELDS,
+    ClaudeExecutionResult,
+    LiveRunMetrics,
+    RunBudget,
+    execute_prompt_stream_json,
+)
+
+# Long enough that a test only finishes in time if the session is terminated early.
+_HANG_SECONDS = 30
+
+_FAKE_CLAUDE = f"""#!{sys.executable}
+import json, sys, time
+sys.stdin.read()
+for i in range(3):
+    message = {{
+        "id": f"msg{{i}}",
+        "model": "claude-sonnet-4-6",
+        "content": [{{"type": "text", "text": "working"}}],
+        "usage": {{"input_tokens": 1000, "output_tokens": 100}},
+    }}
+    print(json.dumps({{"type": "assistant", "message": message}}), flush=True)
+if "--hang" in sys.argv:
+    time.sleep({_HANG_SECONDS})
+print(json.dumps({{
+    "type": "result",
+    "subtype": "success",
+    "duration_ms": 10,
+    "total_cost_usd": 0.05,
+    "usage": {{"input_tokens": 3000, "output_tokens": 300}},
+}}), flush=True)
+"""
+
+
+@pytest.fixture(autouse=True)
+def _fake_claude(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "claude").write_text(_FAKE_CLAUDE)
+    (bin_dir / "claude").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{Path(sys.executable).parent}")
+
+
+def test_budget_exceeded_reports_the_first_crossed_limit():
+    metrics = LiveRunMetrics(input_tokens=900, output_tokens=200, cost_usd=0.5, turns=3)
+
+    assert RunBudget(max_tokens=2_000, max_cost_usd=1.0, max_turns=3).exceeded(metrics) is None
+    assert "token budget" in (RunBudget(max_tokens=1_000, max_turns=1).exceeded(metrics) or "")
+    assert "cost budget" in (RunBudget(max_cost_usd=0.1).exceeded(metrics) or "")
+    assert "turn budget" in (RunBudget(max_turns=2).exceeded(metrics) or "")
+
+
+def test_session_is_terminated_once_over_budget(tmp_path: Path):
+    metrics = LiveRunMetrics()
+    transcript = tmp_path / "logs" / "stdout.txt"
+    started = time.monotonic()
+
+    result = execute_prompt_stream_json(
+        "prompt",
+        str(tmp_path),
+        extra_args=["--hang"],
+        timeout=_HANG_SECONDS * 2,
+        metrics=metrics,
+        budget=RunBudget(max_turns=1),
+        transcript_path=transcript,
+    )
+
+    assert time.monotonic() - started < _HANG_SECONDS
+    assert result.budget_aborted
+    assert result.abort_reason == "turn budget exceeded (2 > 1)"
+    # The stand-in result event carries what was used before the abort.
+    assert result.input_tokens == metrics.input_tokens == 1000 + 1000
+    assert result.cost_usd == metrics.cost_usd > 0
+    assert json.loads(transcript.read_text())[-1]["subtype"] == "budget_aborted"
+
+
+def test_session_within_budget_keeps_its_result(tmp_path: Path):
+    result = execute_prompt_stream_json(
+        "prompt", str(tmp_path), timeout=_HANG_SECONDS, budget=RunBudget(max_turns=3)
+    )
+
+    assert not result.budget_aborted
+    assert result.abort_reason is None
+    assert result.cost_usd == 0.05  # noqa: PLR2004
+
+
+def _assistant(msg_id: str, block: dict) -> dict:
+    return {"type": "assistant", "message": {"id": msg_id, "content": [block]}}
+
+
+def _tool_result(tool_use_id: str) -> dict:
+    content = [{"type": "tool_result", "tool_use_id": tool_use_id, "content": "ok"}]
+    return {"type": "user", "message": {"content": content}}
+
+
+# A session of three turns, timed in seconds since it started: the first streams a text and
+# a Read block, the second loads a skill, the third answers.
+_TIMED_EVENTS = [
+    (0.1, {"type": "system", "subtype": "init"}),
+    (1.0, _assistant("msg1", {"type": "text", "text": "reading"})),
+    (1.5, _assistant("msg1", {"type": "tool_use", "id": "t1", "name": "Read", "input": {}})),
+    (3.5, _tool_result("t1")),
+    (4.0, _assistant("msg2", {"type": "tool_use", "id": "t2", "name": "Skill", "input": {}})),
+    (4.5, _tool_result("t2")),
+    (6.0, _assistant("msg3", {"type": "text", "text": "done"})),
+    (
+        6.5,
+        {
+            "type": "result",
+            "subtype": "success",
+            "duration_ms": 6_500,
+            "total_cost_usd": 0.01,
+            "usage": {"input_tokens": 1_000, "output_tokens": 100},
+        },
+    ),
+]
+
+
+def _timed_result(event_times: array | None) -> ClaudeExecutionResult:
+    return ClaudeExecutionResult(
+        cli_result=subprocess.CompletedProcess(args=["claude"], returncode=0, stdout=None),
+        parsed_events=[event for _, event in _TIMED_EVENTS],
+        started_at=0.0 if event_times is not None else None,
+        event_times=event_times,
+    )
+
+
+def test_latencies_are_derived_from_event_times():
+    result = _timed_result(array("d", [at for at, _ in _TIMED_EVENTS]))
+
+    assert result.latency == {
+        "time_to_first_token_ms": 1_000,
+        "time_to_first_tool_ms": 1_500,
+        "time_to_first_skill_ms": 4_000,
+        # Turns took 1.4s (from init), 0.5s and 1.5s (each from the previous tool result).
+        "turn_latency_p50_ms": 1_400,
+        "turn_latency_p95_ms": 1_490,
+        "turn_latency_max_ms": 1_500,
+        # Tool calls took 2s and 0.5s.
+        "tool_latency_p50_ms": 1_250,
+        "tool_latency_p95_ms": 1_925,
+        "tool_latency_max_ms": 2_000,
+    }
+
+
+def test_latencies_are_unknown_without_event_times():
+    assert _timed_result(None).latency == dict.fromkeys(LATENCY_FIELDS)
+
+
+def test_summary_json_includes_latencies(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(ClaudeExecutionResult, "generate_narrative_summary", lambda *_: [])
+    result = _timed_result(array("d", [at for at, _ in _TIMED_EVENTS]))
+
+    output = summary_to_dict(result.summary)
+    assert output["turns"] == len(["msg1", "msg2", "msg3"])
+    assert {field: output[field] for field in LATENCY_FIELDS} == result.latency
@@ -0,0 +1,86 @@
+"""Unit tests for the run history store and its schema migration."""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from dagster_skills_evals.execution import ClaudeExecutionResultSummary
+from dagster_skills_evals.history import HistoryStore, Provenance
+
+TEST = "test_asset"
+PROVENANCE = Provenance(skill_tree_hash="abc", git_commit="def")
+
+# The runs table as created before the regressed column was added.
+_SCHEMA_WITHOUT_REGRESSED = """
+CREATE TABLE runs (
+    id INTEGER PRIMARY KEY,
+    test TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    model TEXT NOT NULL,
+    skill_tree_hash TEXT,
+    git_commit TEXT,
+    is_baseline INTEGER NOT NULL DEFAULT 0,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    execution_time_ms INTEGER NOT NULL,
+    tool_calls INTEGER NOT NULL,
+    budget_aborted INTEGER NOT NULL DEFAULT 0,
+    run_dir TEXT,
+    summary TEXT NOT NULL
+);
+"""
+
+
+def _summary(input_tokens: int) -> ClaudeExecutionResultSummary:
+    return ClaudeExecutionResultSummary(
+        input_tokens=input_tokens,
+        output_tokens=100,
+        cost_usd=0.01,
+        execution_time_ms=1_000,
+        tools_used=["Read", "Bash"],
+        model_usage=[],
+        narrative_summary=[],
+    )
+
+
+def test_runs_are_returned_newest_first_with_filters(tmp_path: Path):
+    store = HistoryStore(tmp_path / "history.sqlite3")
+    store.record(TEST, _summary(1_000), PROVENANCE, is_baseline=True, timestamp=1.0)
+    store.record(TEST, _summary(2_000), PROVENANCE, regressed=True, timestamp=2.0)
+    store.record("other", _summary(3_000), PROVENANCE, timestamp=3.0)
+
+    runs = store.runs(TEST)
+    assert [run.input_tokens for run in runs] == [2_000, 1_000]
+    assert [run.regressed for run in runs] == [True, False]
+    assert runs[0].tool_calls == len(["Read", "Bash"])
+    assert [run.input_tokens for run in store.runs(TEST, baselines_only=True)] == [1_000]
+    assert store.runs(TEST, skill_tree_hash="other") == []
+    assert store.metric_values(TEST, "input_tokens", last=1) == [2_000]
+    assert store.summary(runs[0].id) == _summary(2_000)
+
+
+def test_unknown_metric_is_rejected(tmp_path: Path):
+    with pytest.raises(ValueError, match="Unknown metric"):
+        HistoryStore(tmp_path / "history.sqlite3").metric_values(TEST, "summary")
+
+
+def test_store_without_regressed_column_is_migrated(tmp_path: Path):
+    path = tmp_path / "history.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(_SCHEMA_WITHOUT_REGRESSED)
+        conn.execute(
+            "INSERT INTO runs (test, timestamp, model, input_tokens, output_tokens, cost_usd,"
+            " execution_time_ms, tool_calls, summary) VALUES (?, 1.0, 'm', 1000, 100, 0.01,"
+            " 1000, 0, '')",
+            (TEST,),
+        )
+    conn.close()
+
+    store = HistoryStore(path)
+    store.record(TEST, _summary(2_000), PROVENANCE, regressed=True, timestamp=2.0)
+
+    assert [run.regressed for run in store.runs(TEST)] == [True, False]
+    # Opening an already migrated store again leaves it alone.
+    assert len(HistoryStore(path).runs(TEST)) == 1 + 1
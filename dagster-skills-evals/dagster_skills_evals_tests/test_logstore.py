@@ -0,0 +1,70 @@
+"""Unit tests for deduplicated log storage."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from dagster_skills_evals.execution import format_transcript
+from dagster_skills_evals.logstore import MANIFEST_NAME, BlobStore, read_log, write_logs
+
+# Long enough to be split out of a log's JSON skeleton into its own blob.
+BIG = "skill file contents " * 100
+RUNS = 2
+
+
+def _events(run: int) -> list[dict]:
+    return [
+        {"type": "system", "subtype": "init", "run": run},
+        {"type": "user", "message": {"content": [{"type": "tool_result", "content": BIG}]}},
+        {"type": "result", "text": "déjà vu", "run": run},
+    ]
+
+
+def _manifest_entry(run_dir: Path, name: str) -> dict:
+    return json.loads((run_dir / MANIFEST_NAME).read_text())["files"][name]
+
+
+@pytest.mark.parametrize(
+    ("compact", "layout"), [(False, "transcript"), (True, "compact-transcript")]
+)
+def test_spooled_transcript_is_split_and_deduplicated(tmp_path: Path, compact: bool, layout: str):
+    store = BlobStore(tmp_path / "blobs")
+    texts = []
+    for run in range(RUNS):
+        transcript = tmp_path / f"spool{run}.txt"
+        texts.append(format_transcript(_events(run), compact=compact))
+        transcript.write_text(texts[-1])
+        write_logs(tmp_path / f"run{run}", {"stdout.txt": transcript}, store)
+
+    for run, text in enumerate(texts):
+        assert _manifest_entry(tmp_path / f"run{run}", "stdout.txt")["layout"] == layout
+        assert read_log(tmp_path / f"run{run}", "stdout.txt") == text
+    # One skeleton per run, plus the tool result both runs share.
+    assert len(list(store.root.glob("*/*.gz"))) == RUNS + 1
+
+
+def test_in_memory_transcript_is_split(tmp_path: Path):
+    store = BlobStore(tmp_path / "blobs")
+    text = format_transcript(_events(0))
+    write_logs(tmp_path / "run", {"stdout.txt": text}, store)
+    assert _manifest_entry(tmp_path / "run", "stdout.txt")["layout"] == "transcript"
+    assert read_log(tmp_path / "run", "stdout.txt") == text
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # Mixed serializations cannot be rebuilt from the parsed events.
+        format_transcript(_events(0)[:1]).replace('"type": ', '"type":'),
+        "not json\n",
+        "",
+    ],
+)
+def test_unrecognized_transcript_is_stored_verbatim(tmp_path: Path, text: str):
+    store = BlobStore(tmp_path / "blobs")
+    transcript = tmp_path / "spool.txt"
+    transcript.write_text(text)
+    write_logs(tmp_path / "run", {"stdout.txt": transcript}, store)
+    assert "blob" in _manifest_entry(tmp_path / "run", "stdout.txt")
+    assert read_log(tmp_path / "run", "stdout.txt") == text
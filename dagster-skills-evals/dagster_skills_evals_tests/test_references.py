@@ -0,0 +1,87 @@
+"""Unit tests for loading saved sessions in `dg-eval references`."""
+
+import importlib
+import json
+from pathlib import Path
+
+import pytest
+
+from dagster_skills_evals.references import load_run, reference_reads
+
+# The cli package re-exports the command function under the module's name.
+references_cli = importlib.import_module("dagster_skills_evals.cli.references")
+
+
+def _read_events(plugins_dir: Path) -> list[dict]:
+    """A Read of a skill file and the tool_result answering it."""
+    path = plugins_dir / "skills" / "dagster" / "SKILL.md"
+    return [
+        {
+            "type": "assistant",
+            "message": {
+                "content": [
+                    {
+                        "type": "tool_use",
+                        "id": "t1",
+                        "name": "Read",
+                        "input": {"file_path": str(path)},
+                    }
+                ]
+            },
+        },
+        {
+            "type": "user",
+            "message": {
+                "content": [{"type": "tool_result", "tool_use_id": "t1", "content": "skill text"}]
+            },
+        },
+    ]
+
+
+def _write_spooled(run_dir: Path, events: list[dict], tail: str = "]\n") -> None:
+    run_dir.mkdir(parents=True)
+    lines = "".join(f"{json.dumps(event)},\n" for event in events)
+    (run_dir / "stdout.txt").write_text(f"[\n{lines}{tail}")
+
+
+@pytest.fixture
+def plugins_dir(tmp_path: Path) -> Path:
+    skill_dir = tmp_path / "plugins" / "skills" / "dagster"
+    skill_dir.mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text("skill text")
+    return tmp_path / "plugins"
+
+
+def test_truncated_transcript_keeps_the_events_before_the_cut(tmp_path: Path, plugins_dir: Path):
+    _write_spooled(tmp_path / "run", _read_events(plugins_dir), tail='{"type": "assis')
+
+    reads = reference_reads(load_run(tmp_path / "run"), plugins_dir)
+    assert [read.reference for read in reads] == ["skills/dagster/SKILL.md"]
+
+
+def test_unreadable_transcript_raises_value_error(tmp_path: Path):
+    (tmp_path / "run").mkdir()
+    (tmp_path / "run" / "stdout.txt").write_text('[{"type": "assis')
+
+    with pytest.raises(ValueError, match="not a readable transcript"):
+        load_run(tmp_path / "run")
+
+
+def test_references_skips_unreadable_runs(
+    tmp_path: Path, plugins_dir: Path, capsys: pytest.CaptureFixture[str]
+):
+    _write_spooled(tmp_path / "logs" / "ok", _read_events(plugins_dir))
+    (tmp_path / "logs" / "broken").mkdir()
+    (tmp_path / "logs" / "broken" / "stdout.txt").write_text("not json")
+
+    references_cli.references(
+        [tmp_path / "logs"],
+        plugins_dir=plugins_dir,
+        include_unread=False,
+        limit=None,
+        output_json=True,
+    )
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["total_runs"] == 1
+    assert [ref["reference"] for ref in output["references"]] == ["skills/dagster/SKILL.md"]
@@ -0,0 +1,191 @@
+"""Unit tests for log retention: run selection, blob sweeping and garbage collection."""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from dagster_skills_evals.logstore import BlobStore, read_log, write_logs
+from dagster_skills_evals.retention import (
+    RetentionPolicy,
+    _Entry,
+    _select,
+    collect_garbage,
+    collect_garbage_periodically,
+)
+from dagster_skills_evals.workspace import WorkspaceRegistry
+
+DAY = 24 * 60 * 60
+NOW = 1_000 * DAY
+# Long enough to be split out of a log's JSON skeleton into its own blob.
+BIG = "x" * 10_000
+# Runs in the logs tree, and how many of them are old enough to be collected.
+RUNS = 3
+OLD_RUNS = 2
+
+
+def _entry(name: str, age_days: float, *, group: str | None = "test", **kwargs) -> _Entry:
+    return _Entry(Path(name), group, NOW - age_days * DAY, kwargs.pop("size", 1), **kwargs)
+
+
+def _names(entries: list[_Entry]) -> list[str]:
+    return [entry.path.name for entry in entries]
+
+
+def _age(path: Path, days: float) -> None:
+    timestamp = time.time() - days * DAY
+    os.utime(path, (timestamp, timestamp))
+
+
+def _write_run(run_dir: Path, store: BlobStore, text: str) -> Path:
+    run_dir.mkdir(parents=True)
+    write_logs(run_dir, {"stdout.txt": f'[{{"text": "{text}"}}]'}, store)
+    return run_dir / "manifest.json"
+
+
+def _blobs(store: BlobStore) -> set[Path]:
+    return set(store.root.glob("*/*.gz"))
+
+
+def _age_blobs(store: BlobStore) -> None:
+    for blob in _blobs(store):
+        _age(blob, 1)
+
+
+def test_select_by_age_keeps_recent_runs_of_each_test():
+    entries = [_entry(f"run{i}", age_days=20 + i) for i in range(5)]
+    selected = _select(entries, RetentionPolicy(max_age_days=14, keep_last=2), NOW)
+    assert _names(selected) == ["run4", "run3", "run2"]
+
+
+def test_select_keeps_protected_and_young_entries():
+    entries = [
+        _entry("baseline", 30, group=None, protected=True),
+        _entry("in-progress", 0.01, group=None),
+        _entry("stale", 30, group=None),
+    ]
+    selected = _select(entries, RetentionPolicy(max_age_days=0, keep_last=0), NOW)
+    assert _names(selected) == ["stale"]
+
+
+def test_select_by_size_removes_oldest_first():
+    entries = [_entry(f"run{i}", age_days=1 + i, size=100) for i in range(4)]
+    policy = RetentionPolicy(max_age_days=None, max_total_bytes=250, keep_last=0)
+    assert _names(_select(entries, policy, NOW)) == ["run3", "run2"]
+
+
+def test_sweep_keeps_live_and_fresh_blobs(tmp_path: Path):
+    store = BlobStore(tmp_path / "blobs")
+    _write_run(tmp_path / "live", store, BIG)
+    orphan = store.path(store.put(b"orphan"))
+    _age_blobs(store)
+    fresh = store.path(store.put(b"fresh"))
+
+    size = orphan.stat().st_size
+    assert store.sweep() == (1, size)
+    assert not orphan.exists()
+    assert fresh.exists()
+    assert read_log(tmp_path / "live", "stdout.txt") == f'[{{"text": "{BIG}"}}]'
+
+
+def test_sweep_only_dead_keeps_unregistered_blobs(tmp_path: Path):
+    store = BlobStore(tmp_path / "blobs")
+    dead = _write_run(tmp_path / "dead", store, BIG + "dead")
+    _write_run(tmp_path / "live", store, BIG)
+    # A run dir moved after registration, whose blobs no registered manifest references.
+    moved = _write_run(tmp_path / "moved", store, BIG + "moved")
+    moved.parent.rename(tmp_path / "elsewhere")
+    _age_blobs(store)
+    before = _blobs(store)
+
+    removed, _ = store.sweep(is_dead=lambda path: path == dead, only_dead=True, dry_run=True)
+    assert removed > 0
+    assert _blobs(store) == before
+
+    store.sweep(is_dead=lambda path: path == dead, only_dead=True)
+    assert read_log(tmp_path / "live", "stdout.txt") == f'[{{"text": "{BIG}"}}]'
+    assert read_log(tmp_path / "elsewhere", "stdout.txt") == f'[{{"text": "{BIG}moved"}}]'
+    assert len(_blobs(store)) == len(before) - removed
+
+    # An explicit sweep removes the unregistered blobs too.
+    assert store.sweep()[0] > 0
+
+
+def _logs_tree(tmp_path: Path) -> tuple[Path, BlobStore]:
+    logs_dir = tmp_path / "logs"
+    store = BlobStore(logs_dir / "blobs")
+    for i in range(RUNS):
+        _write_run(logs_dir / "test_a" / f"run{i}", store, BIG + str(i))
+        _age(logs_dir / "test_a" / f"run{i}", 30 - i)
+    store.put(b"unregistered")
+    _age_blobs(store)
+    return logs_dir, store
+
+
+def test_collect_garbage_removes_old_runs_and_their_blobs(tmp_path: Path):
+    logs_dir, store = _logs_tree(tmp_path)
+    policy = RetentionPolicy(max_age_days=14, keep_last=1)
+
+    dry = collect_garbage(
+        logs_dirs=[logs_dir], include_temp=False, blob_stores=[store], policy=policy, dry_run=True
+    )
+    assert sorted(path.name for path in dry.removed) == ["run0", "run1"]
+    assert (logs_dir / "test_a" / "run0").exists()
+
+    report = collect_garbage(
+        logs_dirs=[logs_dir], include_temp=False, blob_stores=[store], policy=policy
+    )
+    assert report.removed == dry.removed
+    assert report.kept == RUNS - OLD_RUNS
+    assert not (logs_dir / "test_a" / "run0").exists()
+    assert read_log(logs_dir / "test_a" / "run2", "stdout.txt").endswith('2"}]')
+    # The skeleton and the big string of each removed run, but not the unregistered blob.
+    assert report.blobs_removed == 2 * OLD_RUNS
+    assert store.path(store.put(b"unregistered")).exists()
+    assert report.describe().startswith(
+        f"Removed {OLD_RUNS} directories and {2 * OLD_RUNS} log blobs"
+    )
+
+
+def test_collect_garbage_periodically_keeps_unregistered_blobs(tmp_path: Path):
+    logs_dir, store = _logs_tree(tmp_path)
+    unregistered = store.path(store.put(b"unregistered"))
+    _age(unregistered, 1)
+    kwargs = {
+        "logs_dirs": [logs_dir],
+        "include_temp": False,
+        "blob_stores": [store],
+        "policy": RetentionPolicy(max_age_days=14, keep_last=1),
+    }
+
+    report = collect_garbage_periodically(tmp_path / "gc.stamp", **kwargs)
+    assert report is not None
+    assert len(report.removed) == OLD_RUNS
+    assert unregistered.exists()
+    # Within a day of the last collection, nothing runs.
+    assert collect_garbage_periodically(tmp_path / "gc.stamp", **kwargs) is None
+
+
+def test_automatic_collection_only_removes_recorded_workspaces(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    registry = WorkspaceRegistry(tmp_path / "cache" / "workspaces.txt")
+    workspace = Path(tempfile.mkdtemp(prefix="dg-eval-baseline-"))
+    registry.record(workspace)
+    logs_dir = Path(tempfile.mkdtemp(prefix="dg-eval-"))
+    for path in (workspace, logs_dir):
+        _age(path, 30)
+
+    report = collect_garbage_periodically(tmp_path / "gc.stamp", workspaces=registry)
+    assert report is not None
+    assert report.removed == [workspace]
+    assert not workspace.exists()
+    assert logs_dir.exists()
+    assert registry.workspaces() == []
+    assert registry.path.read_text() == ""
+
+    # An explicit collection scans the temp dir, log dirs included.
+    assert collect_garbage(workspaces=registry).removed == [logs_dir]
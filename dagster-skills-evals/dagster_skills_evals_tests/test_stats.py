@@ -0,0 +1,122 @@
+"""Unit tests for the statistics behind benchmark comparisons and the regression gate."""
+
+import itertools
+import math
+
+import pytest
+
+from dagster_skills_evals.stats import (
+    SUMMARY_METRICS,
+    check_regression,
+    compare_samples,
+    describe,
+    mann_whitney_greater,
+)
+
+TOKENS = SUMMARY_METRICS[0]
+ALPHA = 0.05
+
+
+def _brute_force_greater(x: list[float], y: list[float]) -> float:
+    """P(U >= observed U) over every relabeling of the pooled sample."""
+
+    def u(xs, ys):
+        return sum(1.0 if a > b else 0.5 if a == b else 0.0 for a in xs for b in ys)
+
+    pooled = [*x, *y]
+    observed = u(x, y)
+    values = [
+        u([pooled[i] for i in chosen], [pooled[i] for i in range(len(pooled)) if i not in chosen])
+        for chosen in itertools.combinations(range(len(pooled)), len(x))
+    ]
+    return sum(value >= observed for value in values) / len(values)
+
+
+def test_describe_single_value():
+    stats = describe([5.0])
+    assert (stats.n, stats.mean, stats.median, stats.stdev) == (1, 5.0, 5.0, 0.0)
+    assert (stats.ci_low, stats.ci_high) == (5.0, 5.0)
+
+
+def test_describe_sample():
+    values = [1.0, 2.0, 3.0, 4.0]
+    stats = describe(values)
+    assert (stats.mean, stats.median) == (2.5, 2.5)
+    assert stats.stdev == pytest.approx(1.2909944)
+    assert min(values) <= stats.ci_low <= stats.mean <= stats.ci_high <= max(values)
+
+
+def test_describe_empty():
+    with pytest.raises(ValueError, match="empty sample"):
+        describe([])
+
+
+@pytest.mark.parametrize(
+    ("baseline", "treatment"),
+    [([100], [101]), ([100, 101], [102, 103]), ([100, 101, 102], [200, 201, 202])],
+)
+def test_compare_samples_small_samples_are_inconclusive(baseline, treatment):
+    assert compare_samples(TOKENS, baseline, treatment).verdict == "inconclusive"
+
+
+def test_compare_samples_detects_regression_and_improvement():
+    baseline = [100, 101, 102, 103, 104]
+    worse = [150, 151, 152, 153, 154]
+    assert compare_samples(TOKENS, baseline, worse).verdict == "regressed"
+    assert compare_samples(TOKENS, worse, baseline).verdict == "improved"
+
+
+def test_compare_samples_overlapping_is_inconclusive():
+    comparison = compare_samples(TOKENS, [100, 120, 110, 105, 115], [102, 118, 111, 107, 113])
+    assert comparison.verdict == "inconclusive"
+    assert comparison.delta_ci_low < 0 < comparison.delta_ci_high
+
+
+@pytest.mark.parametrize(
+    ("x", "y"),
+    [
+        ([3, 4, 5], [1, 2]),
+        ([1, 2, 3], [4, 5, 6, 7]),
+        ([1, 3, 5, 7], [2, 4, 6]),
+        ([1, 2, 2, 3], [2, 2, 4]),
+        ([5, 5, 5], [5, 5]),
+    ],
+)
+def test_mann_whitney_matches_brute_force(x, y):
+    assert mann_whitney_greater(x, y) == pytest.approx(_brute_force_greater(x, y))
+
+
+def test_mann_whitney_exact_extreme():
+    assert mann_whitney_greater([4, 5, 6], [1, 2, 3]) == pytest.approx(1 / math.comb(6, 3))
+
+
+def test_mann_whitney_normal_approximation():
+    worse = [float(i) for i in range(60, 100)]
+    better = [float(i) for i in range(40)]
+    assert mann_whitney_greater(worse, better) < ALPHA / 1000
+    assert mann_whitney_greater(better, worse) > 1 - ALPHA / 1000
+
+
+def test_check_regression_tolerance_only_for_small_reference():
+    check = check_regression(TOKENS, [100, 100], [115], tolerance=0.1)
+    assert check.p_value is None
+    assert check.limit == pytest.approx(110)
+    assert check.regressed
+    assert not check_regression(TOKENS, [100, 100], [105], tolerance=0.1).regressed
+
+
+def test_check_regression_needs_test_to_reject():
+    reference = [100.0 + i for i in range(20)]
+    regressed = check_regression(TOKENS, reference, [200, 201, 202], tolerance=0.1)
+    assert regressed.p_value is not None
+    assert regressed.p_value < ALPHA
+    assert regressed.regressed
+    # Within tolerance: never a regression, whatever the test says.
+    assert not check_regression(TOKENS, reference, [112, 113, 114], tolerance=0.1).regressed
+
+
+def test_check_regression_higher_is_better():
+    metric = SUMMARY_METRICS[0].__class__("score", "Score", lambda _: 0, lower_is_better=False)
+    check = check_regression(metric, [100, 100, 100], [80], tolerance=0.1)
+    assert check.limit == pytest.approx(90)
+    assert check.regressed
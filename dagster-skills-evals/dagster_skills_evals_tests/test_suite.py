@@ -0,0 +1,97 @@
+"""Unit tests for suite file validation and `dg-eval suite` error handling."""
+
+import importlib
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+import typer
+from pydantic import ValidationError
+
+from dagster_skills_evals.execution import ClaudeExecutionResult
+from dagster_skills_evals.models import SuiteConfig
+
+# The cli package re-exports the command function under the module's name.
+suite_cli = importlib.import_module("dagster_skills_evals.cli.suite")
+
+RESULT_EVENT = {
+    "type": "result",
+    "subtype": "success",
+    "duration_ms": 1_000,
+    "total_cost_usd": 0.01,
+    "usage": {"input_tokens": 100, "output_tokens": 10},
+}
+
+
+def _result(events: list[dict], returncode: int = 0) -> ClaudeExecutionResult:
+    return ClaudeExecutionResult(
+        cli_result=subprocess.CompletedProcess(
+            args=["claude"], returncode=returncode, stdout=json.dumps(events), stderr=""
+        )
+    )
+
+
+@pytest.mark.parametrize("name", ["../escape", "a/b", "..", ".", "with space", ""])
+def test_unsafe_case_names_are_rejected(name: str):
+    with pytest.raises(ValidationError, match="case name"):
+        SuiteConfig.model_validate({"cases": [{"name": name, "prompt": "p"}]})
+
+
+def test_unsafe_arm_names_are_rejected():
+    case = {"name": "ok", "prompt": "p", "arms": {"../baseline": {}}}
+    with pytest.raises(ValidationError, match="arm name"):
+        SuiteConfig.model_validate({"cases": [case]})
+
+
+def test_safe_names_are_accepted():
+    case = {"name": "asset-v1.2_final", "prompt": "p", "arms": {"with-skill": {}}}
+    assert SuiteConfig.model_validate({"cases": [case]}).cases[0].name == "asset-v1.2_final"
+
+
+def test_invalid_suite_file_fails_at_load_time(tmp_path: Path):
+    suite_file = tmp_path / "suite.yaml"
+    suite_file.write_text("cases:\n  - name: ../../etc\n    prompt: hi\n")
+    with pytest.raises(typer.Exit):
+        suite_cli._load_suite(suite_file)
+
+
+def test_failed_sessions_are_recorded_without_stopping_the_suite(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    outcomes = {
+        "ok": _result([RESULT_EVENT]),
+        "crashed": _result([{"type": "system"}], returncode=3),
+        "failed": _result([RESULT_EVENT], returncode=1),
+    }
+
+    def _run_session(prompt: str, **_kwargs) -> tuple[ClaudeExecutionResult, str | None]:
+        if prompt == "setup":
+            raise subprocess.CalledProcessError(1, "setup.sh")
+        return outcomes[prompt], "/tmp/workspace"
+
+    def _build_summary(result: ClaudeExecutionResult, **kwargs):
+        if result is outcomes["ok"] and not kwargs["skip_narrative"]:
+            raise subprocess.TimeoutExpired("claude", 1)
+        return _real_build_summary(result, **{**kwargs, "skip_narrative": True})
+
+    _real_build_summary = suite_cli.build_summary
+    monkeypatch.setattr(suite_cli, "run_session", _run_session)
+    monkeypatch.setattr(suite_cli, "build_summary", _build_summary)
+    config = SuiteConfig.model_validate(
+        {"cases": [{"name": name, "prompt": name} for name in [*outcomes, "setup"]]}
+    )
+
+    def _errors(skip_narrative: bool) -> dict[str, str | None]:
+        runs = suite_cli._run_suite(
+            config, timeout=10, concurrency=2, skip_narrative=skip_narrative, quiet=True
+        )
+        return {run.case.name: run.error for run in runs}
+
+    errors = _errors(skip_narrative=True)
+    assert errors["ok"] is None
+    assert "without a result event" in (errors["crashed"] or "")
+    assert errors["failed"] == "claude exited with code 1"
+    assert "setup.sh" in (errors["setup"] or "")
+
+    assert (_errors(skip_narrative=False)["ok"] or "").startswith("narrative summary failed")
@@ -0,0 +1,104 @@
+"""Unit tests for post-setup workspace snapshots and the workspace registry."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from dagster_skills_evals.fs import clone_tree
+from dagster_skills_evals.workspace import WorkspaceRegistry, WorkspaceSnapshots, snapshot_key
+
+
+@pytest.fixture(autouse=True)
+def _tmp_workspaces(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+
+def _setup_script(tmp_path: Path) -> Path:
+    """A setup script that counts its runs and leaves an absolute path in a virtualenv."""
+    script = tmp_path / "setup.sh"
+    script.write_text(
+        "#!/bin/sh\n"
+        f"echo run >> {tmp_path / 'runs.log'}\n"
+        'mkdir -p .venv && echo "home = $PWD/.venv" > .venv/pyvenv.cfg\n'
+        "echo edited > main.py\n"
+    )
+    script.chmod(0o755)
+    return script
+
+
+def _runs(tmp_path: Path) -> int:
+    return len((tmp_path / "runs.log").read_text().splitlines())
+
+
+def test_materialize_runs_setup_once_and_clones_afterwards(tmp_path: Path):
+    script = _setup_script(tmp_path)
+    first = WorkspaceSnapshots(tmp_path / "snapshots").materialize(script)
+    assert _runs(tmp_path) == 1
+
+    snapshots = WorkspaceSnapshots(tmp_path / "snapshots")
+    second = Path(snapshots.materialize(script))
+    assert _runs(tmp_path) == 1
+    assert second != Path(first)
+    assert (second / "main.py").read_text() == "edited\n"
+    assert list(snapshots.reused) == [snapshot_key(script, None)]
+
+
+def test_clone_is_relocated_and_independent(tmp_path: Path):
+    script = _setup_script(tmp_path)
+    snapshots = WorkspaceSnapshots(tmp_path / "snapshots")
+    first = Path(snapshots.materialize(script))
+    second = Path(snapshots.materialize(script))
+
+    assert (second / ".venv" / "pyvenv.cfg").read_text() == f"home = {second}/.venv\n"
+    (second / "main.py").write_text("changed by the agent\n")
+    assert (first / "main.py").read_text() == "edited\n"
+    assert (Path(snapshots.materialize(script)) / "main.py").read_text() == "edited\n"
+
+
+def test_clone_shares_no_files_with_the_source(tmp_path: Path):
+    module = Path(".venv", "lib", "site-packages", "pkg", "__init__.py")
+    (tmp_path / "src" / module).parent.mkdir(parents=True)
+    (tmp_path / "src" / module).write_text("original\n")
+
+    clone_tree(tmp_path / "src", tmp_path / "dst")
+    # An in-place write, as an editor or a patching tool would do.
+    with (tmp_path / "dst" / module).open("r+") as f:
+        f.write("patched!\n")
+    assert (tmp_path / "src" / module).read_text() == "original\n"
+
+
+def test_refresh_rebuilds_each_snapshot_once(tmp_path: Path):
+    script = _setup_script(tmp_path)
+    WorkspaceSnapshots(tmp_path / "snapshots").materialize(script)
+
+    snapshots = WorkspaceSnapshots(tmp_path / "snapshots", refresh=True)
+    snapshots.materialize(script)
+    snapshots.materialize(script)
+    assert _runs(tmp_path) == 1 + 1
+    assert snapshots.reused == {}
+
+
+def test_changed_script_builds_a_new_snapshot(tmp_path: Path):
+    script = _setup_script(tmp_path)
+    snapshots = WorkspaceSnapshots(tmp_path / "snapshots", max_snapshots=1)
+    snapshots.materialize(script)
+    script.write_text(script.read_text() + "echo more >> main.py\n")
+    snapshots.materialize(script)
+
+    assert _runs(tmp_path) == 1 + 1
+    # The older snapshot is evicted beyond max_snapshots.
+    assert len(list((tmp_path / "snapshots").glob("*/meta.json"))) == 1
+
+
+def test_registry_lists_and_prunes_existing_workspaces(tmp_path: Path):
+    registry = WorkspaceRegistry.in_cache(tmp_path / "cache")
+    kept, gone = tmp_path / "kept", tmp_path / "gone"
+    for workspace in (kept, gone, kept):
+        workspace.mkdir(exist_ok=True)
+        registry.record(workspace)
+    gone.rmdir()
+
+    assert registry.workspaces() == [kept]
+    registry.prune()
+    assert registry.path.read_text() == f"{kept}\n"
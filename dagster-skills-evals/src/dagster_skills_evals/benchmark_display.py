@@ -1,23 +1,56 @@
+import threading
 import time
+from dataclasses import dataclass
+from datetime import datetime
 
 from rich.live import Live
+from rich.markup import escape
 from rich.panel import Panel
 from rich.spinner import Spinner
 from rich.table import Table
 from rich.text import Text
 
 from dagster_skills_evals.console import console
-from dagster_skills_evals.execution import ClaudeExecutionResultSummary
+from dagster_skills_evals.context_cost import ContextCost
+from dagster_skills_evals.execution import ClaudeExecutionResultSummary, LiveRunMetrics
+from dagster_skills_evals.history import HistoryRun
+from dagster_skills_evals.pricing import TOKEN_CLASSES, CostBreakdown
+from dagster_skills_evals.references import ReferenceHeatmap
+from dagster_skills_evals.stats import GateCheck, MetricComparison
+
+
+@dataclass
+class _TaskState:
+    label: str
+    start: float
+    end: float | None = None
+    metrics: LiveRunMetrics | None = None
+
+
+def _format_live_metrics(metrics: LiveRunMetrics) -> str:
+    parts = [
+        f"{metrics.input_tokens:,} in / {metrics.output_tokens:,} out",
+        f"{'' if metrics.finished else '~'}${metrics.cost_usd:.4f}",
+        f"{metrics.turns} turns",
+    ]
+    if metrics.current_tool:
+        parts.append(metrics.current_tool)
+    return " · ".join(parts)
 
 
 class SpinnerDisplay:
-    """Live spinner panel that shows the current phase."""
+    """Live spinner panel that shows the current phase and any concurrent tasks.
+
+    Tasks may be started and finished from worker threads.
+    """
 
     def __init__(self):
         self._label = ""
         self._done = False
         self._live: Live | None = None
         self._phase_start: float | None = None
+        self._tasks: dict[str, _TaskState] = {}
+        self._lock = threading.Lock()
 
     def __enter__(self):
         self._live = Live(self, console=console, refresh_per_second=4)
@@ -35,10 +68,39 @@ class SpinnerDisplay:
         if self._live:
             self._live.refresh()
 
+    def start_task(self, key: str, label: str, metrics: LiveRunMetrics | None = None) -> None:
+        """Show a row for a task running alongside others in the current phase.
+
+        If ``metrics`` is given, its running totals are shown next to the task.
+        """
+        with self._lock:
+            self._tasks[key] = _TaskState(label=label, start=time.monotonic(), metrics=metrics)
+        if self._live:
+            self._live.refresh()
+
+    def finish_task(self, key: str) -> None:
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None:
+                task.end = time.monotonic()
+        if self._live:
+            self._live.refresh()
+
+    def remove_task(self, key: str) -> None:
+        with self._lock:
+            self._tasks.pop(key, None)
+        if self._live:
+            self._live.refresh()
+
+    def clear_tasks(self) -> None:
+        with self._lock:
+            self._tasks.clear()
+
     def finish(self) -> None:
         self._done = True
         self._label = "Done"
         self._phase_start = None
+        self.clear_tasks()
         if self._live:
             self._live.refresh()
 
@@ -52,6 +114,18 @@ class SpinnerDisplay:
                 elapsed = int(time.monotonic() - self._phase_start)
                 label = f"{label} ({elapsed}s)"
             content.add_row(Spinner("dots"), Text(label))
+
+        with self._lock:
+            tasks = list(self._tasks.values())
+        for task in tasks:
+            elapsed = int((task.end or time.monotonic()) - task.start)
+            row_label = Text(f"  {task.label} ({elapsed}s)")
+            if task.metrics is not None and (task.metrics.turns or task.metrics.finished):
+                row_label.append(f"  {_format_live_metrics(task.metrics)}", style="dim")
+            if task.end is not None:
+                content.add_row(Text("✓", style="green"), row_label)
+            else:
+                content.add_row(Spinner("dots"), row_label)
         return Panel(content, border_style="blue")
 
 
@@ -74,6 +148,105 @@ def _delta_text(baseline: int | float, current: int | float, lower_is_better: bo
     return Text(text, style=color)
 
 
+_LATENCY_ROWS = (
+    ("Time to First Token", "time_to_first_token_ms"),
+    ("Time to First Tool", "time_to_first_tool_ms"),
+    ("Time to First Skill", "time_to_first_skill_ms"),
+    ("Turn Latency p50", "turn_latency_p50_ms"),
+    ("Turn Latency p95", "turn_latency_p95_ms"),
+    ("Turn Latency max", "turn_latency_max_ms"),
+    ("Tool Latency p50", "tool_latency_p50_ms"),
+    ("Tool Latency p95", "tool_latency_p95_ms"),
+    ("Tool Latency max", "tool_latency_max_ms"),
+)
+
+
+def _add_latency_rows(
+    table: Table,
+    baseline: ClaudeExecutionResultSummary,
+    treatment: ClaudeExecutionResultSummary,
+) -> None:
+    """Add a row per latency measured in either run; unmeasured values show as a dash."""
+    for label, field in _LATENCY_ROWS:
+        baseline_ms, treatment_ms = getattr(baseline, field), getattr(treatment, field)
+        if baseline_ms is None and treatment_ms is None:
+            continue
+        baseline_s = round(baseline_ms / 1000, 2) if baseline_ms is not None else None
+        treatment_s = round(treatment_ms / 1000, 2) if treatment_ms is not None else None
+        table.add_row(
+            label,
+            f"{baseline_s:.2f}s" if baseline_s is not None else "—",
+            _delta_text(baseline_s, treatment_s)
+            if baseline_s is not None and treatment_s is not None
+            else Text(f"{treatment_s:.2f}s" if treatment_s is not None else "—"),
+        )
+
+
+def _add_cache_rows(
+    table: Table,
+    baseline: ClaudeExecutionResultSummary,
+    treatment: ClaudeExecutionResultSummary,
+) -> None:
+    """Add prompt cache rows, if either run read from or wrote to the cache."""
+    if not any(
+        summary.cache_read_input_tokens or summary.cache_creation_input_tokens
+        for summary in (baseline, treatment)
+    ):
+        return
+    baseline_ratio = round((baseline.cache_hit_ratio or 0.0) * 100, 1)
+    treatment_ratio = round((treatment.cache_hit_ratio or 0.0) * 100, 1)
+    table.add_row(
+        "Cache Hit Ratio",
+        f"{baseline_ratio}%",
+        _delta_text(baseline_ratio, treatment_ratio, lower_is_better=False),
+    )
+    for label, field in (
+        ("Cache Write Cost", "cache_creation_cost_usd"),
+        ("Effective Cost", "effective_cost_usd"),
+    ):
+        baseline_cost = round(getattr(baseline, field), 4)
+        treatment_cost = round(getattr(treatment, field), 4)
+        table.add_row(label, f"${baseline_cost:.4f}", _delta_text(baseline_cost, treatment_cost))
+
+
+def render_cost_breakdown(columns: dict[str, CostBreakdown], title: str = "Cost by Model") -> None:
+    """Render cost per model and token class, one column per run or group of runs.
+
+    Later columns show deltas against the first, so the model and token class that drove a
+    cost change stand out.
+    """
+    if not any(columns.values()):
+        return
+    table = Table(title=title, show_header=True, header_style="bold")
+    table.add_column("Model", style="bold")
+    table.add_column("Tokens")
+    for label in columns:
+        table.add_column(label, justify="right")
+
+    breakdowns = list(columns.values())
+    models = sorted({model for breakdown in breakdowns for model in breakdown})
+    for model in models:
+        costs = [breakdown.get(model, {}) for breakdown in breakdowns]
+        label = model
+        for token_class in (*TOKEN_CLASSES, "total"):
+            values = [
+                round(sum(c.values()) if token_class == "total" else c.get(token_class, 0.0), 4)
+                for c in costs
+            ]
+            if not any(values):
+                continue
+            reference, *others = values
+            table.add_row(
+                label,
+                Text(token_class, style="bold") if token_class == "total" else token_class,
+                f"${reference:.4f}",
+                *(_delta_text(reference, value) for value in others),
+            )
+            label = ""
+    console.print()
+    console.print(table)
+
+
 def render_comparison(
     baseline: ClaudeExecutionResultSummary,
     treatment: ClaudeExecutionResultSummary,
@@ -113,8 +286,19 @@ def render_comparison(
         str(len(baseline.tools_used)),
         _delta_text(len(baseline.tools_used), len(treatment.tools_used)),
     )
+    _add_cache_rows(metrics_table, baseline, treatment)
+    metrics_table.add_row(
+        "Turns", str(baseline.turns), _delta_text(baseline.turns, treatment.turns)
+    )
+    _add_latency_rows(metrics_table, baseline, treatment)
     console.print()
     console.print(metrics_table)
+    render_cost_breakdown(
+        {"Baseline": baseline.cost_breakdown, "Treatment": treatment.cost_breakdown}
+    )
+    for label, summary in (("Baseline", baseline), ("Treatment", treatment)):
+        if summary.budget_aborted:
+            console.print(f"[yellow]{label} aborted: {summary.abort_reason}[/yellow]")
 
     # Tool usage details
     if baseline.tools_used or treatment.tools_used:
@@ -129,7 +313,14 @@ def render_comparison(
         console.print()
         console.print(tools_table)
 
-    # Narrative summaries
+    render_narratives(baseline, treatment)
+
+
+def render_narratives(
+    baseline: ClaudeExecutionResultSummary,
+    treatment: ClaudeExecutionResultSummary,
+) -> None:
+    """Render the baseline and treatment narrative summaries, if present."""
     if baseline.narrative_summary:
         console.print()
         console.print(
@@ -151,6 +342,84 @@ def render_comparison(
         )
 
 
+def _format_metric(name: str, value: float) -> str:
+    """Format a metric value in the units used by the comparison tables."""
+    if name == "cost_usd":
+        return f"${value:.4f}"
+    if name == "execution_time_ms":
+        return f"{value / 1000:.1f}s"
+    return f"{value:,.1f}"
+
+
+_VERDICT_STYLES = {"improved": "green", "regressed": "red", "inconclusive": "dim"}
+
+
+def render_trial_comparison(
+    comparisons: list[MetricComparison],
+    baseline_trials: int,
+    treatment_trials: int,
+) -> None:
+    """Render per-metric statistics across repeated baseline and treatment trials."""
+    table = Table(
+        title=f"Benchmark Comparison ({baseline_trials} vs {treatment_trials} trials)",
+        show_header=True,
+        header_style="bold",
+    )
+    table.add_column("Metric", style="bold")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Treatment", justify="right")
+    table.add_column("Δ mean (95% CI)", justify="right")
+    table.add_column("Verdict")
+
+    def _cell(name: str, mean: float, stdev: float, median: float) -> str:
+        return (
+            f"{_format_metric(name, mean)} ± {_format_metric(name, stdev)}\n"
+            f"[dim]median {_format_metric(name, median)}[/dim]"
+        )
+
+    for comparison in comparisons:
+        name = comparison.metric.name
+        baseline, treatment = comparison.baseline, comparison.treatment
+        pct = comparison.delta_pct
+        pct_str = (
+            f" ({'+' if comparison.delta_mean > 0 else ''}{pct:.1f}%)" if pct is not None else ""
+        )
+        delta = (
+            f"{'+' if comparison.delta_mean > 0 else ''}"
+            f"{_format_metric(name, comparison.delta_mean)}{pct_str}\n"
+            f"[dim]{escape(f'[{_format_metric(name, comparison.delta_ci_low)}, ')}"
+            f"{_format_metric(name, comparison.delta_ci_high)}][/dim]"
+        )
+        table.add_row(
+            comparison.metric.label,
+            _cell(name, baseline.mean, baseline.stdev, baseline.median),
+            _cell(name, treatment.mean, treatment.stdev, treatment.median),
+            delta,
+            Text(comparison.verdict, style=_VERDICT_STYLES[comparison.verdict]),
+        )
+
+    console.print()
+    console.print(table)
+
+
+def render_gate(checks: list[GateCheck]) -> None:
+    """Render the outcome of the --fail-on-regression gate, one line per regressed metric."""
+    regressed = [check for check in checks if check.regressed]
+    console.print()
+    if not regressed:
+        console.print("[green]Regression gate passed[/green]")
+        return
+    for check in regressed:
+        name = check.metric.name
+        p_value = f", p={check.p_value:.3f}" if check.p_value is not None else ""
+        console.print(
+            f"[red]Regression in {check.metric.label}:[/red] "
+            f"{_format_metric(name, check.current_mean)} vs baseline median "
+            f"{_format_metric(name, check.reference_median)} "
+            f"(limit {_format_metric(name, check.limit)}{p_value})"
+        )
+
+
 def render_single_run(summary: ClaudeExecutionResultSummary) -> None:
     """Render stats for a single execution run."""
     metrics_table = Table(title="Execution Summary", show_header=True, header_style="bold")
@@ -162,6 +431,8 @@ def render_single_run(summary: ClaudeExecutionResultSummary) -> None:
     metrics_table.add_row("Cost", f"${summary.cost_usd:.4f}")
     metrics_table.add_row("Execution Time", f"{summary.execution_time_ms / 1000:.1f}s")
     metrics_table.add_row("Tool Calls", str(len(summary.tools_used)))
+    if summary.budget_aborted:
+        metrics_table.add_row("Status", Text(f"aborted: {summary.abort_reason}", style="yellow"))
     console.print()
     console.print(metrics_table)
 
@@ -184,3 +455,179 @@ def render_single_run(summary: ClaudeExecutionResultSummary) -> None:
                 border_style="green",
             )
         )
+
+
+def render_suite_results(
+    rows: list[tuple[str, str, ClaudeExecutionResultSummary | None, str | None]],
+) -> None:
+    """Render one row per (case, arm) session of a suite.
+
+    Each row is (case name, arm name, summary or None, error or None). Metrics for later
+    arms of a case are shown as deltas against the case's first arm.
+    """
+    table = Table(title="Suite Results", show_header=True, header_style="bold")
+    table.add_column("Case", style="bold")
+    table.add_column("Arm")
+    table.add_column("Input Tokens", justify="right")
+    table.add_column("Output Tokens", justify="right")
+    table.add_column("Cost", justify="right")
+    table.add_column("Time", justify="right")
+    table.add_column("Tool Calls", justify="right")
+
+    first_arm: dict[str, ClaudeExecutionResultSummary] = {}
+    total_cost = 0.0
+    errors: list[str] = []
+    for case, arm, summary, error in rows:
+        if summary is None:
+            errors.append(f"{case}/{arm}: {error}")
+            table.add_row(case, arm, Text("error", style="red"), "—", "—", "—", "—")
+            continue
+
+        total_cost += summary.cost_usd
+        reference = first_arm.setdefault(case, summary)
+        if reference is summary:
+            table.add_row(
+                case,
+                arm,
+                f"{summary.input_tokens:,}",
+                f"{summary.output_tokens:,}",
+                f"${summary.cost_usd:.4f}",
+                f"{summary.execution_time_ms / 1000:.1f}s",
+                str(len(summary.tools_used)),
+            )
+        else:
+            table.add_row(
+                case,
+                arm,
+                _delta_text(reference.input_tokens, summary.input_tokens),
+                _delta_text(reference.output_tokens, summary.output_tokens),
+                _delta_text(reference.cost_usd, summary.cost_usd),
+                _delta_text(reference.execution_time_ms / 1000, summary.execution_time_ms / 1000),
+                _delta_text(len(reference.tools_used), len(summary.tools_used)),
+            )
+
+    table.caption = f"{len(rows)} sessions, {len(errors)} errors, total cost ${total_cost:.4f}"
+    console.print()
+    console.print(table)
+    for error in errors:
+        console.print(f"[red]{escape(error)}[/red]")
+
+
+def render_history_runs(test: str, runs: list[HistoryRun]) -> None:
+    """Render recorded runs of a test, newest first."""
+    table = Table(title=f"History: {test}", show_header=True, header_style="bold")
+    table.add_column("When")
+    table.add_column("Commit")
+    table.add_column("Skills")
+    table.add_column("Input Tokens", justify="right")
+    table.add_column("Output Tokens", justify="right")
+    table.add_column("Cost", justify="right")
+    table.add_column("Time", justify="right")
+    table.add_column("Tool Calls", justify="right")
+
+    for run in runs:
+        when = datetime.fromtimestamp(run.timestamp).strftime("%Y-%m-%d %H:%M")
+        table.add_row(
+            Text(when, style="bold") if run.is_baseline else when,
+            (run.git_commit or "—")[:10],
+            (run.skill_tree_hash or "—")[:10],
+            f"{run.input_tokens:,}",
+            f"{run.output_tokens:,}",
+            f"${run.cost_usd:.4f}",
+            f"{run.execution_time_ms / 1000:.1f}s",
+            str(run.tool_calls),
+        )
+    if any(run.is_baseline for run in runs):
+        table.caption = "Baseline updates in bold"
+    console.print()
+    console.print(table)
+
+
+def render_history_stats(test: str, stats: dict[str, dict[str, float]]) -> None:
+    """Render per-metric percentiles over recorded runs of a test."""
+    table = Table(title=f"History: {test}", show_header=True, header_style="bold")
+    table.add_column("Metric", style="bold")
+    for column in ("n", "p50", "p95", "mean", "min", "max"):
+        table.add_column(column, justify="right")
+
+    for name, values in stats.items():
+        table.add_row(
+            name,
+            str(int(values["n"])),
+            *(
+                _format_metric(name, values[column])
+                for column in ("p50", "p95", "mean", "min", "max")
+            ),
+        )
+    console.print()
+    console.print(table)
+
+
+_HEAT_BAR_WIDTH = 12
+_HEAT_STYLES = ((0.5, "red"), (0.15, "yellow"), (0.0, "green"))
+
+
+def render_reference_heatmap(heatmap: ReferenceHeatmap, limit: int | None = None) -> None:
+    """Render how often each skill file was loaded and its share of the tokens loaded."""
+    table = Table(title="Reference Reads", show_header=True, header_style="bold")
+    table.add_column("Reference", style="bold", overflow="fold")
+    table.add_column("Runs", justify="right")
+    table.add_column("Reads", justify="right")
+    table.add_column("Tokens", justify="right")
+    table.add_column("Tokens/Run", justify="right")
+    table.add_column("Heat")
+
+    hottest = max((heat.tokens for heat in heatmap.references), default=0)
+    shown = heatmap.references[:limit] if limit else heatmap.references
+    for heat in shown:
+        share = heat.tokens / hottest if hottest else 0.0
+        style = next(style for threshold, style in _HEAT_STYLES if share >= threshold)
+        run_share = heat.runs / heatmap.total_runs if heatmap.total_runs else 0.0
+        table.add_row(
+            heat.reference,
+            f"{heat.runs} ({run_share:.0%})",
+            str(heat.reads),
+            f"{heat.tokens:,}",
+            f"{heat.tokens // heat.runs:,}" if heat.runs else "—",
+            Text("█" * round(share * _HEAT_BAR_WIDTH), style=style),
+        )
+    hidden = len(heatmap.references) - len(shown)
+    table.caption = (
+        f"{heatmap.total_runs} runs, ~{heatmap.total_tokens:,} tokens loaded from skill files"
+        + (f"; {hidden} more not shown" if hidden else "")
+    )
+    console.print()
+    console.print(table)
+
+
+def render_context_cost(cost: ContextCost, limit: int | None = None) -> None:
+    """Render the costliest skill files and the costliest link paths to reach a file."""
+    files = sorted(cost.files.items(), key=lambda item: (-item[1], str(item[0])))
+    files_table = Table(title="Context Cost by File", show_header=True, header_style="bold")
+    files_table.add_column("File", style="bold", overflow="fold")
+    files_table.add_column("Tokens", justify="right")
+    for path, tokens in files[:limit] if limit else files:
+        files_table.add_row(str(path), f"~{tokens:,}")
+    files_table.caption = f"{len(files)} files, ~{sum(cost.files.values()):,} tokens in total" + (
+        f"; {len(cost.unreachable)} not linked from the entry file" if cost.unreachable else ""
+    )
+    console.print()
+    console.print(files_table)
+
+    if not cost.routes:
+        return
+    routes = sorted(cost.routes, key=lambda route: (-route.worst.tokens, str(route.target)))
+    routes_table = Table(title="Context Cost by Path", show_header=True, header_style="bold")
+    routes_table.add_column("Target", style="bold", overflow="fold")
+    routes_table.add_column("Best", justify="right")
+    routes_table.add_column("Worst", justify="right")
+    routes_table.add_column("Worst Path", overflow="fold")
+    for route in routes[:limit] if limit else routes:
+        routes_table.add_row(
+            str(route.target),
+            f"~{route.best.tokens:,}",
+            f"~{route.worst.tokens:,}",
+            " → ".join(path.name for path in route.worst.files),
+        )
+    console.print()
+    console.print(routes_table)
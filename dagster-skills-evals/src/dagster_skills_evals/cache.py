@@ -0,0 +1,239 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from dagster_skills_evals.execution import (
+    NARRATIVE_PROMPT_VERSION,
+    ClaudeExecutionResult,
+    RunBudget,
+    iter_transcript,
+)
+from dagster_skills_evals.fs import atomic_write_text
+
+_DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def default_cache_dir() -> Path:
+    """Root directory for dg-eval caches, overridable with ``DG_EVAL_CACHE_DIR``."""
+    if env_dir := os.environ.get("DG_EVAL_CACHE_DIR"):
+        return Path(env_dir)
+    return Path.home() / ".cache" / "dg-eval"
+
+
+def hash_path(path: Path) -> str:
+    """Hash a file, or a directory tree's relative file names and contents."""
+    digest = hashlib.sha256()
+    if path.is_file():
+        digest.update(path.read_bytes())
+        return digest.hexdigest()
+    for file_path in sorted(p for p in path.rglob("*") if p.is_file()):
+        digest.update(file_path.relative_to(path).as_posix().encode())
+        digest.update(b"\0")
+        digest.update(file_path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _plugin_dirs(extra_args: Sequence[str]) -> list[Path]:
+    dirs: list[Path] = []
+    for i, arg in enumerate(extra_args):
+        if arg == "--plugin-dir" and i + 1 < len(extra_args):
+            dirs.append(Path(extra_args[i + 1]))
+        elif arg.startswith("--plugin-dir="):
+            dirs.append(Path(arg.split("=", 1)[1]))
+    return dirs
+
+
+def _hash_plugin_dirs(extra_args: Sequence[str], workspace: Path | None) -> list[str] | None:
+    """Hash each ``--plugin-dir``, resolving relative ones against the workspace Claude runs
+    in. None if any of them cannot be hashed."""
+    hashes: list[str] = []
+    for plugin_dir in _plugin_dirs(extra_args):
+        if plugin_dir.is_absolute():
+            path = plugin_dir
+        elif workspace is not None:
+            path = workspace / plugin_dir
+        else:
+            return None
+        if not path.exists():
+            return None
+        hashes.append(hash_path(path))
+    return hashes
+
+
+def result_cache_key(
+    prompt: str,
+    extra_args: Sequence[str],
+    setup_scripts: Sequence[Path | None],
+    model: str,
+    trial: int = 0,
+    budget: RunBudget | None = None,
+    prompt_caching: bool = False,
+    workspace: Path | None = None,
+) -> str | None:
+    """Content-addressed key for a single Claude session.
+
+    Covers the prompt, extra CLI args, the contents of the setup scripts and of any
+    ``--plugin-dir`` directories, the model, and whether prompt caching is enabled.
+    ``trial`` keeps repeated trials distinct.
+
+    Relative plugin dirs are resolved against ``workspace``, the directory Claude runs in.
+    Returns None, meaning the session must not be cached, when a plugin dir cannot be
+    hashed: it does not exist, or it is relative and no workspace is given.
+    """
+    plugin_dirs = _hash_plugin_dirs(extra_args, workspace)
+    if plugin_dirs is None:
+        return None
+    payload = {
+        "prompt": prompt,
+        "extra_args": list(extra_args),
+        "setup_scripts": [
+            hash_path(script) if script is not None else None for script in setup_scripts
+        ],
+        "plugin_dirs": plugin_dirs,
+        "model": model,
+        "trial": trial,
+        "budget": [budget.max_tokens, budget.max_cost_usd, budget.max_turns] if budget else None,
+    }
+    if prompt_caching:
+        # Only added when set, so keys of sessions run without caching are unchanged.
+        payload["prompt_caching"] = True
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """On-disk cache of Claude sessions, evicting least-recently-used entries past max_bytes.
+
+    Each entry stores the parsed stream events, stderr and return code; the summary is
+    rebuilt from the events on a hit.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = _DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> ClaudeExecutionResult | None:
+        entry = self._entry_dir(key)
+        meta_path = entry / "meta.json"
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        os.utime(meta_path)
+        offsets = meta.get("event_offsets")
+        return ClaudeExecutionResult(
+            cli_result=subprocess.CompletedProcess(
+                args=meta["args"],
+                returncode=meta["returncode"],
+                stdout=None,
+                stderr=(entry / "stderr.txt").read_text(),
+            ),
+            parsed_events=list(iter_transcript(entry / "events.json")),
+            # Arrival times relative to the start of the session, so latencies survive.
+            started_at=0.0 if offsets is not None else None,
+            event_times=array("d", offsets) if offsets is not None else None,
+        )
+
+    def put(self, key: str, result: ClaudeExecutionResult) -> None:
+        """Store a completed session, replacing any existing entry for the key.
+
+        Failed sessions, and sessions without a result event, are not cached.
+        """
+        if not result.has_result_event:
+            return
+        if result.return_code != 0 and not result.budget_aborted:
+            return
+        entry = self._entry_dir(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        staging = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=entry.parent))
+        if result.transcript_path is not None:
+            shutil.copyfile(result.transcript_path, staging / "events.json")
+        else:
+            (staging / "events.json").write_text(result.stdout)
+        (staging / "stderr.txt").write_text(result.stderr)
+        (staging / "meta.json").write_text(
+            json.dumps(
+                {
+                    "args": list(result.cli_result.args),
+                    "returncode": result.return_code,
+                    "created": time.time(),
+                    "event_offsets": (
+                        [round(t - result.started_at, 6) for t in result.event_times]
+                        if result.event_times is not None and result.started_at is not None
+                        else None
+                    ),
+                }
+            )
+        )
+        if entry.exists():
+            stale = Path(tempfile.mkdtemp(prefix=f".{key}-stale-", dir=entry.parent))
+            with contextlib.suppress(OSError):
+                entry.replace(stale / "entry")
+            shutil.rmtree(stale, ignore_errors=True)
+        try:
+            staging.rename(entry)
+        except OSError:
+            # Another worker stored the same key concurrently; keep theirs.
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least-recently-used entries until the cache fits in max_bytes."""
+        entries: list[tuple[float, int, Path]] = []
+        for meta_path in self.root.glob("*/*/meta.json"):
+            entry = meta_path.parent
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            entries.append((meta_path.stat().st_mtime, size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+def narrative_cache_key(messages: list[dict[str, Any]], narrative_context: str | None) -> str:
+    """Key a narrative summary by the session messages, the extra narrative context and the
+    version of the narrative model and prompts."""
+    payload = json.dumps(
+        {
+            "messages": messages,
+            "context": narrative_context,
+            "version": NARRATIVE_PROMPT_VERSION,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class NarrativeCache:
+    """On-disk memo of generated narrative summaries."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> list[str] | None:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def put(self, key: str, narrative: list[str]) -> None:
+        atomic_write_text(self._path(key), json.dumps(narrative))
@@ -1,13 +1,23 @@
 import typer
 
 from dagster_skills_evals.cli.benchmark import benchmark
+from dagster_skills_evals.cli.gc import gc
+from dagster_skills_evals.cli.history import app as history_app
 from dagster_skills_evals.cli.index import app as index_app
+from dagster_skills_evals.cli.logs import app as logs_app
+from dagster_skills_evals.cli.references import references
 from dagster_skills_evals.cli.run import run
+from dagster_skills_evals.cli.suite import suite
 
 app = typer.Typer(
     help="Dagster skills development tools.",
     context_settings={"help_option_names": ["-h", "--help"]},
 )
 app.add_typer(index_app)
+app.add_typer(history_app, name="history")
+app.add_typer(logs_app, name="logs")
 app.command()(benchmark)
+app.command()(gc)
+app.command()(references)
 app.command()(run)
+app.command()(suite)
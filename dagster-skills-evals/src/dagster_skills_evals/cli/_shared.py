@@ -1,52 +1,154 @@
-import json
-import subprocess
+import shutil
+import tempfile
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from dagster_skills_evals.cache import (
+    NarrativeCache,
+    ResultCache,
+    narrative_cache_key,
+    result_cache_key,
+)
+from dagster_skills_evals.console import console
 from dagster_skills_evals.execution import (
+    CLAUDE_MODEL,
+    LATENCY_FIELDS,
     ClaudeExecutionResult,
     ClaudeExecutionResultSummary,
+    LiveRunMetrics,
+    RunBudget,
+    execute_prompt_stream_json,
+)
+from dagster_skills_evals.logstore import BlobStore, log_files, write_logs
+from dagster_skills_evals.retention import collect_garbage_periodically
+from dagster_skills_evals.stats import GateCheck, MetricComparison, SampleStats
+from dagster_skills_evals.tracing import Timeline, traced
+from dagster_skills_evals.workspace import (
+    WorkspaceRegistry,
+    WorkspaceSnapshots,
+    run_setup_scripts,
 )
 
 
+def _narrative_summary(
+    result: ClaudeExecutionResult,
+    narrative_context: str | None,
+    narrative_cache: NarrativeCache | None,
+) -> list[str]:
+    if narrative_cache is None:
+        return result.generate_narrative_summary(narrative_context)
+
+    key = narrative_cache_key(result.messages, narrative_context)
+    cached = narrative_cache.get(key)
+    if cached is not None:
+        return cached
+    narrative = result.generate_narrative_summary(narrative_context)
+    if narrative:
+        narrative_cache.put(key, narrative)
+    return narrative
+
+
 def build_summary(
     result: ClaudeExecutionResult,
     *,
     skip_narrative: bool,
     narrative_context: str | None = None,
+    narrative_cache: NarrativeCache | None = None,
+    timeline: Timeline | None = None,
+    track: str = "session",
 ) -> ClaudeExecutionResultSummary:
-    """Build a summary, optionally skipping the expensive narrative generation."""
-    if not skip_narrative:
-        return ClaudeExecutionResultSummary(
-            input_tokens=result.input_tokens,
-            output_tokens=result.output_tokens,
-            cost_usd=result.cost_usd,
-            execution_time_ms=result.execution_time_ms,
-            tools_used=[tool["name"] for tool in result.tool_usages],
-            model_usage=result.model_usage,
-            narrative_summary=result.generate_narrative_summary(narrative_context),
-        )
+    """Build a summary, optionally skipping the expensive narrative generation.
 
+    With a narrative cache, an identical session and context reuses the stored narrative.
+    """
+    narrative: list[str] = []
+    if not skip_narrative:
+        with traced(timeline, "narrative", track=track, category="narrative"):
+            narrative = _narrative_summary(result, narrative_context, narrative_cache)
     return ClaudeExecutionResultSummary(
         input_tokens=result.input_tokens,
         output_tokens=result.output_tokens,
         cost_usd=result.cost_usd,
         execution_time_ms=result.execution_time_ms,
-        tools_used=[tool["name"] for tool in result.tool_usages],
+        tools_used=[call.name for call in result.tool_calls],
         model_usage=result.model_usage,
-        narrative_summary=[],
+        narrative_summary=narrative,
+        budget_aborted=result.budget_aborted,
+        abort_reason=result.abort_reason,
+        turns=len(result.turns),
+        **result.latency,
     )
 
 
-def save_run_logs(run_dir: Path, result: ClaudeExecutionResult) -> None:
-    """Save execution logs to a directory."""
-    run_dir.mkdir(parents=True, exist_ok=True)
+def build_summaries(
+    results: Sequence[ClaudeExecutionResult],
+    *,
+    skip_narrative: bool | Sequence[bool],
+    narrative_context: str | None = None,
+    narrative_cache: NarrativeCache | None = None,
+    max_workers: int = 4,
+    timeline: Timeline | None = None,
+    tracks: Sequence[str] | None = None,
+) -> list[ClaudeExecutionResultSummary]:
+    """Build summaries for several results, generating their narratives concurrently.
 
-    with (run_dir / "summary.json").open("w") as f:
-        json.dump(result.messages, f, indent=2)
-    with (run_dir / "stdout.txt").open("w") as f:
-        f.write(result.stdout)
-    with (run_dir / "stderr.txt").open("w") as f:
-        f.write(result.stderr)
+    ``skip_narrative`` may be a single flag or one flag per result. With a timeline,
+    narrative spans go on the matching entry of ``tracks``.
+    """
+    skips = [skip_narrative] * len(results) if isinstance(skip_narrative, bool) else skip_narrative
+    tracks = tracks if tracks is not None else ["session"] * len(results)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [
+            pool.submit(
+                build_summary,
+                result,
+                skip_narrative=skip,
+                narrative_context=narrative_context,
+                narrative_cache=narrative_cache,
+                timeline=timeline,
+                track=track,
+            )
+            for result, skip, track in zip(results, skips, tracks, strict=True)
+        ]
+        return [future.result() for future in futures]
+
+
+def save_run_logs(
+    run_dir: Path,
+    result: ClaudeExecutionResult,
+    store: BlobStore | None = None,
+    *,
+    timeline: Timeline | None = None,
+    track: str = "session",
+) -> None:
+    """Save execution logs to a directory.
+
+    With a blob store, only a manifest is written to the directory and the contents are
+    stored compressed and deduplicated across runs. A transcript already spooled to
+    run_dir/stdout.txt is left in place rather than written again.
+    """
+    with traced(timeline, "write logs", track=track, category="logs"):
+        _write_run_logs(run_dir, result, store)
+
+
+def _write_run_logs(run_dir: Path, result: ClaudeExecutionResult, store: BlobStore | None) -> None:
+    run_dir.mkdir(parents=True, exist_ok=True)
+    files = log_files(result)
+    if store is not None:
+        write_logs(run_dir, files, store)
+        stdout_path = run_dir / "stdout.txt"
+        if result.transcript_path == stdout_path:
+            stdout_path.unlink()
+        return
+    for name, content in files.items():
+        path = run_dir / name
+        if isinstance(content, Path):
+            if content != path:
+                shutil.copyfile(content, path)
+        else:
+            path.write_text(content)
 
 
 def summary_to_dict(summary: ClaudeExecutionResultSummary) -> dict:
@@ -57,16 +159,212 @@ def summary_to_dict(summary: ClaudeExecutionResultSummary) -> dict:
         "cost_usd": summary.cost_usd,
         "execution_time_ms": summary.execution_time_ms,
         "tools_used": summary.tools_used,
+        "budget_aborted": summary.budget_aborted,
+        "abort_reason": summary.abort_reason,
+        "turns": summary.turns,
+        **{field: getattr(summary, field) for field in LATENCY_FIELDS},
+        "cache_read_input_tokens": summary.cache_read_input_tokens,
+        "cache_creation_input_tokens": summary.cache_creation_input_tokens,
+        "cache_hit_ratio": summary.cache_hit_ratio,
+        "cache_creation_cost_usd": summary.cache_creation_cost_usd,
+        "effective_cost_usd": summary.effective_cost_usd,
+        "cost_by_model": summary.cost_breakdown,
+    }
+
+
+def _sample_stats_to_dict(stats: SampleStats) -> dict:
+    return {
+        "n": stats.n,
+        "mean": stats.mean,
+        "median": stats.median,
+        "stdev": stats.stdev,
+        "ci": [stats.ci_low, stats.ci_high],
+    }
+
+
+def comparison_to_dict(comparison: MetricComparison) -> dict:
+    """Convert a metric comparison to a JSON-serializable dict."""
+    return {
+        "baseline": _sample_stats_to_dict(comparison.baseline),
+        "treatment": _sample_stats_to_dict(comparison.treatment),
+        "delta_mean": comparison.delta_mean,
+        "delta_ci": [comparison.delta_ci_low, comparison.delta_ci_high],
+        "verdict": comparison.verdict,
     }
 
 
-def run_setup_scripts(
-    tmp_dir: str,
+def gate_to_dict(check: GateCheck) -> dict:
+    """Convert a regression gate check to a JSON-serializable dict."""
+    return {
+        "reference_median": check.reference_median,
+        "current_mean": check.current_mean,
+        "limit": check.limit,
+        "p_value": check.p_value,
+        "regressed": check.regressed,
+    }
+
+
+def budget_from_options(
+    max_tokens: int | None, max_cost: float | None, max_turns: int | None
+) -> RunBudget | None:
+    """Build a RunBudget from CLI options, or None if no limit was given."""
+    if max_tokens is None and max_cost is None and max_turns is None:
+        return None
+    return RunBudget(max_tokens=max_tokens, max_cost_usd=max_cost, max_turns=max_turns)
+
+
+def collect_stale_runs(cache_root: Path) -> None:
+    """Apply the default retention policy to the workspaces dg-eval recorded, at most once
+    a day.
+
+    Log dirs are left alone; `dg-eval gc` removes those. Reports what was removed, if
+    anything.
+    """
+    report = collect_garbage_periodically(
+        cache_root / "gc.stamp", workspaces=WorkspaceRegistry.in_cache(cache_root)
+    )
+    if report is None or not report.removed:
+        return
+    for path in report.removed:
+        console.print(f"[dim]Removed {path}[/dim]")
+    console.print(f"[dim]Automatic cleanup: {report.describe()} See `dg-eval gc --help`.[/dim]")
+
+
+def _format_age(seconds: float) -> str:
+    for unit, size in (("days", 24 * 60 * 60), ("hours", 60 * 60), ("minutes", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.0f} {unit}"
+    return f"{seconds:.0f} seconds"
+
+
+def report_reused_snapshots(snapshots: WorkspaceSnapshots | None) -> None:
+    """Say when workspaces were cloned from snapshots built by an earlier command."""
+    if snapshots is None or not snapshots.reused:
+        return
+    age = _format_age(time.time() - min(snapshots.reused.values()))
+    console.print(
+        f"[yellow]Cloned workspaces from {len(snapshots.reused)} stored snapshot(s) instead of "
+        f"running the setup scripts; the oldest was built {age} ago. Pass --refresh-snapshot "
+        "if the scripts install dependencies that may have changed since.[/yellow]"
+    )
+
+
+def prepare_workspace(
     setup_script: Path | None,
     run_specific_script: Path | None = None,
-) -> None:
-    """Run setup scripts in the given directory."""
-    if setup_script:
-        subprocess.run(str(setup_script.resolve()), cwd=tmp_dir, shell=True, check=True)
-    if run_specific_script:
-        subprocess.run(str(run_specific_script.resolve()), cwd=tmp_dir, shell=True, check=True)
+    tmp_prefix: str = "dg-eval-",
+    snapshots: WorkspaceSnapshots | None = None,
+    timeline: Timeline | None = None,
+    track: str = "session",
+    workspaces: WorkspaceRegistry | None = None,
+) -> str:
+    """Create a fresh temp dir with the setup scripts applied, cloning a snapshot if possible.
+
+    The directory is recorded in workspaces, if given, for automatic cleanup.
+    """
+    use_snapshot = snapshots is not None and bool(setup_script or run_specific_script)
+    with traced(timeline, "setup", track=track, category="setup", snapshot=use_snapshot):
+        if snapshots is not None and use_snapshot:
+            tmp_dir = snapshots.materialize(
+                setup_script, run_specific_script, tmp_prefix=tmp_prefix
+            )
+            if workspaces is not None:
+                workspaces.record(tmp_dir)
+            return tmp_dir
+        tmp_dir = tempfile.mkdtemp(prefix=tmp_prefix)
+        # Recorded before setup runs, so that a workspace whose setup fails is still collected.
+        if workspaces is not None:
+            workspaces.record(tmp_dir)
+        run_setup_scripts(tmp_dir, setup_script, run_specific_script)
+        return tmp_dir
+
+
+def run_session(
+    prompt: str,
+    *,
+    setup_script: Path | None,
+    run_specific_script: Path | None = None,
+    extra_args: list[str],
+    timeout: int,
+    tmp_prefix: str = "dg-eval-",
+    metrics: LiveRunMetrics | None = None,
+    budget: RunBudget | None = None,
+    cache: ResultCache | None = None,
+    refresh_cache: bool = False,
+    trial: int = 0,
+    snapshots: WorkspaceSnapshots | None = None,
+    transcript_path: Path | None = None,
+    timeline: Timeline | None = None,
+    track: str = "session",
+    prompt_caching: bool = False,
+    workspaces: WorkspaceRegistry | None = None,
+) -> tuple[ClaudeExecutionResult, str | None]:
+    """Run setup scripts in a fresh temp dir, then execute the prompt there.
+
+    Returns the result and its working directory. With a cache, an unchanged session is
+    returned without running anything and the directory is None; refresh_cache re-runs
+    and re-stores it. When the args name a relative ``--plugin-dir``, setup runs first so
+    that the plugin dir can be hashed inside the workspace, and a session whose plugin dirs
+    cannot be hashed is not cached. With snapshots, the post-setup workspace is cloned from a stored
+    snapshot instead of re-running the scripts. With transcript_path, the session's events
+    are spooled to that file instead of being held in memory. With a timeline, setup and
+    the session's turns and tool calls are recorded on ``track``. Prompt caching is
+    disabled unless prompt_caching is set. The workspace is recorded in workspaces, if
+    given.
+    """
+    metrics = metrics if metrics is not None else LiveRunMetrics()
+
+    def _cache_key(workspace: Path | None) -> str | None:
+        return result_cache_key(
+            prompt,
+            extra_args,
+            [setup_script, run_specific_script],
+            model=CLAUDE_MODEL,
+            trial=trial,
+            budget=budget,
+            prompt_caching=prompt_caching,
+            workspace=workspace,
+        )
+
+    cache_key = tmp_dir = None
+    if cache is not None:
+        cache_key = _cache_key(None)
+        if cache_key is None:
+            # Relative plugin dirs live in the workspace, so it must exist to hash them.
+            tmp_dir = prepare_workspace(
+                setup_script,
+                run_specific_script,
+                tmp_prefix,
+                snapshots,
+                timeline,
+                track,
+                workspaces,
+            )
+            cache_key = _cache_key(Path(tmp_dir))
+        cached = cache.get(cache_key) if cache_key is not None and not refresh_cache else None
+        if cached is not None:
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            for event in cached.events:
+                metrics.observe(event)
+            return cached, None
+
+    if tmp_dir is None:
+        tmp_dir = prepare_workspace(
+            setup_script, run_specific_script, tmp_prefix, snapshots, timeline, track, workspaces
+        )
+    result = execute_prompt_stream_json(
+        prompt=prompt,
+        target_dir=tmp_dir,
+        extra_args=extra_args or None,
+        timeout=timeout,
+        metrics=metrics,
+        budget=budget,
+        transcript_path=transcript_path,
+        prompt_caching=prompt_caching,
+    )
+    if timeline is not None:
+        timeline.add_session(result, track=track)
+    if cache is not None and cache_key is not None:
+        cache.put(cache_key, result)
+    return result, tmp_dir
@@ -2,15 +2,29 @@ import json
 import shlex
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from enum import StrEnum
 from pathlib import Path
 
 import typer
 
-from dagster_skills_evals.benchmark_display import SpinnerDisplay, render_comparison
+from dagster_skills_evals.benchmark_display import (
+    SpinnerDisplay,
+    render_comparison,
+    render_gate,
+    render_narratives,
+    render_trial_comparison,
+)
+from dagster_skills_evals.cache import NarrativeCache, ResultCache, default_cache_dir
 from dagster_skills_evals.cli._shared import (
-    build_summary,
-    run_setup_scripts,
+    budget_from_options,
+    build_summaries,
+    collect_stale_runs,
+    comparison_to_dict,
+    gate_to_dict,
+    report_reused_snapshots,
+    run_session,
     save_run_logs,
     summary_to_dict,
 )
@@ -18,17 +32,57 @@ from dagster_skills_evals.console import console
 from dagster_skills_evals.execution import (
     ClaudeExecutionResult,
     ClaudeExecutionResultSummary,
-    execute_prompt_stream_json,
+    LiveRunMetrics,
+    RunBudget,
+)
+from dagster_skills_evals.logstore import BlobStore
+from dagster_skills_evals.stats import (
+    DEFAULT_TOLERANCES,
+    GateCheck,
+    compare_summaries,
+    gate_summaries,
 )
+from dagster_skills_evals.tracing import TRACE_FILE_NAME, Timeline
+from dagster_skills_evals.workspace import WorkspaceRegistry, WorkspaceSnapshots
 
 __all__ = ["benchmark"]
 
+# Distinct from 1 (a crash or failed session) so CI can tell a regression from an error.
+_REGRESSION_EXIT_CODE = 3
+
 
 @dataclass
 class _BenchmarkRun:
     result: ClaudeExecutionResult
     summary: ClaudeExecutionResultSummary
-    tmp_dir: str
+    tmp_dir: str | None
+    cached: bool = False
+
+
+_ARMS = ("baseline", "treatment")
+
+
+class PromptCaching(StrEnum):
+    OFF = "off"
+    ON = "on"
+    BOTH = "both"
+
+
+# Whether prompt caching is enabled, for each pass of a --prompt-caching mode.
+_CACHING_PASSES = {
+    PromptCaching.OFF: (False,),
+    PromptCaching.ON: (True,),
+    PromptCaching.BOTH: (False, True),
+}
+
+
+def _arm_run_dir(logs_dir: Path, arm: str, trial: int, trials: int) -> Path:
+    """Log directory of one session; trial is zero-based."""
+    return logs_dir / arm if trials == 1 else logs_dir / arm / f"trial-{trial + 1}"
+
+
+def _task_label(arm: str, trial: int, trials: int) -> str:
+    return arm if trials == 1 else f"{arm} #{trial + 1}"
 
 
 def _run_benchmarks(
@@ -42,62 +96,123 @@ def _run_benchmarks(
     baseline_extra_args: list[str],
     treatment_extra_args: list[str],
     narrative_context: str | None = None,
-) -> tuple[_BenchmarkRun, _BenchmarkRun]:
-    """Execute both benchmark runs. When quiet=False, shows a live spinner."""
-    total_phases = 2 if skip_narrative else 3
+    concurrent: bool = True,
+    trials: int = 1,
+    max_workers: int = 2,
+    budget: RunBudget | None = None,
+    cache: ResultCache | None = None,
+    refresh_baseline: bool = False,
+    reuse_trials: bool = False,
+    narrative_cache: NarrativeCache | None = None,
+    snapshots: WorkspaceSnapshots | None = None,
+    logs_dir: Path | None = None,
+    timeline: Timeline | None = None,
+    prompt_caching: bool = False,
+    workspaces: WorkspaceRegistry | None = None,
+) -> dict[str, list[_BenchmarkRun]]:
+    """Execute every trial of both benchmark arms. When quiet=False, shows a live spinner.
 
-    def _execute(tmp_dir: str, extra_args: list[str]) -> ClaudeExecutionResult:
-        return execute_prompt_stream_json(
-            prompt=prompt,
-            target_dir=tmp_dir,
-            extra_args=extra_args or None,
+    Sessions are scheduled on a pool of at most max_workers threads (one when
+    concurrent=False), so with the default of two workers a single-trial comparison takes
+    roughly as long as the slower arm. Narratives are only generated for the first trial of
+    each arm.
+
+    With a cache, every session is stored, but only a baseline session whose inputs are
+    unchanged is reused without running setup scripts or Claude; the treatment arm always
+    runs. With several trials, stored baseline trials are only replayed when reuse_trials is
+    set, so that each run collects new samples by default. refresh_baseline forces the
+    baseline arm to re-run. Narratives are
+    generated concurrently and memoized in narrative_cache. With snapshots, each arm's
+    setup scripts run once and later sessions start from a clone of the result. With
+    logs_dir, each session's events are spooled to its stdout.txt as they arrive. With a
+    timeline, each session is traced on a track named after its arm and trial. Every
+    session runs with prompt caching enabled when prompt_caching is set. Workspaces are
+    recorded in workspaces for automatic cleanup.
+    """
+    total_phases = 1 if skip_narrative else 2
+    arm_scripts = {"baseline": baseline_setup_script, "treatment": treatment_setup_script}
+    arm_args = {"baseline": baseline_extra_args, "treatment": treatment_extra_args}
+    reuse_baseline = not refresh_baseline and (trials == 1 or reuse_trials)
+
+    def _run_arm(
+        arm: str, trial: int, metrics: LiveRunMetrics
+    ) -> tuple[ClaudeExecutionResult, str | None]:
+        return run_session(
+            prompt,
+            setup_script=setup_script,
+            run_specific_script=arm_scripts[arm],
+            extra_args=arm_args[arm],
             timeout=timeout,
+            tmp_prefix=f"dg-eval-{arm}-",
+            metrics=metrics,
+            budget=budget,
+            cache=cache,
+            snapshots=snapshots,
+            refresh_cache=not (reuse_baseline and arm == "baseline"),
+            trial=trial,
+            transcript_path=(
+                _arm_run_dir(logs_dir, arm, trial, trials) / "stdout.txt" if logs_dir else None
+            ),
+            timeline=timeline,
+            track=_task_label(arm, trial, trials),
+            prompt_caching=prompt_caching,
+            workspaces=workspaces,
         )
 
-    def _run_baseline() -> tuple[ClaudeExecutionResult, str]:
-        tmp_dir = tempfile.mkdtemp(prefix="dg-eval-baseline-")
-        run_setup_scripts(tmp_dir, setup_script, baseline_setup_script)
-        return _execute(tmp_dir, baseline_extra_args), tmp_dir
+    def _tracked(
+        arm: str, trial: int, display: SpinnerDisplay | None
+    ) -> tuple[ClaudeExecutionResult, str | None]:
+        label = _task_label(arm, trial, trials)
+        metrics = LiveRunMetrics()
+        if display:
+            display.start_task(label, f"Running {label}", metrics)
+        try:
+            return _run_arm(arm, trial, metrics)
+        finally:
+            if display:
+                display.finish_task(label)
 
-    def _run_treatment() -> tuple[ClaudeExecutionResult, str]:
-        tmp_dir = tempfile.mkdtemp(prefix="dg-eval-treatment-")
-        run_setup_scripts(tmp_dir, setup_script, treatment_setup_script)
-        return _execute(tmp_dir, treatment_extra_args), tmp_dir
+    def _run_all(display: SpinnerDisplay | None) -> dict[str, list[_BenchmarkRun]]:
+        if display:
+            sessions = "baseline and treatment" if trials == 1 else f"{trials} trials per arm"
+            display.set_phase(1, total_phases, f"Running {sessions}")
 
-    if quiet:
-        result_baseline, baseline_tmp_dir = _run_baseline()
-        result_treatment, treatment_tmp_dir = _run_treatment()
-        summary_baseline = build_summary(
-            result_baseline, skip_narrative=skip_narrative, narrative_context=narrative_context
-        )
-        summary_treatment = build_summary(
-            result_treatment, skip_narrative=skip_narrative, narrative_context=narrative_context
-        )
-    else:
-        with SpinnerDisplay() as display:
-            display.set_phase(1, total_phases, "Running baseline")
-            result_baseline, baseline_tmp_dir = _run_baseline()
-
-            display.set_phase(2, total_phases, "Running treatment")
-            result_treatment, treatment_tmp_dir = _run_treatment()
+        jobs = [(arm, trial) for trial in range(trials) for arm in _ARMS]
+        workers = max(1, max_workers) if concurrent else 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {job: pool.submit(_tracked, *job, display) for job in jobs}
+            outputs = {job: future.result() for job, future in futures.items()}
 
+        if display:
+            display.clear_tasks()
             if not skip_narrative:
-                display.set_phase(3, total_phases, "Generating narrative summaries")
-            summary_baseline = build_summary(
-                result_baseline, skip_narrative=skip_narrative, narrative_context=narrative_context
-            )
-            summary_treatment = build_summary(
-                result_treatment, skip_narrative=skip_narrative, narrative_context=narrative_context
+                display.set_phase(2, total_phases, "Generating narrative summaries")
+
+        summaries = build_summaries(
+            [result for result, _ in outputs.values()],
+            skip_narrative=[skip_narrative or trial > 0 for _, trial in outputs],
+            narrative_context=narrative_context,
+            narrative_cache=narrative_cache,
+            timeline=timeline,
+            tracks=[_task_label(arm, trial, trials) for arm, trial in outputs],
+        )
+
+        runs: dict[str, list[_BenchmarkRun]] = {arm: [] for arm in _ARMS}
+        for ((arm, _), (result, tmp_dir)), summary in zip(outputs.items(), summaries, strict=True):
+            runs[arm].append(
+                _BenchmarkRun(
+                    result=result, summary=summary, tmp_dir=tmp_dir, cached=tmp_dir is None
+                )
             )
+        return runs
 
-            display.finish()
+    if quiet:
+        return _run_all(None)
 
-    return (
-        _BenchmarkRun(result=result_baseline, summary=summary_baseline, tmp_dir=baseline_tmp_dir),
-        _BenchmarkRun(
-            result=result_treatment, summary=summary_treatment, tmp_dir=treatment_tmp_dir
-        ),
-    )
+    with SpinnerDisplay() as display:
+        runs = _run_all(display)
+        display.finish()
+    return runs
 
 
 def benchmark(
@@ -132,9 +247,90 @@ def benchmark(
         "--narrative-context",
         help="Extra context to include in narrative summary generation.",
     ),
+    concurrent: bool = typer.Option(
+        True,
+        "--concurrent/--sequential",
+        help="Run sessions on a worker pool or strictly one after another.",
+    ),
+    trials: int = typer.Option(
+        1, "--trials", "-n", min=1, help="Number of independent sessions to run per arm."
+    ),
+    max_workers: int = typer.Option(
+        2, "--max-workers", "-w", min=1, help="Maximum number of concurrent sessions."
+    ),
+    max_tokens: int | None = typer.Option(
+        None, "--max-tokens", help="Abort a session once its input + output tokens exceed this."
+    ),
+    max_cost: float | None = typer.Option(
+        None, "--max-cost", help="Abort a session once its cost in USD exceeds this."
+    ),
+    max_turns: int | None = typer.Option(
+        None, "--max-turns", help="Abort a session once it exceeds this many assistant turns."
+    ),
+    use_cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse the stored baseline session and narratives whose inputs are unchanged. "
+        "The treatment arm always runs.",
+    ),
+    refresh_baseline: bool = typer.Option(
+        False, "--refresh-baseline", help="Re-run the baseline arm even if it is cached."
+    ),
+    reuse_trials: bool = typer.Option(
+        False,
+        "--reuse-trials",
+        help="With --trials, replay stored baseline trials instead of collecting new samples.",
+    ),
+    cache_dir: Path | None = typer.Option(
+        None, "--cache-dir", help="Result cache directory. Defaults to ~/.cache/dg-eval."
+    ),
+    use_snapshot: bool = typer.Option(
+        False,
+        "--snapshot/--no-snapshot",
+        help="Clone post-setup workspaces from stored snapshots instead of re-running setup. "
+        "Snapshots are keyed on the script contents only, so they do not pick up newer "
+        "dependency versions.",
+    ),
+    refresh_snapshot: bool = typer.Option(
+        False,
+        "--refresh-snapshot",
+        help="Re-run the setup scripts and replace the stored snapshots they produced.",
+    ),
+    fail_on_regression: bool = typer.Option(
+        False,
+        "--fail-on-regression",
+        help=f"Exit with code {_REGRESSION_EXIT_CODE} if the treatment regresses any metric.",
+    ),
+    tolerance: float | None = typer.Option(
+        None,
+        "--tolerance",
+        help="Relative change tolerated in every metric before it counts as a regression. "
+        "Defaults to per-metric tolerances.",
+    ),
+    alpha: float = typer.Option(
+        0.05, "--alpha", help="Significance level of the regression test across trials."
+    ),
+    dedupe_logs: bool = typer.Option(
+        False,
+        "--dedupe-logs",
+        help="Store logs compressed and deduplicated in the cache directory, leaving a "
+        "manifest in the logs dir. Rebuild them with `dg-eval logs restore`.",
+    ),
+    prompt_caching: PromptCaching = typer.Option(
+        PromptCaching.OFF,
+        "--prompt-caching",
+        help="Run sessions with prompt caching off (comparable token counts), on (as in "
+        "production), or both, comparing the arms once per setting.",
+    ),
     output_json: bool = typer.Option(False, "--json", help="Output results as JSON to stdout."),
 ) -> None:
-    """Run a prompt as baseline vs treatment and compare results."""
+    """Run a prompt as baseline vs treatment and compare results.
+
+    With --fail-on-regression, a metric regresses when the treatment is worse than the
+    baseline by more than the tolerance and, given enough trials, a Mann-Whitney test
+    confirms the difference at --alpha. With --prompt-caching both, each setting's logs
+    go to a caching-off or caching-on subdirectory and either one can fail the gate.
+    """
     if output_json:
         skip_narrative = True
 
@@ -152,52 +348,168 @@ def benchmark(
 
     if not output_json:
         console.print(f"[bold]Prompt:[/bold] {prompt}")
-        if setup_script:
-            console.print(f"[bold]Setup script:[/bold] {setup_script}")
-        if baseline_setup_script:
-            console.print(f"[bold]Baseline setup:[/bold] {baseline_setup_script}")
-        if treatment_setup_script:
-            console.print(f"[bold]Treatment setup:[/bold] {treatment_setup_script}")
-        if baseline_extra_args:
-            console.print(f"[bold]Baseline args:[/bold] {baseline_extra_args}")
-        if treatment_extra_args:
-            console.print(f"[bold]Treatment args:[/bold] {treatment_extra_args}")
+        settings = [
+            ("Setup script", setup_script),
+            ("Baseline setup", baseline_setup_script),
+            ("Treatment setup", treatment_setup_script),
+            ("Baseline args", baseline_extra_args),
+            ("Treatment args", treatment_extra_args),
+            ("Trials", f"{trials} per arm" if trials > 1 else None),
+            ("Prompt caching", prompt_caching.value if prompt_caching != "off" else None),
+        ]
+        for label, value in settings:
+            if value:
+                console.print(f"[bold]{label}:[/bold] {value}")
         console.print(f"[bold]Logs:[/bold]   {resolved_logs}")
         console.print()
 
-    result_baseline, result_treatment = _run_benchmarks(
-        prompt=prompt,
-        timeout=timeout,
-        skip_narrative=skip_narrative,
-        quiet=output_json,
-        setup_script=setup_script,
-        baseline_setup_script=baseline_setup_script,
-        treatment_setup_script=treatment_setup_script,
-        baseline_extra_args=baseline_extra_args,
-        treatment_extra_args=treatment_extra_args,
-        narrative_context=narrative_context,
+    cache_root = cache_dir or default_cache_dir()
+    collect_stale_runs(cache_root)
+    log_store = BlobStore(cache_root / "blobs") if dedupe_logs else None
+    snapshots = (
+        WorkspaceSnapshots(cache_root / "workspaces", refresh=refresh_snapshot)
+        if use_snapshot
+        else None
     )
+    passes = _CACHING_PASSES[prompt_caching]
+    outcomes: dict[str, tuple[dict[str, list[_BenchmarkRun]], Path, list[GateCheck] | None]] = {}
+    for caching in passes:
+        setting = "on" if caching else "off"
+        pass_logs = resolved_logs / f"caching-{setting}" if len(passes) > 1 else resolved_logs
+        timeline = Timeline()
+        runs = _run_benchmarks(
+            prompt=prompt,
+            timeout=timeout,
+            skip_narrative=skip_narrative,
+            quiet=output_json,
+            setup_script=setup_script,
+            baseline_setup_script=baseline_setup_script,
+            treatment_setup_script=treatment_setup_script,
+            baseline_extra_args=baseline_extra_args,
+            treatment_extra_args=treatment_extra_args,
+            narrative_context=narrative_context,
+            concurrent=concurrent,
+            trials=trials,
+            max_workers=max_workers,
+            budget=budget_from_options(max_tokens, max_cost, max_turns),
+            cache=ResultCache(cache_root / "results") if use_cache else None,
+            refresh_baseline=refresh_baseline,
+            reuse_trials=reuse_trials,
+            narrative_cache=NarrativeCache(cache_root / "narratives") if use_cache else None,
+            snapshots=snapshots,
+            logs_dir=pass_logs,
+            timeline=timeline,
+            prompt_caching=caching,
+            workspaces=WorkspaceRegistry.in_cache(cache_root),
+        )
 
-    # Save logs
-    save_run_logs(resolved_logs / "baseline", result_baseline.result)
-    save_run_logs(resolved_logs / "treatment", result_treatment.result)
+        # Save logs
+        for arm, arm_runs in runs.items():
+            for trial, arm_run in enumerate(arm_runs):
+                run_dir = _arm_run_dir(pass_logs, arm, trial, trials)
+                track = _task_label(arm, trial, trials)
+                save_run_logs(run_dir, arm_run.result, log_store, timeline=timeline, track=track)
+        timeline.write(pass_logs / TRACE_FILE_NAME)
+
+        gate = _regression_gate(runs, tolerance, alpha) if fail_on_regression else None
+        outcomes[setting] = (runs, pass_logs, gate)
+    report_reused_snapshots(snapshots)
 
     if output_json:
+        results = {setting: _results_json(*outcome) for setting, outcome in outcomes.items()}
         json.dump(
-            {
-                "baseline": summary_to_dict(result_baseline.summary),
-                "treatment": summary_to_dict(result_treatment.summary),
-                "logs_dir": str(resolved_logs),
-                "baseline_dir": result_baseline.tmp_dir,
-                "treatment_dir": result_treatment.tmp_dir,
-            },
+            next(iter(results.values())) if len(results) == 1 else {"prompt_caching": results},
             sys.stdout,
             indent=2,
         )
         sys.stdout.write("\n")
     else:
-        render_comparison(result_baseline.summary, result_treatment.summary)
+        for setting, outcome in outcomes.items():
+            if len(outcomes) > 1:
+                console.print()
+                console.print(f"[bold]Prompt caching {setting}[/bold]")
+            _render_results(*outcome)
+
+    if any(gate and any(check.regressed for check in gate) for _, _, gate in outcomes.values()):
+        raise typer.Exit(code=_REGRESSION_EXIT_CODE)
+
+
+def _regression_gate(
+    runs: dict[str, list[_BenchmarkRun]], tolerance: float | None, alpha: float
+) -> list[GateCheck]:
+    return gate_summaries(
+        [run.summary for run in runs["baseline"]],
+        [run.summary for run in runs["treatment"]],
+        tolerances=dict.fromkeys(DEFAULT_TOLERANCES, tolerance) if tolerance is not None else None,
+        alpha=alpha,
+    )
+
+
+def _gate_json(gate: list[GateCheck] | None) -> dict:
+    if gate is None:
+        return {}
+    return {"gate": {check.metric.name: gate_to_dict(check) for check in gate}}
+
+
+def _results_json(
+    runs: dict[str, list[_BenchmarkRun]],
+    resolved_logs: Path,
+    gate: list[GateCheck] | None = None,
+) -> dict:
+    baseline, treatment = runs["baseline"], runs["treatment"]
+    if len(baseline) == 1:
+        return {
+            "baseline": summary_to_dict(baseline[0].summary),
+            "treatment": summary_to_dict(treatment[0].summary),
+            "logs_dir": str(resolved_logs),
+            "baseline_dir": baseline[0].tmp_dir,
+            "treatment_dir": treatment[0].tmp_dir,
+            "baseline_cached": baseline[0].cached,
+            "treatment_cached": treatment[0].cached,
+            **_gate_json(gate),
+        }
+    comparisons = compare_summaries(
+        [run.summary for run in baseline], [run.summary for run in treatment]
+    )
+    return {
+        "baseline": [summary_to_dict(run.summary) for run in baseline],
+        "treatment": [summary_to_dict(run.summary) for run in treatment],
+        "statistics": {c.metric.name: comparison_to_dict(c) for c in comparisons},
+        "logs_dir": str(resolved_logs),
+        "baseline_dirs": [run.tmp_dir for run in baseline],
+        "treatment_dirs": [run.tmp_dir for run in treatment],
+        **_gate_json(gate),
+    }
+
+
+def _render_results(
+    runs: dict[str, list[_BenchmarkRun]],
+    resolved_logs: Path,
+    gate: list[GateCheck] | None = None,
+) -> None:
+    baseline, treatment = runs["baseline"], runs["treatment"]
+    if len(baseline) == 1:
+        render_comparison(baseline[0].summary, treatment[0].summary)
+        if gate is not None:
+            render_gate(gate)
         console.print()
-        console.print(f"[dim]Baseline dir:  {result_baseline.tmp_dir}[/dim]")
-        console.print(f"[dim]Treatment dir: {result_treatment.tmp_dir}[/dim]")
+        console.print(f"[dim]Baseline dir:  {baseline[0].tmp_dir or '(cached)'}[/dim]")
+        console.print(f"[dim]Treatment dir: {treatment[0].tmp_dir or '(cached)'}[/dim]")
         console.print(f"[dim]Logs saved to: {resolved_logs}[/dim]")
+        return
+
+    comparisons = compare_summaries(
+        [run.summary for run in baseline], [run.summary for run in treatment]
+    )
+    render_trial_comparison(comparisons, len(baseline), len(treatment))
+    for arm, arm_runs in (("Baseline", baseline), ("Treatment", treatment)):
+        aborted = sum(run.summary.budget_aborted for run in arm_runs)
+        if aborted:
+            console.print(
+                f"[yellow]{arm}: {aborted}/{len(arm_runs)} trials aborted by budget[/yellow]"
+            )
+    if gate is not None:
+        render_gate(gate)
+    render_narratives(baseline[0].summary, treatment[0].summary)
+    console.print()
+    console.print(f"[dim]Logs saved to: {resolved_logs}[/dim]")
@@ -0,0 +1,113 @@
+import json
+import sys
+from pathlib import Path
+
+import typer
+
+from dagster_skills_evals.cache import default_cache_dir
+from dagster_skills_evals.console import console
+from dagster_skills_evals.history import HistoryStore, default_history_path
+from dagster_skills_evals.logstore import BlobStore
+from dagster_skills_evals.retention import RetentionPolicy, collect_garbage, format_size
+from dagster_skills_evals.workspace import WorkspaceRegistry
+
+__all__ = ["gc"]
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+# Benchmark logs of the test suite in a source checkout.
+_REPO_LOGS_DIR = Path(__file__).parents[3] / "dagster_skills_evals_tests" / "__baselines__" / "logs"
+
+
+def _parse_size(value: str) -> int:
+    text = value.strip().upper().removesuffix("B").removesuffix("I")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    try:
+        return int(float(text.removesuffix(unit)) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise typer.BadParameter(f"Invalid size {value!r}; expected e.g. 500M or 2G") from None
+
+
+def gc(
+    max_age_days: float | None = typer.Option(
+        14.0, "--max-age-days", help="Remove runs older than this. 0 disables the age limit."
+    ),
+    max_bytes: str | None = typer.Option(
+        None,
+        "--max-bytes",
+        help="Then remove the oldest runs until the total fits, e.g. 500M or 2G.",
+    ),
+    keep_last: int = typer.Option(
+        20, "--keep-last", min=0, help="Always keep this many most recent runs per test."
+    ),
+    logs_dirs: list[Path] | None = typer.Option(
+        None,
+        "--logs-dir",
+        "-l",
+        file_okay=False,
+        help="Benchmark logs directory (repeatable). Defaults to the test suite's logs.",
+    ),
+    include_temp: bool = typer.Option(
+        True,
+        "--temp/--no-temp",
+        help="Also collect dg-eval directories in the temp dir, including the log dirs of "
+        "commands run without --logs-dir.",
+    ),
+    sweep_unregistered: bool = typer.Option(
+        False,
+        "--sweep-unregistered",
+        help="Also remove log blobs that no manifest under the scanned logs dirs references. "
+        "Manifests of run dirs moved or copied elsewhere can then no longer be restored.",
+    ),
+    cache_dir: Path | None = typer.Option(
+        None, "--cache-dir", help="Cache directory. Defaults to ~/.cache/dg-eval."
+    ),
+    workers: int = typer.Option(8, "--workers", min=1, help="Parallel scan workers."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Report what would be removed."),
+    output_json: bool = typer.Option(False, "--json", help="Output results as JSON to stdout."),
+) -> None:
+    """Remove old run logs and workspaces, keeping baselines and the latest runs of each test."""
+    if logs_dirs is None:
+        logs_dirs = [_REPO_LOGS_DIR] if _REPO_LOGS_DIR.exists() else []
+    cache_root = cache_dir or default_cache_dir()
+    history_path = default_history_path() if cache_dir is None else cache_dir / "history.sqlite3"
+    protected = HistoryStore(history_path).baseline_run_dirs() if history_path.exists() else []
+
+    report = collect_garbage(
+        logs_dirs=logs_dirs,
+        include_temp=include_temp,
+        workspaces=WorkspaceRegistry.in_cache(cache_root),
+        blob_stores=[BlobStore(cache_root / "blobs")]
+        + [BlobStore(logs_dir / "blobs") for logs_dir in logs_dirs],
+        protected=protected,
+        policy=RetentionPolicy(
+            max_age_days=max_age_days or None,
+            max_total_bytes=_parse_size(max_bytes) if max_bytes else None,
+            keep_last=keep_last,
+        ),
+        sweep_unregistered=sweep_unregistered,
+        dry_run=dry_run,
+        max_workers=workers,
+    )
+
+    if output_json:
+        json.dump(
+            {
+                "removed": [str(path) for path in report.removed],
+                "blobs_removed": report.blobs_removed,
+                "reclaimed_bytes": report.reclaimed_bytes,
+                "kept": report.kept,
+                "dry_run": report.dry_run,
+            },
+            sys.stdout,
+            indent=2,
+        )
+        sys.stdout.write("\n")
+        return
+
+    verb = "Would remove" if dry_run else "Removed"
+    for path in report.removed:
+        console.print(f"[dim]{verb} {path}[/dim]")
+    console.print(
+        f"{verb} {len(report.removed)} directories and {report.blobs_removed} log blobs, "
+        f"reclaiming [bold]{format_size(report.reclaimed_bytes)}[/bold]; kept {report.kept}."
+    )
@@ -0,0 +1,127 @@
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import typer
+
+from dagster_skills_evals.benchmark_display import render_history_runs, render_history_stats
+from dagster_skills_evals.console import console
+from dagster_skills_evals.history import (
+    METRIC_COLUMNS,
+    HistoryStore,
+    default_history_path,
+)
+from dagster_skills_evals.stats import percentile
+
+app = typer.Typer(
+    help="Query the history of recorded benchmark runs.",
+    context_settings={"help_option_names": ["-h", "--help"]},
+)
+
+_DB_OPTION = typer.Option(
+    None, "--db", help="History database. Defaults to ~/.cache/dg-eval/history.sqlite3."
+)
+
+
+def _open(db: Path | None) -> HistoryStore:
+    path = db or default_history_path()
+    if not path.exists():
+        console.print(f"[red]ERROR:[/red] No history database at {path}")
+        raise typer.Exit(code=1)
+    return HistoryStore(path)
+
+
+@app.command("tests")
+def list_tests(
+    db: Path | None = _DB_OPTION,
+    output_json: bool = typer.Option(False, "--json", help="Output results as JSON to stdout."),
+) -> None:
+    """List recorded tests with their run counts."""
+    rows = _open(db).tests()
+    if output_json:
+        json.dump(
+            [{"test": test, "runs": count, "latest": latest} for test, count, latest in rows],
+            sys.stdout,
+            indent=2,
+        )
+        sys.stdout.write("\n")
+        return
+    for test, count, latest in rows:
+        when = datetime.fromtimestamp(latest).strftime("%Y-%m-%d %H:%M")
+        console.print(f"{test}  [dim]{count} runs, latest {when}[/dim]")
+
+
+@app.command("show")
+def show(
+    test: str = typer.Argument(..., help="Test name."),
+    last: int = typer.Option(30, "--last", "-n", min=1, help="Number of most recent runs."),
+    db: Path | None = _DB_OPTION,
+    output_json: bool = typer.Option(False, "--json", help="Output results as JSON to stdout."),
+) -> None:
+    """Show the most recent runs of a test."""
+    runs = _open(db).runs(test, last=last)
+    if output_json:
+        json.dump([vars(run) for run in runs], sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    render_history_runs(test, runs)
+
+
+@app.command("stats")
+def stats(
+    test: str = typer.Argument(..., help="Test name."),
+    metrics: list[str] | None = typer.Option(
+        None,
+        "--metric",
+        "-m",
+        help=f"Metric to summarize (repeatable). One of: {', '.join(METRIC_COLUMNS)}.",
+    ),
+    last: int = typer.Option(30, "--last", "-n", min=1, help="Number of most recent runs."),
+    db: Path | None = _DB_OPTION,
+    output_json: bool = typer.Option(False, "--json", help="Output results as JSON to stdout."),
+) -> None:
+    """Summarize metrics over the most recent runs of a test, e.g. p50 input tokens."""
+    names = metrics or list(METRIC_COLUMNS)
+    unknown = [name for name in names if name not in METRIC_COLUMNS]
+    if unknown:
+        console.print(f"[red]ERROR:[/red] Unknown metric(s): {', '.join(unknown)}")
+        raise typer.Exit(code=1)
+
+    runs = _open(db).runs(test, last=last)
+    if not runs:
+        console.print(f"[red]ERROR:[/red] No recorded runs for {test}")
+        raise typer.Exit(code=1)
+
+    results: dict[str, dict[str, float]] = {}
+    for name in names:
+        values = sorted(run.metric(name) for run in runs)
+        results[name] = {
+            "n": len(values),
+            "p50": percentile(values, 0.5),
+            "p95": percentile(values, 0.95),
+            "mean": sum(values) / len(values),
+            "min": values[0],
+            "max": values[-1],
+        }
+
+    if output_json:
+        json.dump({"test": test, "metrics": results}, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    render_history_stats(test, results)
+
+
+@app.command("export")
+def export(
+    output: Path = typer.Argument(..., dir_okay=False, help="Parquet file to write."),
+    test: str | None = typer.Option(None, "--test", help="Only export runs of this test."),
+    db: Path | None = _DB_OPTION,
+) -> None:
+    """Export recorded runs to Parquet (requires pyarrow)."""
+    try:
+        count = _open(db).export_parquet(output, test=test)
+    except RuntimeError as exc:
+        console.print(f"[red]ERROR:[/red] {exc}")
+        raise typer.Exit(code=1) from exc
+    console.print(f"Exported {count} runs to {output}")
@@ -1,9 +1,13 @@
+import json
+import sys
 from pathlib import Path
 
 import typer
 from pydantic import ValidationError
 
+from dagster_skills_evals.benchmark_display import render_context_cost
 from dagster_skills_evals.console import console
+from dagster_skills_evals.context_cost import ENTRY_FILE, analyze_context_cost, budget_violations
 from dagster_skills_evals.markdown import parse_frontmatter, parse_frontmatter_raw
 
 app = typer.Typer(context_settings={"help_option_names": ["-h", "--help"]})
@@ -161,3 +165,71 @@ def generate_index(
     for readme_path, new_text in deferred_texts.items():
         readme_path.write_text(new_text)
         console.print(f"Updated {readme_path}")
+
+
+@app.command("context-cost")
+def context_cost(
+    skill_root: Path = typer.Argument(..., help="Path to the skill root directory"),
+    check: bool = typer.Option(
+        False, "--check", help="Fail if a file or worst-case path exceeds its budget"
+    ),
+    max_file_tokens: int = typer.Option(
+        5_000, "--max-file-tokens", min=1, help="Token budget of a single file"
+    ),
+    max_path_tokens: int = typer.Option(
+        24_000,
+        "--max-path-tokens",
+        min=1,
+        help=f"Token budget of the files loaded along the most expensive route from "
+        f"{ENTRY_FILE} to any file. Routes never load a file twice; for very large link "
+        "graphs the most expensive route is estimated heuristically.",
+    ),
+    limit: int | None = typer.Option(20, "--limit", "-n", min=1, help="Rows to show per table"),
+    output_json: bool = typer.Option(False, "--json", help="Output results as JSON to stdout."),
+) -> None:
+    """Estimate the tokens each skill file, and each link path through the skill, costs.
+
+    Token counts are estimates, and the worst-case route to each file is the costliest chain
+    of links that loads no file twice; past a search limit it falls back to a heuristic that
+    only follows links leading further from the entry file.
+    """
+    if not (skill_root / ENTRY_FILE).is_file():
+        console.print(f"[red]ERROR:[/red] {ENTRY_FILE} not found in {skill_root}")
+        raise typer.Exit(code=1)
+
+    cost = analyze_context_cost(skill_root)
+    violations = budget_violations(
+        cost, max_file_tokens=max_file_tokens, max_path_tokens=max_path_tokens
+    )
+
+    if output_json:
+        json.dump(
+            {
+                "files": {str(path): tokens for path, tokens in cost.files.items()},
+                "routes": [
+                    {
+                        "target": str(route.target),
+                        "best_tokens": route.best.tokens,
+                        "best_path": [str(path) for path in route.best.files],
+                        "worst_tokens": route.worst.tokens,
+                        "worst_path": [str(path) for path in route.worst.files],
+                    }
+                    for route in cost.routes
+                ],
+                "unreachable": [str(path) for path in cost.unreachable],
+                "violations": violations,
+            },
+            sys.stdout,
+            indent=2,
+        )
+        sys.stdout.write("\n")
+    elif check:
+        for violation in violations:
+            console.print(f"[red]OVER BUDGET:[/red] {violation}")
+        if not violations:
+            console.print("[green]All files and paths are within budget.[/green]")
+    else:
+        render_context_cost(cost, limit)
+
+    if check and violations:
+        raise typer.Exit(code=1)
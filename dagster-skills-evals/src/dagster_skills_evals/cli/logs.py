@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import typer
+
+from dagster_skills_evals.console import console
+from dagster_skills_evals.logstore import MANIFEST_NAME, read_log, restore_logs
+
+app = typer.Typer(
+    help="Read logs saved with --dedupe-logs.",
+    context_settings={"help_option_names": ["-h", "--help"]},
+)
+
+
+def _check_run_dir(run_dir: Path) -> None:
+    if not (run_dir / MANIFEST_NAME).exists():
+        console.print(f"[red]ERROR:[/red] No {MANIFEST_NAME} in {run_dir}")
+        raise typer.Exit(code=1)
+
+
+@app.command("restore")
+def restore(
+    run_dir: Path = typer.Argument(..., file_okay=False, help="Run logs directory."),
+    output: Path | None = typer.Option(
+        None, "--output", "-o", help="Write the files here instead of into the run directory."
+    ),
+) -> None:
+    """Rebuild summary.json, stdout.txt and stderr.txt of a deduplicated run."""
+    _check_run_dir(run_dir)
+    for path in restore_logs(run_dir, output):
+        console.print(f"Restored {path}")
+
+
+@app.command("cat")
+def cat(
+    run_dir: Path = typer.Argument(..., file_okay=False, help="Run logs directory."),
+    name: str = typer.Argument("stdout.txt", help="Log file to print."),
+) -> None:
+    """Print one log file of a deduplicated run to stdout."""
+    _check_run_dir(run_dir)
+    sys.stdout.write(read_log(run_dir, name))
@@ -0,0 +1,73 @@
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+import typer
+
+from dagster_skills_evals.benchmark_display import render_reference_heatmap
+from dagster_skills_evals.console import console
+from dagster_skills_evals.execution import PLUGINS_DIR
+from dagster_skills_evals.references import (
+    build_heatmap,
+    find_run_dirs,
+    load_run,
+    reference_reads,
+)
+
+__all__ = ["references"]
+
+
+def references(
+    logs_dirs: list[Path] = typer.Argument(
+        ..., exists=True, file_okay=False, help="Logs directories of run, benchmark or suite."
+    ),
+    plugins_dir: Path = typer.Option(
+        PLUGINS_DIR, "--plugins-dir", file_okay=False, help="Plugin the references belong to."
+    ),
+    include_unread: bool = typer.Option(
+        False, "--all", help="Also list skill files that no run loaded."
+    ),
+    limit: int | None = typer.Option(
+        30, "--limit", "-n", min=1, help="Show this many of the hottest references."
+    ),
+    output_json: bool = typer.Option(False, "--json", help="Output results as JSON to stdout."),
+) -> None:
+    """Show which skill files saved sessions loaded, how often, and at what token cost.
+
+    Reads, greps, globs and skill loads that hit the plugin dir are attributed to the files
+    they returned; tokens are estimated from the text each call put into context.
+    """
+    run_dirs = [run_dir for logs_dir in logs_dirs for run_dir in find_run_dirs(logs_dir)]
+    if not run_dirs:
+        console.print("[red]ERROR:[/red] No saved sessions found")
+        raise typer.Exit(code=1)
+
+    per_run = {}
+    for run_dir in run_dirs:
+        try:
+            result = load_run(run_dir)
+        except ValueError as exc:
+            console.print(f"[yellow]Skipping {run_dir}:[/yellow] {exc}")
+            continue
+        per_run[run_dir] = reference_reads(result, plugins_dir)
+    heatmap = build_heatmap(per_run.values(), plugins_dir=plugins_dir if include_unread else None)
+
+    if output_json:
+        json.dump(
+            {
+                "total_runs": heatmap.total_runs,
+                "total_tokens": heatmap.total_tokens,
+                "references": [asdict(heat) for heat in heatmap.references],
+                "runs": {
+                    str(run_dir): [asdict(read) for read in reads]
+                    for run_dir, reads in per_run.items()
+                },
+            },
+            sys.stdout,
+            indent=2,
+        )
+        sys.stdout.write("\n")
+        return
+
+    render_reference_heatmap(heatmap, limit)
@@ -7,18 +7,64 @@ from pathlib import Path
 import typer
 
 from dagster_skills_evals.benchmark_display import SpinnerDisplay, render_single_run
+from dagster_skills_evals.cache import NarrativeCache, default_cache_dir
 from dagster_skills_evals.cli._shared import (
+    budget_from_options,
     build_summary,
-    run_setup_scripts,
+    collect_stale_runs,
+    prepare_workspace,
+    report_reused_snapshots,
     save_run_logs,
     summary_to_dict,
 )
 from dagster_skills_evals.console import console
-from dagster_skills_evals.execution import execute_prompt_stream_json
+from dagster_skills_evals.execution import (
+    ClaudeExecutionResult,
+    LiveRunMetrics,
+    RunBudget,
+    execute_prompt_stream_json,
+)
+from dagster_skills_evals.logstore import BlobStore
+from dagster_skills_evals.tracing import TRACE_FILE_NAME, Timeline
+from dagster_skills_evals.workspace import WorkspaceRegistry, WorkspaceSnapshots
 
 __all__ = ["run"]
 
 
+def _run_session(
+    prompt: str,
+    setup_script: Path | None,
+    extra_args: list[str],
+    *,
+    timeout: int,
+    budget: RunBudget | None,
+    snapshots: WorkspaceSnapshots | None,
+    cache_root: Path,
+    logs_dir: Path,
+    timeline: Timeline,
+    metrics: LiveRunMetrics,
+) -> tuple[str, ClaudeExecutionResult]:
+    """Prepare the workspace and run the prompt in it, spooling events to logs_dir."""
+    tmp_dir = prepare_workspace(
+        setup_script,
+        tmp_prefix="dg-eval-run-",
+        snapshots=snapshots,
+        timeline=timeline,
+        workspaces=WorkspaceRegistry.in_cache(cache_root),
+    )
+    result = execute_prompt_stream_json(
+        prompt=prompt,
+        target_dir=tmp_dir,
+        extra_args=extra_args or None,
+        timeout=timeout,
+        metrics=metrics,
+        budget=budget,
+        transcript_path=logs_dir / "stdout.txt",
+    )
+    timeline.add_session(result, track="session")
+    return tmp_dir, result
+
+
 def run(
     prompt: str = typer.Option(..., "--prompt", "-p", help="The prompt to run."),
     setup_script: Path | None = typer.Option(
@@ -39,6 +85,39 @@ def run(
         "--narrative-context",
         help="Extra context to include in narrative summary generation.",
     ),
+    max_tokens: int | None = typer.Option(
+        None, "--max-tokens", help="Abort a session once its input + output tokens exceed this."
+    ),
+    max_cost: float | None = typer.Option(
+        None, "--max-cost", help="Abort a session once its cost in USD exceeds this."
+    ),
+    max_turns: int | None = typer.Option(
+        None, "--max-turns", help="Abort a session once it exceeds this many assistant turns."
+    ),
+    use_cache: bool = typer.Option(
+        True, "--cache/--no-cache", help="Reuse a stored narrative if the session is unchanged."
+    ),
+    use_snapshot: bool = typer.Option(
+        False,
+        "--snapshot/--no-snapshot",
+        help="Clone the post-setup workspace from a stored snapshot instead of re-running setup. "
+        "Snapshots are keyed on the script contents only, so they do not pick up newer "
+        "dependency versions.",
+    ),
+    refresh_snapshot: bool = typer.Option(
+        False,
+        "--refresh-snapshot",
+        help="Re-run the setup scripts and replace the stored snapshots they produced.",
+    ),
+    cache_dir: Path | None = typer.Option(
+        None, "--cache-dir", help="Cache directory. Defaults to ~/.cache/dg-eval."
+    ),
+    dedupe_logs: bool = typer.Option(
+        False,
+        "--dedupe-logs",
+        help="Store logs compressed and deduplicated in the cache directory, leaving a "
+        "manifest in the logs dir. Rebuild them with `dg-eval logs restore`.",
+    ),
     output_json: bool = typer.Option(False, "--json", help="Output results as JSON to stdout."),
 ) -> None:
     """Run a single prompt execution and display stats."""
@@ -46,6 +125,16 @@ def run(
         skip_narrative = True
 
     extra_args = shlex.split(claude_args) if claude_args else []
+    budget = budget_from_options(max_tokens, max_cost, max_turns)
+    cache_root = cache_dir or default_cache_dir()
+    collect_stale_runs(cache_root)
+    narrative_cache = NarrativeCache(cache_root / "narratives") if use_cache else None
+    snapshots = (
+        WorkspaceSnapshots(cache_root / "workspaces", refresh=refresh_snapshot)
+        if use_snapshot
+        else None
+    )
+    timeline = Timeline()
 
     resolved_logs = (
         Path(logs_dir).resolve() if logs_dir else Path(tempfile.mkdtemp(prefix="dg-eval-run-"))
@@ -60,41 +149,65 @@ def run(
         console.print(f"[bold]Logs:[/bold]   {resolved_logs}")
         console.print()
 
-    tmp_dir = tempfile.mkdtemp(prefix="dg-eval-run-")
-
     if output_json:
-        run_setup_scripts(tmp_dir, setup_script)
-        result = execute_prompt_stream_json(
-            prompt=prompt,
-            target_dir=tmp_dir,
-            extra_args=extra_args or None,
+        tmp_dir, result = _run_session(
+            prompt,
+            setup_script,
+            extra_args,
             timeout=timeout,
+            budget=budget,
+            snapshots=snapshots,
+            cache_root=cache_root,
+            logs_dir=resolved_logs,
+            timeline=timeline,
+            metrics=LiveRunMetrics(),
         )
         summary = build_summary(
-            result, skip_narrative=skip_narrative, narrative_context=narrative_context
+            result,
+            skip_narrative=skip_narrative,
+            narrative_context=narrative_context,
+            narrative_cache=narrative_cache,
+            timeline=timeline,
         )
     else:
         total_phases = 1 if skip_narrative else 2
         with SpinnerDisplay() as display:
             display.set_phase(1, total_phases, "Running prompt")
-            run_setup_scripts(tmp_dir, setup_script)
-            result = execute_prompt_stream_json(
-                prompt=prompt,
-                target_dir=tmp_dir,
-                extra_args=extra_args or None,
+            metrics = LiveRunMetrics()
+            display.start_task("run", "Session", metrics)
+            tmp_dir, result = _run_session(
+                prompt,
+                setup_script,
+                extra_args,
                 timeout=timeout,
+                budget=budget,
+                snapshots=snapshots,
+                cache_root=cache_root,
+                logs_dir=resolved_logs,
+                timeline=timeline,
+                metrics=metrics,
             )
+            display.finish_task("run")
+            display.clear_tasks()
 
             if not skip_narrative:
                 display.set_phase(2, total_phases, "Generating narrative summary")
             summary = build_summary(
-                result, skip_narrative=skip_narrative, narrative_context=narrative_context
+                result,
+                skip_narrative=skip_narrative,
+                narrative_context=narrative_context,
+                narrative_cache=narrative_cache,
+                timeline=timeline,
             )
 
             display.finish()
 
+    report_reused_snapshots(snapshots)
+
     # Save logs
-    save_run_logs(resolved_logs, result)
+    log_store = BlobStore(cache_root / "blobs") if dedupe_logs else None
+    save_run_logs(resolved_logs, result, log_store, timeline=timeline)
+    timeline.write(resolved_logs / TRACE_FILE_NAME)
 
     if output_json:
         json.dump(
@@ -0,0 +1,385 @@
+import json
+import shlex
+import subprocess
+import sys
+import tempfile
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import typer
+import yaml
+from pydantic import ValidationError
+
+from dagster_skills_evals.benchmark_display import (
+    SpinnerDisplay,
+    render_cost_breakdown,
+    render_suite_results,
+)
+from dagster_skills_evals.cache import NarrativeCache, ResultCache, default_cache_dir
+from dagster_skills_evals.cli._shared import (
+    budget_from_options,
+    build_summary,
+    collect_stale_runs,
+    report_reused_snapshots,
+    run_session,
+    save_run_logs,
+    summary_to_dict,
+)
+from dagster_skills_evals.console import console
+from dagster_skills_evals.execution import (
+    ClaudeExecutionResult,
+    ClaudeExecutionResultSummary,
+    LiveRunMetrics,
+    RunBudget,
+)
+from dagster_skills_evals.logstore import BlobStore
+from dagster_skills_evals.models import SuiteCase, SuiteConfig
+from dagster_skills_evals.pricing import CostBreakdown, merge_breakdowns
+from dagster_skills_evals.tracing import TRACE_FILE_NAME, Timeline
+from dagster_skills_evals.workspace import WorkspaceRegistry, WorkspaceSnapshots
+
+__all__ = ["suite"]
+
+
+@dataclass
+class _SuiteRun:
+    case: SuiteCase
+    arm: str
+    result: ClaudeExecutionResult | None = None
+    summary: ClaudeExecutionResultSummary | None = None
+    tmp_dir: str | None = None
+    cached: bool = False
+    error: str | None = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.case.name}/{self.arm}"
+
+
+def _load_suite(suite_file: Path) -> SuiteConfig:
+    """Load a suite file, resolving script paths relative to the file's directory."""
+    data = yaml.safe_load(suite_file.read_text())
+    try:
+        config = SuiteConfig.model_validate(data)
+    except ValidationError as exc:
+        console.print(f"[red]ERROR:[/red] Invalid suite file {suite_file}:")
+        for err in exc.errors():
+            loc = ".".join(str(part) for part in err["loc"])
+            console.print(f"  - {loc} — {err['msg']}")
+        raise typer.Exit(code=1) from exc
+
+    base_dir = suite_file.resolve().parent
+    for case in config.cases:
+        if case.setup_script:
+            case.setup_script = base_dir / case.setup_script
+        for arm in case.arms.values():
+            if arm.setup_script:
+                arm.setup_script = base_dir / arm.setup_script
+    return config
+
+
+def _session_error(result: ClaudeExecutionResult) -> str | None:
+    """Why a finished session cannot be summarized, or None if it can."""
+    if not result.has_result_event:
+        return f"claude exited with code {result.return_code} without a result event"
+    if result.return_code != 0 and not result.budget_aborted:
+        return f"claude exited with code {result.return_code}"
+    return None
+
+
+def _run_suite(
+    config: SuiteConfig,
+    timeout: int,
+    concurrency: int,
+    skip_narrative: bool,
+    quiet: bool,
+    narrative_context: str | None = None,
+    budget: RunBudget | None = None,
+    cache: ResultCache | None = None,
+    reuse_arms: Collection[str] = (),
+    narrative_cache: NarrativeCache | None = None,
+    snapshots: WorkspaceSnapshots | None = None,
+    logs_dir: Path | None = None,
+    timeline: Timeline | None = None,
+    workspaces: WorkspaceRegistry | None = None,
+) -> list[_SuiteRun]:
+    """Run every (case, arm) session on a pool of at most `concurrency` workers.
+
+    A session that fails (setup script error, timeout, crash or failed narrative) is recorded
+    with its error and does not stop the rest of the suite. With a cache, every session is
+    stored, but only sessions of the arms in reuse_arms are served from it. With logs_dir,
+    each session's events are spooled to its stdout.txt as they arrive. With a timeline,
+    each session is traced on its own track. Workspaces are recorded in workspaces for
+    automatic cleanup.
+    """
+    total_phases = 1 if skip_narrative else 2
+    runs = [_SuiteRun(case=case, arm=arm) for case in config.cases for arm in case.arms]
+
+    def _execute(run: _SuiteRun, display: SpinnerDisplay | None) -> None:
+        arm = run.case.arms[run.arm]
+        extra_args = shlex.split(run.case.claude_args or "") + shlex.split(arm.claude_args or "")
+        metrics = LiveRunMetrics()
+        if display:
+            display.start_task(run.label, run.label, metrics)
+        try:
+            run.result, run.tmp_dir = run_session(
+                run.case.prompt,
+                setup_script=run.case.setup_script,
+                run_specific_script=arm.setup_script,
+                extra_args=extra_args,
+                timeout=run.case.timeout or timeout,
+                tmp_prefix=f"dg-eval-{run.case.name}-{run.arm}-",
+                metrics=metrics,
+                budget=budget,
+                cache=cache,
+                refresh_cache=run.arm not in reuse_arms,
+                snapshots=snapshots,
+                transcript_path=(
+                    logs_dir / run.case.name / run.arm / "stdout.txt" if logs_dir else None
+                ),
+                timeline=timeline,
+                track=run.label,
+                workspaces=workspaces,
+            )
+            run.cached = run.tmp_dir is None
+            run.error = _session_error(run.result)
+        except (
+            subprocess.CalledProcessError,
+            subprocess.TimeoutExpired,
+            OSError,
+            ValueError,
+        ) as exc:
+            run.error = str(exc)
+        finally:
+            if display:
+                display.remove_task(run.label)
+
+    def _run_all(display: SpinnerDisplay | None) -> None:
+        if display:
+            display.set_phase(
+                1, total_phases, f"Running {len(runs)} sessions ({concurrency} at a time)"
+            )
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(_execute, run, display) for run in runs]:
+                future.result()
+
+        if display and not skip_narrative:
+            display.set_phase(2, total_phases, "Generating narrative summaries")
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                (
+                    run,
+                    pool.submit(
+                        build_summary,
+                        run.result,
+                        skip_narrative=skip_narrative,
+                        narrative_context=narrative_context,
+                        narrative_cache=narrative_cache,
+                        timeline=timeline,
+                        track=run.label,
+                    ),
+                )
+                for run in runs
+                if run.result is not None and run.error is None
+            ]
+            for run, future in futures:
+                try:
+                    run.summary = future.result()
+                except (subprocess.TimeoutExpired, OSError, ValueError) as exc:
+                    run.error = f"narrative summary failed: {exc}"
+
+    if quiet:
+        _run_all(None)
+    else:
+        with SpinnerDisplay() as display:
+            _run_all(display)
+            display.finish()
+    return runs
+
+
+def _build_report(suite_file: Path, runs: list[_SuiteRun], logs_dir: Path) -> dict:
+    cases: dict[str, dict] = {}
+    for run in runs:
+        case = cases.setdefault(
+            run.case.name, {"name": run.case.name, "prompt": run.case.prompt, "arms": {}}
+        )
+        case["arms"][run.arm] = {
+            "result": summary_to_dict(run.summary) if run.summary else None,
+            "error": run.error,
+            "cached": run.cached,
+            "run_dir": run.tmp_dir,
+            "logs_dir": str(logs_dir / run.case.name / run.arm),
+        }
+
+    summaries = [run.summary for run in runs if run.summary is not None]
+    return {
+        "suite": str(suite_file),
+        "logs_dir": str(logs_dir),
+        "cases": list(cases.values()),
+        "totals": {
+            "sessions": len(runs),
+            "errors": sum(run.error is not None for run in runs),
+            "input_tokens": sum(s.input_tokens for s in summaries),
+            "output_tokens": sum(s.output_tokens for s in summaries),
+            "cost_usd": sum(s.cost_usd for s in summaries),
+            "cost_by_model": merge_breakdowns(s.cost_breakdown for s in summaries),
+            "cost_by_arm": _cost_by_arm(runs),
+        },
+    }
+
+
+def _cost_by_arm(runs: list[_SuiteRun]) -> dict[str, CostBreakdown]:
+    """Cost per model and token class of each arm, summed over the suite's cases."""
+    arms: dict[str, list[CostBreakdown]] = {}
+    for run in runs:
+        if run.summary is not None:
+            arms.setdefault(run.arm, []).append(run.summary.cost_breakdown)
+    return {arm: merge_breakdowns(breakdowns) for arm, breakdowns in arms.items()}
+
+
+def suite(
+    suite_file: Path = typer.Argument(
+        ..., exists=True, dir_okay=False, help="YAML or JSON file describing the cases to run."
+    ),
+    concurrency: int = typer.Option(
+        4, "--concurrency", "-c", min=1, help="Maximum number of concurrent sessions."
+    ),
+    logs_dir: Path | None = typer.Option(
+        None, "--logs-dir", "-l", help="Directory for logs. Defaults to a temp directory."
+    ),
+    report: Path | None = typer.Option(
+        None, "--report", "-r", help="Write a machine-readable JSON report to this path."
+    ),
+    timeout: int = typer.Option(
+        300, "--timeout", "-t", help="Timeout in seconds per session, unless a case overrides it."
+    ),
+    skip_narrative: bool = typer.Option(
+        False, "--skip-narrative", help="Skip narrative summary generation."
+    ),
+    narrative_context: str | None = typer.Option(
+        None,
+        "--narrative-context",
+        help="Extra context to include in narrative summary generation.",
+    ),
+    max_tokens: int | None = typer.Option(
+        None, "--max-tokens", help="Abort a session once its input + output tokens exceed this."
+    ),
+    max_cost: float | None = typer.Option(
+        None, "--max-cost", help="Abort a session once its cost in USD exceeds this."
+    ),
+    max_turns: int | None = typer.Option(
+        None, "--max-turns", help="Abort a session once it exceeds this many assistant turns."
+    ),
+    use_cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Store sessions and reuse narratives whose inputs are unchanged.",
+    ),
+    reuse_arms: list[str] = typer.Option(
+        [],
+        "--reuse-arm",
+        help="Serve this arm's sessions from the cache when their inputs are unchanged "
+        "(repeatable). Other arms always run.",
+    ),
+    cache_dir: Path | None = typer.Option(
+        None, "--cache-dir", help="Cache directory. Defaults to ~/.cache/dg-eval."
+    ),
+    use_snapshot: bool = typer.Option(
+        False,
+        "--snapshot/--no-snapshot",
+        help="Clone post-setup workspaces from stored snapshots instead of re-running setup. "
+        "Snapshots are keyed on the script contents only, so they do not pick up newer "
+        "dependency versions.",
+    ),
+    refresh_snapshot: bool = typer.Option(
+        False,
+        "--refresh-snapshot",
+        help="Re-run the setup scripts and replace the stored snapshots they produced.",
+    ),
+    dedupe_logs: bool = typer.Option(
+        False,
+        "--dedupe-logs",
+        help="Store logs compressed and deduplicated in the cache directory, leaving a "
+        "manifest in the logs dir. Rebuild them with `dg-eval logs restore`.",
+    ),
+    output_json: bool = typer.Option(False, "--json", help="Output the report as JSON to stdout."),
+) -> None:
+    """Run a corpus of prompts through a worker pool and report aggregated results.
+
+    Exits with code 1 if any session failed.
+    """
+    if output_json:
+        skip_narrative = True
+
+    config = _load_suite(suite_file)
+    resolved_logs = (
+        Path(logs_dir).resolve() if logs_dir else Path(tempfile.mkdtemp(prefix="dg-eval-suite-"))
+    )
+
+    if not output_json:
+        sessions = sum(len(case.arms) for case in config.cases)
+        console.print(f"[bold]Suite:[/bold] {suite_file} ({len(config.cases)} cases)")
+        console.print(f"[bold]Sessions:[/bold] {sessions}, {concurrency} at a time")
+        console.print(f"[bold]Logs:[/bold]   {resolved_logs}")
+        console.print()
+
+    cache_root = cache_dir or default_cache_dir()
+    collect_stale_runs(cache_root)
+    timeline = Timeline()
+    snapshots = (
+        WorkspaceSnapshots(cache_root / "workspaces", refresh=refresh_snapshot)
+        if use_snapshot
+        else None
+    )
+    runs = _run_suite(
+        config,
+        timeout=timeout,
+        concurrency=concurrency,
+        skip_narrative=skip_narrative,
+        quiet=output_json,
+        narrative_context=narrative_context,
+        budget=budget_from_options(max_tokens, max_cost, max_turns),
+        cache=ResultCache(cache_root / "results") if use_cache else None,
+        reuse_arms=set(reuse_arms),
+        narrative_cache=NarrativeCache(cache_root / "narratives") if use_cache else None,
+        snapshots=snapshots,
+        logs_dir=resolved_logs,
+        timeline=timeline,
+        workspaces=WorkspaceRegistry.in_cache(cache_root),
+    )
+    report_reused_snapshots(snapshots)
+
+    # Save logs
+    log_store = BlobStore(cache_root / "blobs") if dedupe_logs else None
+    for run in runs:
+        if run.result is None:
+            continue
+        run_logs = resolved_logs / run.case.name / run.arm
+        if run.result.has_result_event:
+            save_run_logs(run_logs, run.result, log_store, timeline=timeline, track=run.label)
+        else:
+            # The output does not parse; keep the spooled transcript as is, plus stderr.
+            run_logs.mkdir(parents=True, exist_ok=True)
+            (run_logs / "stderr.txt").write_text(run.result.stderr or "")
+    timeline.write(resolved_logs / TRACE_FILE_NAME)
+
+    report_data = _build_report(suite_file, runs, resolved_logs)
+    if report:
+        report.parent.mkdir(parents=True, exist_ok=True)
+        report.write_text(json.dumps(report_data, indent=2) + "\n")
+
+    if output_json:
+        json.dump(report_data, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        render_suite_results([(run.case.name, run.arm, run.summary, run.error) for run in runs])
+        render_cost_breakdown(report_data["totals"]["cost_by_arm"], title="Cost by Model per Arm")
+        console.print()
+        if report:
+            console.print(f"[dim]Report:        {report}[/dim]")
+        console.print(f"[dim]Logs saved to: {resolved_logs}[/dim]")
+
+    if any(run.error is not None for run in runs):
+        raise typer.Exit(code=1)
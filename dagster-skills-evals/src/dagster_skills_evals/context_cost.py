@@ -0,0 +1,202 @@
+import heapq
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+
+from dagster_skills_evals.markdown import extract_local_links
+from dagster_skills_evals.tokens import estimate_tokens
+
+ENTRY_FILE = "SKILL.md"
+# Partial routes explored when searching for the most expensive route to each file.
+_MAX_ROUTE_STEPS = 200_000
+
+
+@dataclass(frozen=True)
+class RoutePath:
+    """Files loaded, in order, to reach a file by following links from the entry file."""
+
+    files: tuple[Path, ...]
+    tokens: int
+
+
+@dataclass(frozen=True)
+class RouteCost:
+    """Cheapest and most expensive ways to reach one file from the entry file."""
+
+    target: Path
+    best: RoutePath
+    worst: RoutePath
+
+
+@dataclass(frozen=True)
+class ContextCost:
+    """Token cost of each markdown file of a skill and of the link paths to reach it.
+
+    Paths are relative to the skill root.
+    """
+
+    files: dict[Path, int]
+    routes: list[RouteCost]
+    unreachable: list[Path]
+
+
+def _link_graph(skill_root: Path) -> dict[Path, list[Path]]:
+    """Local links between the skill's markdown files, by linking file."""
+    files = sorted(path.resolve() for path in skill_root.rglob("*.md"))
+    known = set(files)
+    return {
+        path: list(
+            dict.fromkeys(
+                link.resolved_path
+                for link in extract_local_links(path)
+                if link.resolved_path in known and link.resolved_path != path
+            )
+        )
+        for path in files
+    }
+
+
+def _best_routes(
+    graph: dict[Path, list[Path]], tokens: dict[Path, int], entry: Path
+) -> dict[Path, tuple[int, Path | None]]:
+    """Dijkstra over file costs: the cheapest total to reach each file, and its predecessor."""
+    best: dict[Path, tuple[int, Path | None]] = {entry: (tokens[entry], None)}
+    queue = [(tokens[entry], str(entry), entry)]
+    while queue:
+        cost, _, path = heapq.heappop(queue)
+        if cost > best[path][0]:
+            continue
+        for target in graph[path]:
+            total = cost + tokens[target]
+            if target not in best or total < best[target][0]:
+                best[target] = (total, path)
+                heapq.heappush(queue, (total, str(target), target))
+    return best
+
+
+def _better(candidate: tuple[int, tuple[Path, ...]], current: tuple[int, tuple[Path, ...]]) -> bool:
+    """Whether candidate is a costlier route than current; equal costs go to the route whose
+    file names sort first, so that the result does not depend on the order links are seen."""
+    if candidate[0] != current[0]:
+        return candidate[0] > current[0]
+    return [str(path) for path in candidate[1]] < [str(path) for path in current[1]]
+
+
+def _worst_routes(
+    graph: dict[Path, list[Path]], tokens: dict[Path, int], entry: Path
+) -> dict[Path, tuple[int, tuple[Path, ...]]]:
+    """The most expensive route to reach each file, as its total and the files loaded.
+
+    Every route that loads no file twice is explored. Finding the longest simple path is
+    NP-hard, so past _MAX_ROUTE_STEPS partial routes this falls back to the heuristic of
+    _layered_worst_routes.
+    """
+    worst: dict[Path, tuple[int, tuple[Path, ...]]] = {}
+    stack: list[tuple[int, tuple[Path, ...]]] = [(tokens[entry], (entry,))]
+    steps = 0
+    while stack:
+        steps += 1
+        if steps > _MAX_ROUTE_STEPS:
+            return _layered_worst_routes(graph, tokens, entry)
+        route = stack.pop()
+        files = route[1]
+        if files[-1] not in worst or _better(route, worst[files[-1]]):
+            worst[files[-1]] = route
+        stack.extend(
+            (route[0] + tokens[target], (*files, target))
+            for target in graph[files[-1]]
+            if target not in files
+        )
+    return worst
+
+
+def _layered_worst_routes(
+    graph: dict[Path, list[Path]], tokens: dict[Path, int], entry: Path
+) -> dict[Path, tuple[int, tuple[Path, ...]]]:
+    """The most expensive route to reach each file among those following the fewest links.
+
+    A heuristic for link graphs too large to search: only links to files one link further
+    from the entry file than the linking file are followed, which leaves a DAG whose longest
+    paths are found level by level. Routes that step sideways or back are not counted.
+    """
+    depth = {entry: 0}
+    queue = deque([entry])
+    while queue:
+        path = queue.popleft()
+        for target in graph[path]:
+            if target not in depth:
+                depth[target] = depth[path] + 1
+                queue.append(target)
+
+    worst = {entry: (tokens[entry], (entry,))}
+    for path in sorted(depth, key=lambda path: (depth[path], str(path))):
+        total, files = worst[path]
+        for target in graph[path]:
+            if depth[target] != depth[path] + 1:
+                continue
+            route = (total + tokens[target], (*files, target))
+            if target not in worst or _better(route, worst[target]):
+                worst[target] = route
+    return worst
+
+
+def _route(
+    routes: dict[Path, tuple[int, Path | None]], target: Path, skill_root: Path
+) -> RoutePath:
+    files: list[Path] = []
+    current: Path | None = target
+    while current is not None:
+        files.append(current.relative_to(skill_root))
+        current = routes[current][1]
+    return RoutePath(files=tuple(reversed(files)), tokens=routes[target][0])
+
+
+def analyze_context_cost(skill_root: Path, entry: str = ENTRY_FILE) -> ContextCost:
+    """Estimate the tokens of every markdown file under skill_root and of the link paths
+    that reach each one from the entry file, walking links found by extract_local_links.
+
+    A path's cost is the sum of the files loaded along it, entry file included.
+    """
+    root = skill_root.resolve()
+    graph = _link_graph(root)
+    tokens = {path: estimate_tokens(path.read_text()) for path in graph}
+    entry_path = root / entry
+    if entry_path not in graph:
+        raise FileNotFoundError(f"{entry_path} not found")
+
+    best = _best_routes(graph, tokens, entry_path)
+    worst = _worst_routes(graph, tokens, entry_path)
+    return ContextCost(
+        files={path.relative_to(root): count for path, count in tokens.items()},
+        routes=[
+            RouteCost(
+                target=path.relative_to(root),
+                best=_route(best, path, root),
+                worst=RoutePath(
+                    files=tuple(file.relative_to(root) for file in worst[path][1]),
+                    tokens=worst[path][0],
+                ),
+            )
+            for path in graph
+            if path in best and path != entry_path
+        ],
+        unreachable=[path.relative_to(root) for path in graph if path not in best],
+    )
+
+
+def budget_violations(
+    cost: ContextCost, *, max_file_tokens: int | None, max_path_tokens: int | None
+) -> list[str]:
+    """Describe every file, and every worst-case path, over its token budget."""
+    violations = [
+        f"{path}: ~{count:,} tokens exceeds the file budget of {max_file_tokens:,}"
+        for path, count in cost.files.items()
+        if max_file_tokens is not None and count > max_file_tokens
+    ]
+    violations.extend(
+        f"{route.target}: worst-case path of ~{route.worst.tokens:,} tokens exceeds the path "
+        f"budget of {max_path_tokens:,} ({' → '.join(map(str, route.worst.files))})"
+        for route in cost.routes
+        if max_path_tokens is not None and route.worst.tokens > max_path_tokens
+    )
+    return violations
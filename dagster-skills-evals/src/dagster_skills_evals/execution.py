@@ -1,18 +1,35 @@
 import contextlib
+import hashlib
 import json
+import mmap
 import os
+import statistics
 import subprocess
-import sys
 import textwrap
-from dataclasses import dataclass
+import threading
+import time
+from array import array
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from functools import cached_property
 from pathlib import Path
-from typing import Any
+from typing import IO, Any
 
 from dagster_shared.record import record
 from dagster_shared.serdes import whitelist_for_serdes
 
-_PLUGINS_DIR = Path(__file__).parent.parent.parent.parent / "skills" / "dagster-expert"
+from dagster_skills_evals.pricing import CostBreakdown, pricing_for_model
+
+PLUGINS_DIR = Path(__file__).parent.parent.parent.parent / "skills" / "dagster-expert"
+
+# Model used for benchmarked sessions.
+CLAUDE_MODEL = "sonnet"
+# Model used to write narrative summaries of sessions.
+NARRATIVE_MODEL = "sonnet"
+
+# Subtype of the synthetic result event recorded when a RunBudget terminates a session.
+_BUDGET_ABORTED_SUBTYPE = "budget_aborted"
 
 
 @whitelist_for_serdes
@@ -35,11 +52,206 @@ class ClaudeExecutionResultSummary:
     tools_used: list[str]
     model_usage: list[ModelUsage]
     narrative_summary: list[str]
+    budget_aborted: bool = False
+    abort_reason: str | None = None
+    # Latencies in milliseconds, derived from event arrival times; None when the session
+    # was not streamed or had nothing to measure.
+    turns: int = 0
+    time_to_first_token_ms: int | None = None
+    time_to_first_tool_ms: int | None = None
+    time_to_first_skill_ms: int | None = None
+    turn_latency_p50_ms: int | None = None
+    turn_latency_p95_ms: int | None = None
+    turn_latency_max_ms: int | None = None
+    tool_latency_p50_ms: int | None = None
+    tool_latency_p95_ms: int | None = None
+    tool_latency_max_ms: int | None = None
+
+    @property
+    def cache_read_input_tokens(self) -> int:
+        return sum(usage.cache_read_input_tokens for usage in self.model_usage)
+
+    @property
+    def cache_creation_input_tokens(self) -> int:
+        return sum(usage.cache_creation_input_tokens for usage in self.model_usage)
+
+    @property
+    def cache_hit_ratio(self) -> float | None:
+        """Share of prompt tokens read from the prompt cache, or None without usage."""
+        prompt_tokens = sum(
+            usage.input_tokens + usage.cache_read_input_tokens + usage.cache_creation_input_tokens
+            for usage in self.model_usage
+        )
+        return self.cache_read_input_tokens / prompt_tokens if prompt_tokens else None
+
+    @property
+    def cost_breakdown(self) -> CostBreakdown:
+        """Cost per model and token class at local pricing; unpriced models are left out."""
+        return {
+            usage.model: pricing.breakdown(
+                usage.input_tokens,
+                usage.output_tokens,
+                usage.cache_read_input_tokens,
+                usage.cache_creation_input_tokens,
+            )
+            for usage in self.model_usage
+            if (pricing := pricing_for_model(usage.model)) is not None
+        }
+
+    @property
+    def cache_creation_cost_usd(self) -> float:
+        """Cost of writing to the prompt cache, at local pricing."""
+        return sum(costs["cache_write"] for costs in self.cost_breakdown.values())
+
+    @property
+    def effective_cost_usd(self) -> float:
+        """Cost of every token class at local pricing, including cache reads and writes."""
+        return sum(sum(costs.values()) for costs in self.cost_breakdown.values())
+
+
+LATENCY_FIELDS = (
+    "time_to_first_token_ms",
+    "time_to_first_tool_ms",
+    "time_to_first_skill_ms",
+    "turn_latency_p50_ms",
+    "turn_latency_p95_ms",
+    "turn_latency_max_ms",
+    "tool_latency_p50_ms",
+    "tool_latency_p95_ms",
+    "tool_latency_max_ms",
+)
+
+
+@dataclass(slots=True, eq=False)
+class ToolCall:
+    """A tool_use block, linked to the tool_result that answered it once one arrives.
+
+    ``input`` and ``result`` reference the parsed events rather than copying them.
+    """
+
+    id: str | None
+    name: str | None
+    input: Any
+    event_index: int
+    result: Any = None
+    result_event_index: int | None = None
+    is_error: bool = False
+
+
+def is_skill_load(call: ToolCall) -> bool:
+    """Whether a tool call loads a skill: the Skill tool, or reading a SKILL.md directly."""
+    if call.name == "Skill":
+        return True
+    file_path = call.input.get("file_path") if isinstance(call.input, dict) else None
+    return call.name == "Read" and isinstance(file_path, str) and file_path.endswith("SKILL.md")
+
+
+def _latency_distribution(seconds: list[float], prefix: str) -> dict[str, int | None]:
+    """p50, p95 and max of a sample of durations, in milliseconds."""
+    if not seconds:
+        return {f"{prefix}_p50_ms": None, f"{prefix}_p95_ms": None, f"{prefix}_max_ms": None}
+    if len(seconds) == 1:
+        p50 = p95 = seconds[0]
+    else:
+        # Linear interpolation between closest ranks, as stats.percentile computes it.
+        cuts = statistics.quantiles(seconds, n=20, method="inclusive")
+        p50, p95 = cuts[9], cuts[18]
+    return {
+        f"{prefix}_p50_ms": round(p50 * 1000),
+        f"{prefix}_p95_ms": round(p95 * 1000),
+        f"{prefix}_max_ms": round(max(seconds) * 1000),
+    }
+
+
+@dataclass(slots=True)
+class Turn:
+    """One assistant message, which the CLI streams as one event per content block."""
+
+    message_id: str | None
+    first_event: int
+    last_event: int
+
+
+@dataclass(slots=True)
+class _EventIndex:
+    """Lookups over a session's events, built in a single pass.
+
+    Positions are stored as compact integer arrays and messages and tool calls point
+    into the events, so the index adds little memory on top of the transcript itself.
+    """
+
+    by_type: dict[str | None, array] = field(default_factory=dict)
+    messages: list[dict[str, Any]] = field(default_factory=list)
+    tool_calls: list[ToolCall] = field(default_factory=list)
+    tool_calls_by_id: dict[str, ToolCall] = field(default_factory=dict)
+    turns: list[Turn] = field(default_factory=list)
+    result_event: dict[str, Any] | None = None
+
+
+def _index_events(events: list[dict[str, Any]]) -> _EventIndex:
+    index = _EventIndex()
+    by_type, messages = index.by_type, index.messages
+    turns = index.turns
+    for position, event in enumerate(events):
+        event_type = event.get("type")
+        positions = by_type.get(event_type)
+        if positions is None:
+            positions = by_type[event_type] = array("l")
+        positions.append(position)
+        if event_type == "result":
+            index.result_event = event
+        if event_type not in ("assistant", "user") or "message" not in event:
+            continue
+        msg = event["message"]
+        content = msg.get("content", [])
+        messages.append({"role": msg.get("role"), "content": content})
+        if event_type == "assistant":
+            message_id = msg.get("id")
+            if turns and message_id is not None and turns[-1].message_id == message_id:
+                turns[-1].last_event = position
+            else:
+                turns.append(Turn(message_id, position, position))
+        if isinstance(content, list):
+            _index_tool_blocks(index, content, position)
+    return index
+
+
+def _index_tool_blocks(index: _EventIndex, content: list[Any], position: int) -> None:
+    """Record tool_use blocks and link tool_result blocks to them."""
+    for item in content:
+        if not isinstance(item, dict):
+            continue
+        item_type = item.get("type")
+        if item_type == "tool_use":
+            call = ToolCall(item.get("id"), item.get("name"), item.get("input", {}), position)
+            index.tool_calls.append(call)
+            if call.id is not None:
+                index.tool_calls_by_id[call.id] = call
+        elif item_type == "tool_result":
+            call = index.tool_calls_by_id.get(item.get("tool_use_id"))
+            if call is not None:
+                call.result = item.get("content")
+                call.result_event_index = position
+                call.is_error = bool(item.get("is_error"))
 
 
 @dataclass
 class ClaudeExecutionResult:
+    """A finished Claude session.
+
+    The JSON event array comes from one of: ``cli_result.stdout``; ``parsed_events``, the
+    events parsed while streaming (never re-encoded unless ``stdout`` is read); or
+    ``transcript_path``, a file the output was spooled to, parsed on first access. In the
+    last two cases ``cli_result.stdout`` is None.
+    """
+
     cli_result: subprocess.CompletedProcess[str]
+    parsed_events: list[dict[str, Any]] | None = field(default=None, repr=False)
+    transcript_path: Path | None = None
+    # time.monotonic() when the session started and when each event arrived, for streamed
+    # sessions. Results replayed from the cache keep the offsets, with started_at = 0.
+    started_at: float | None = None
+    event_times: array | None = field(default=None, repr=False)
 
     @cached_property
     def summary(self) -> ClaudeExecutionResultSummary:
@@ -48,14 +260,22 @@ class ClaudeExecutionResult:
             output_tokens=self.output_tokens,
             cost_usd=self.cost_usd,
             execution_time_ms=self.execution_time_ms,
-            tools_used=[tool["name"] for tool in self.tool_usages],
+            tools_used=[call.name for call in self.tool_calls],
             model_usage=self.model_usage,
             narrative_summary=self.generate_narrative_summary(),
+            budget_aborted=self.budget_aborted,
+            abort_reason=self.abort_reason,
+            turns=len(self.turns),
+            **self.latency,
         )
 
-    @property
+    @cached_property
     def stdout(self) -> str:
-        return self.cli_result.stdout
+        if self.cli_result.stdout is not None:
+            return self.cli_result.stdout
+        if self.transcript_path is not None:
+            return self.transcript_path.read_text()
+        return format_transcript(self.parsed_events or [])
 
     @property
     def stderr(self) -> str:
@@ -67,15 +287,52 @@ class ClaudeExecutionResult:
 
     @cached_property
     def _json_output(self) -> list[dict[str, Any]]:
+        if self.parsed_events is not None:
+            return self.parsed_events
+        if self.cli_result.stdout is None and self.transcript_path is not None:
+            return list(iter_transcript(self.transcript_path))
         return json.loads(self.stdout)
 
+    @property
+    def events(self) -> list[dict[str, Any]]:
+        """All parsed stream events, in order."""
+        return self._json_output
+
     @cached_property
+    def _index(self) -> _EventIndex:
+        return _index_events(self._json_output)
+
+    def events_of_type(self, event_type: str) -> list[dict[str, Any]]:
+        """The events of one type (e.g. "assistant", "user", "result"), in order."""
+        events = self._json_output
+        return [events[position] for position in self._index.by_type.get(event_type, ())]
+
+    @property
     def _result_event(self) -> dict[str, Any]:
         """Get the final result event from the execution."""
-        for event in reversed(self._json_output):
-            if event.get("type") == "result":
-                return event
-        raise ValueError("No result event found in execution output")
+        if self._index.result_event is None:
+            raise ValueError("No result event found in execution output")
+        return self._index.result_event
+
+    @property
+    def has_result_event(self) -> bool:
+        """Whether the output parses and ends the session with a result event.
+
+        False for sessions that crashed, timed out or were killed before reporting one.
+        """
+        try:
+            return self._index.result_event is not None
+        except ValueError:
+            return False
+
+    @property
+    def budget_aborted(self) -> bool:
+        """Whether the session was terminated early for exceeding a RunBudget."""
+        return self._result_event.get("subtype") == _BUDGET_ABORTED_SUBTYPE
+
+    @property
+    def abort_reason(self) -> str | None:
+        return self._result_event.get("abort_reason") if self.budget_aborted else None
 
     @property
     def cost_usd(self) -> float:
@@ -97,18 +354,62 @@ class ClaudeExecutionResult:
     def tokens(self) -> int:
         return self.input_tokens + self.output_tokens
 
-    @cached_property
+    @property
     def messages(self) -> list[dict[str, Any]]:
         """Extract all messages without extra metadata.
 
         Returns a list of simplified message objects with role and content.
         """
-        result = []
-        for event in self._json_output:
-            if event.get("type") in ("assistant", "user") and "message" in event:
-                msg = event["message"]
-                result.append({"role": msg.get("role"), "content": msg.get("content", [])})
-        return result
+        return self._index.messages
+
+    @property
+    def tool_calls(self) -> list[ToolCall]:
+        """Every tool call in order, each linked to its result."""
+        return self._index.tool_calls
+
+    def tool_call(self, tool_use_id: str) -> ToolCall | None:
+        return self._index.tool_calls_by_id.get(tool_use_id)
+
+    @property
+    def turns(self) -> list[Turn]:
+        """Assistant turns in order, each spanning the events of one message."""
+        return self._index.turns
+
+    @cached_property
+    def latency(self) -> dict[str, int | None]:
+        """The summary's latency fields, from event arrival times.
+
+        Time to first token is measured to the first assistant event, since the CLI
+        streams whole content blocks. A turn lasts from the arrival of the event before
+        it (init or the last tool result) to its last content block; a tool call from its
+        tool_use block to its tool_result.
+        """
+        times, start = self.event_times, self.started_at
+        if not times or start is None:
+            return dict.fromkeys(LATENCY_FIELDS)
+
+        def _since_start(position: int | None) -> int | None:
+            return None if position is None else round((times[position] - start) * 1000)
+
+        turns, calls = self.turns, self.tool_calls
+        turn_seconds = [
+            times[turn.last_event] - (times[turn.first_event - 1] if turn.first_event else start)
+            for turn in turns
+        ]
+        tool_seconds = [
+            times[call.result_event_index] - times[call.event_index]
+            for call in calls
+            if call.result_event_index is not None
+        ]
+        return {
+            "time_to_first_token_ms": _since_start(turns[0].first_event if turns else None),
+            "time_to_first_tool_ms": _since_start(calls[0].event_index if calls else None),
+            "time_to_first_skill_ms": _since_start(
+                next((call.event_index for call in calls if is_skill_load(call)), None)
+            ),
+            **_latency_distribution(turn_seconds, "turn_latency"),
+            **_latency_distribution(tool_seconds, "tool_latency"),
+        }
 
     @cached_property
     def tool_usages(self) -> list[dict[str, Any]]:
@@ -116,21 +417,10 @@ class ClaudeExecutionResult:
 
         Returns a list of tool usage objects with id, name, and input.
         """
-        result = []
-        for event in self._json_output:
-            if event.get("type") in ("assistant", "user") and "message" in event:
-                msg = event["message"]
-                content = msg.get("content", [])
-                for item in content:
-                    if isinstance(item, dict) and item.get("type") == "tool_use":
-                        result.append(
-                            {
-                                "id": item.get("id"),
-                                "name": item.get("name"),
-                                "input": item.get("input", {}),
-                            }
-                        )
-        return result
+        return [
+            {"id": call.id, "name": call.name, "input": call.input}
+            for call in self._index.tool_calls
+        ]
 
     @cached_property
     def model_usage(self) -> list[ModelUsage]:
@@ -148,39 +438,229 @@ class ClaudeExecutionResult:
         ]
 
     def generate_narrative_summary(self, narrative_context: str | None = None) -> list[str]:
-        """Generate a narrative description of the session flow using Claude CLI."""
+        """Generate a narrative description of the session flow using Claude CLI.
+
+        The transcript is compacted first. If it is still longer than
+        _NARRATIVE_CHUNK_CHARS, it is split into chunks that are summarized in parallel and
+        then combined (map-reduce).
+        """
         extra = f"\n\nAdditional context: {narrative_context}" if narrative_context else ""
-        prompt = textwrap.dedent(f"""
-            Provide a concise narrative summary of the session flow and what steps
-            were taken. Focus on the high-level steps rather than exactly documenting
-            each turn. Output ONLY bullet points (no header or extraneous comments)
-            in sequential order. Do not use fancy formatting. Explicitly call out
-            the specific skills that are used and CLI commands that are executed.
-            Take note of any mistakes that were made and how they were corrected.
-            {extra}
-
-            Session events:
-            {json.dumps(self.messages, indent=2)}
-        """).strip()
+        lines = _compact_messages(self.messages)
+        chunks = _chunk_lines(lines, _NARRATIVE_CHUNK_CHARS)
+        if len(chunks) <= 1:
+            return _run_narrative_prompt(
+                f"{_NARRATIVE_INSTRUCTIONS}{extra}\n\nSession events:\n" + "\n".join(lines)
+            )
+
+        partials = _map_narrative_prompts(
+            [
+                f"{_NARRATIVE_CHUNK_INSTRUCTIONS.format(index=i, total=len(chunks))}"
+                f"\n\nSession events:\n" + "\n".join(chunk)
+                for i, chunk in enumerate(chunks, start=1)
+            ]
+        )
+        return _reduce_narratives(partials, extra)
+
+    def conversation_summary(self) -> str:
+        return "\n".join([json.dumps(message, indent=2) for message in self.messages])
+
+
+# Strings in tool inputs and results longer than this are elided in narrative prompts.
+_NARRATIVE_MAX_FIELD_CHARS = 400
+# Compacted transcripts longer than this are summarized chunk by chunk.
+_NARRATIVE_CHUNK_CHARS = 40_000
+_NARRATIVE_MAX_WORKERS = 4
+# Narrative prompts running at once across the whole process. Summaries of several
+# sessions are built concurrently and each may fan out into chunks, so the limit is
+# shared rather than per pool.
+_NARRATIVE_MAX_PROCESSES = 4
+_NARRATIVE_SLOTS = threading.BoundedSemaphore(_NARRATIVE_MAX_PROCESSES)
+
+_NARRATIVE_INSTRUCTIONS = textwrap.dedent("""
+    Provide a concise narrative summary of the session flow and what steps
+    were taken. Focus on the high-level steps rather than exactly documenting
+    each turn. Output ONLY bullet points (no header or extraneous comments)
+    in sequential order. Do not use fancy formatting. Explicitly call out
+    the specific skills that are used and CLI commands that are executed.
+    Take note of any mistakes that were made and how they were corrected.
+""").strip()
+
+_NARRATIVE_CHUNK_INSTRUCTIONS = textwrap.dedent("""
+    The following is part {index} of {total} of a longer agent session. Summarize what
+    happened in this part as sequential bullet points. Output ONLY bullet points. Keep
+    every skill that is used, every CLI command that is executed, and any mistakes and
+    how they were corrected.
+""").strip()
+
+_NARRATIVE_REDUCE_INSTRUCTIONS = textwrap.dedent("""
+    The following bullet points summarize consecutive parts of one agent session.
+    Combine them into a single narrative of the session flow.
+""").strip()
+
+
+# Changes whenever the model or prompts behind narrative summaries change, so that
+# narratives cached under an older version are not reused.
+NARRATIVE_PROMPT_VERSION = hashlib.sha256(
+    json.dumps(
+        [
+            NARRATIVE_MODEL,
+            _NARRATIVE_INSTRUCTIONS,
+            _NARRATIVE_CHUNK_INSTRUCTIONS,
+            _NARRATIVE_REDUCE_INSTRUCTIONS,
+            _NARRATIVE_MAX_FIELD_CHARS,
+            _NARRATIVE_CHUNK_CHARS,
+        ]
+    ).encode()
+).hexdigest()[:16]
+
+
+def _elide(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    head, tail = text[: limit // 2], text[-(limit // 4) :]
+    return f"{head} …[{len(text) - len(head) - len(tail)} chars elided]… {tail}"
+
 
+def _compact_value(value: Any, limit: int) -> Any:
+    if isinstance(value, str):
+        return _elide(value, limit)
+    if isinstance(value, list):
+        return [_compact_value(v, limit) for v in value]
+    if isinstance(value, dict):
+        return {k: _compact_value(v, limit) for k, v in value.items()}
+    return value
+
+
+def _compact_content_item(item: Any) -> Any:
+    """Reduce a message content block to what a narrative needs.
+
+    Tool names and shell commands are kept verbatim; bulky tool inputs and results are
+    elided, and ids and signatures are dropped.
+    """
+    limit = _NARRATIVE_MAX_FIELD_CHARS
+    if not isinstance(item, dict):
+        return _compact_value(item, limit)
+    item_type = item.get("type")
+    if item_type == "text":
+        return {"type": "text", "text": item.get("text", "")}
+    if item_type == "tool_use":
+        tool_input = item.get("input", {})
+        if isinstance(tool_input, dict):
+            tool_input = {
+                k: v if k == "command" else _compact_value(v, limit) for k, v in tool_input.items()
+            }
+        return {"type": "tool_use", "name": item.get("name"), "input": tool_input}
+    if item_type == "tool_result":
+        compacted = {"type": "tool_result", "content": _compact_value(item.get("content"), limit)}
+        if item.get("is_error"):
+            compacted["is_error"] = True
+        return compacted
+    if item_type == "thinking":
+        return {"type": "thinking", "thinking": _elide(item.get("thinking", ""), limit)}
+    return _compact_value({k: v for k, v in item.items() if k != "signature"}, limit)
+
+
+def _compact_messages(messages: list[dict[str, Any]]) -> list[str]:
+    """Serialize each message as one compact JSON line for a narrative prompt."""
+    lines = []
+    for message in messages:
+        content = message.get("content", [])
+        if isinstance(content, list):
+            content = [_compact_content_item(item) for item in content]
+        else:
+            content = _compact_value(content, _NARRATIVE_MAX_FIELD_CHARS)
+        lines.append(
+            json.dumps({"role": message.get("role"), "content": content}, separators=(",", ":"))
+        )
+    return lines
+
+
+def _chunk_lines(lines: list[str], max_chars: int) -> list[list[str]]:
+    """Group consecutive lines into chunks of at most max_chars (a line is never split)."""
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    size = 0
+    for line in lines:
+        if current and size + len(line) + 1 > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _run_narrative_prompt(prompt: str) -> list[str]:
+    with _NARRATIVE_SLOTS:
         result = subprocess.run(
-            ["claude", "--print", "--model", "sonnet"],
+            ["claude", "--print", "--model", NARRATIVE_MODEL],
             input=prompt,
             capture_output=True,
             text=True,
             timeout=60,
             check=False,
         )
-        return result.stdout.strip().splitlines()
+    return result.stdout.strip().splitlines()
+
+
+def _run_partial_narrative_prompt(prompt: str) -> list[str]:
+    """Like _run_narrative_prompt, but a failed part yields an empty partial narrative."""
+    try:
+        return _run_narrative_prompt(prompt)
+    except (subprocess.TimeoutExpired, OSError):
+        return []
+
+
+def _map_narrative_prompts(prompts: list[str]) -> list[list[str]]:
+    with ThreadPoolExecutor(max_workers=min(len(prompts), _NARRATIVE_MAX_WORKERS)) as pool:
+        return list(pool.map(_run_partial_narrative_prompt, prompts))
+
+
+def _reduce_narratives(partials: list[list[str]], extra: str) -> list[str]:
+    """Combine partial narratives, summarizing them in further rounds if still too long."""
+    parts = ["\n".join(partial) for partial in partials if partial]
+    if not parts:
+        return []
+    chunks = _chunk_lines(parts, _NARRATIVE_CHUNK_CHARS)
+    # Only recurse while grouping still shrinks the number of parts.
+    if 1 < len(chunks) < len(parts):
+        return _reduce_narratives(
+            _map_narrative_prompts(
+                [f"{_NARRATIVE_REDUCE_INSTRUCTIONS}\n\n" + "\n".join(chunk) for chunk in chunks]
+            ),
+            extra,
+        )
+    return _run_narrative_prompt(
+        f"{_NARRATIVE_REDUCE_INSTRUCTIONS}\n\n{_NARRATIVE_INSTRUCTIONS}{extra}\n\n"
+        + "\n\n".join(parts)
+    )
 
-    def conversation_summary(self) -> str:
-        return "\n".join([json.dumps(message, indent=2) for message in self.messages])
+
+def _claude_env(prompt_caching: bool) -> dict[str, str]:
+    """Environment for a session. Prompt caching is disabled unless requested, so that
+    token counts do not depend on what earlier sessions left in the cache."""
+    env = dict(os.environ)
+    if prompt_caching:
+        env.pop("DISABLE_PROMPT_CACHING", None)
+    else:
+        env["DISABLE_PROMPT_CACHING"] = "true"
+    return env
 
 
 def run_claude_headless(
-    prompt: str, target_dir: str, plugins_dir: str | None, timeout: int = 300
+    prompt: str,
+    target_dir: str,
+    plugins_dir: str | None,
+    timeout: int = 300,
+    transcript_path: Path | None = None,
+    prompt_caching: bool = False,
 ) -> ClaudeExecutionResult:
-    """Run Claude CLI in headless mode in a specified working directory."""
+    """Run Claude CLI in headless mode in a specified working directory.
+
+    With transcript_path, the output is written straight to that file instead of being
+    held in memory. Prompt caching is disabled unless prompt_caching is set.
+    """
 
     cmd = [
         "claude",
@@ -191,32 +671,283 @@ def run_claude_headless(
         "--dangerously-skip-permissions",
         "--verbose",
         "--model",
-        "sonnet",
+        CLAUDE_MODEL,
     ]
 
     if plugins_dir:
         cmd.extend(["--plugin-dir", plugins_dir])
 
-    result = subprocess.run(
-        cmd,
-        cwd=target_dir,
-        input=prompt,
-        capture_output=True,
-        text=True,
-        timeout=timeout,
-        check=False,
-        env={**os.environ, "DISABLE_PROMPT_CACHING": "true"},
-    )
-    sys.stdout.write(result.stdout)
-
-    return ClaudeExecutionResult(cli_result=result)
+    with contextlib.ExitStack() as stack:
+        if transcript_path is not None:
+            transcript_path.parent.mkdir(parents=True, exist_ok=True)
+            stdout: IO[str] | int = stack.enter_context(transcript_path.open("w"))
+        else:
+            stdout = subprocess.PIPE
+        result = subprocess.run(
+            cmd,
+            cwd=target_dir,
+            input=prompt,
+            stdout=stdout,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=timeout,
+            check=False,
+            env=_claude_env(prompt_caching),
+        )
+    return ClaudeExecutionResult(cli_result=result, transcript_path=transcript_path)
 
 
 def execute_prompt(
-    prompt: str, target_dir: str, include_plugins: bool = True
+    prompt: str,
+    target_dir: str,
+    include_plugins: bool = True,
+    transcript_path: Path | None = None,
+    prompt_caching: bool = False,
 ) -> ClaudeExecutionResult:
-    plugins_dir = str(_PLUGINS_DIR) if include_plugins else None
-    return run_claude_headless(prompt=prompt, target_dir=target_dir, plugins_dir=plugins_dir)
+    plugins_dir = str(PLUGINS_DIR) if include_plugins else None
+    return run_claude_headless(
+        prompt=prompt,
+        target_dir=target_dir,
+        plugins_dir=plugins_dir,
+        transcript_path=transcript_path,
+        prompt_caching=prompt_caching,
+    )
+
+
+@dataclass
+class LiveRunMetrics:
+    """Running totals for a stream-json session, updated as each event arrives.
+
+    Until the final result event is seen, ``cost_usd`` is estimated from per-message usage
+    with the local pricing table.
+    """
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    turns: int = 0
+    tool_calls: int = 0
+    current_tool: str | None = None
+    finished: bool = False
+    _message_usage: dict[str, tuple[str, dict[str, Any]]] = field(default_factory=dict, repr=False)
+    _open_tools: dict[str, str] = field(default_factory=dict, repr=False)
+
+    def observe(self, event: dict[str, Any]) -> None:
+        event_type = event.get("type")
+        if event_type == "assistant" and "message" in event:
+            self._observe_assistant(event["message"])
+        elif event_type == "user" and "message" in event:
+            for item in event["message"].get("content", []):
+                if isinstance(item, dict) and item.get("type") == "tool_result":
+                    self._open_tools.pop(item.get("tool_use_id", ""), None)
+            self.current_tool = next(reversed(self._open_tools.values()), None)
+        elif event_type == "result":
+            usage = event.get("usage", {})
+            self.input_tokens = usage.get("input_tokens", self.input_tokens)
+            self.output_tokens = usage.get("output_tokens", self.output_tokens)
+            self.cost_usd = float(event.get("total_cost_usd", self.cost_usd))
+            self.current_tool = None
+            self.finished = True
+
+    def _observe_assistant(self, msg: dict[str, Any]) -> None:
+        # The CLI emits one assistant event per content block, repeating the message id and
+        # usage, so turns and usage are tracked per message id.
+        msg_id = msg.get("id") or f"_anonymous_{len(self._message_usage)}"
+        previous = self._message_usage.get(msg_id)
+        if previous is None:
+            self.turns += 1
+        usage = msg.get("usage")
+        if usage:
+            if previous is not None:
+                self._apply_usage(*previous, sign=-1)
+            self._message_usage[msg_id] = (msg.get("model", ""), usage)
+            self._apply_usage(msg.get("model", ""), usage, sign=1)
+
+        for item in msg.get("content", []):
+            if isinstance(item, dict) and item.get("type") == "tool_use":
+                self.tool_calls += 1
+                self._open_tools[item.get("id", "")] = item.get("name", "")
+                self.current_tool = item.get("name")
+
+    def model_usage(self) -> dict[str, dict[str, int]]:
+        """Per-model usage observed so far, in the result event's ``modelUsage`` format."""
+        totals: dict[str, dict[str, int]] = {}
+        for model, usage in self._message_usage.values():
+            entry = totals.setdefault(
+                model,
+                {
+                    "inputTokens": 0,
+                    "outputTokens": 0,
+                    "cacheReadInputTokens": 0,
+                    "cacheCreationInputTokens": 0,
+                },
+            )
+            entry["inputTokens"] += usage.get("input_tokens", 0)
+            entry["outputTokens"] += usage.get("output_tokens", 0)
+            entry["cacheReadInputTokens"] += usage.get("cache_read_input_tokens", 0)
+            entry["cacheCreationInputTokens"] += usage.get("cache_creation_input_tokens", 0)
+        return totals
+
+    def _apply_usage(self, model: str, usage: dict[str, Any], sign: int) -> None:
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        self.input_tokens += sign * input_tokens
+        self.output_tokens += sign * output_tokens
+        pricing = pricing_for_model(model)
+        if pricing is not None:
+            self.cost_usd += sign * pricing.cost(
+                input_tokens,
+                output_tokens,
+                usage.get("cache_read_input_tokens", 0),
+                usage.get("cache_creation_input_tokens", 0),
+            )
+
+
+@dataclass(frozen=True)
+class RunBudget:
+    """Limits that terminate a stream-json session as soon as one is crossed."""
+
+    max_tokens: int | None = None
+    max_cost_usd: float | None = None
+    max_turns: int | None = None
+
+    def exceeded(self, metrics: LiveRunMetrics) -> str | None:
+        """Return a description of the first exceeded limit, or None if within budget."""
+        tokens = metrics.input_tokens + metrics.output_tokens
+        if self.max_tokens is not None and tokens > self.max_tokens:
+            return f"token budget exceeded ({tokens:,} > {self.max_tokens:,})"
+        if self.max_cost_usd is not None and metrics.cost_usd > self.max_cost_usd:
+            return f"cost budget exceeded (${metrics.cost_usd:.4f} > ${self.max_cost_usd:.4f})"
+        if self.max_turns is not None and metrics.turns > self.max_turns:
+            return f"turn budget exceeded ({metrics.turns} > {self.max_turns})"
+        return None
+
+
+def _budget_aborted_event(metrics: LiveRunMetrics, reason: str, duration_ms: int) -> dict[str, Any]:
+    """Build a stand-in result event from the metrics observed before a budget abort."""
+    return {
+        "type": "result",
+        "subtype": _BUDGET_ABORTED_SUBTYPE,
+        "is_error": True,
+        "abort_reason": reason,
+        "duration_ms": duration_ms,
+        "num_turns": metrics.turns,
+        "total_cost_usd": metrics.cost_usd,
+        "usage": {"input_tokens": metrics.input_tokens, "output_tokens": metrics.output_tokens},
+        "modelUsage": metrics.model_usage(),
+    }
+
+
+def _drain(stream: IO[str] | None, sink: list[str]) -> None:
+    """Read a stream to EOF; used to consume stderr without blocking the stdout reader."""
+    if stream is not None:
+        sink.append(stream.read())
+
+
+@contextlib.contextmanager
+def _transcript_spool(path: Path | None) -> Iterator[Callable[[str], None] | None]:
+    """Yield a function that appends an event line to path, or None without a path.
+
+    The file is a JSON array with one event per line, so it is valid JSON and can also be
+    read back a line at a time by iter_transcript.
+    """
+    if path is None:
+        yield None
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as f:
+        f.write("[")
+        separator = "\n"
+
+        def _write(line: str) -> None:
+            nonlocal separator
+            f.write(separator)
+            f.write(line)
+            separator = ",\n"
+
+        try:
+            yield _write
+        finally:
+            f.write("\n]\n")
+
+
+def format_transcript(events: list[dict[str, Any]], *, compact: bool = False) -> str:
+    """Serialize events in the same one-event-per-line layout _transcript_spool writes.
+
+    With compact, each event is serialized like the CLI's own output lines: no spaces
+    after separators and non-ASCII characters left unescaped.
+    """
+    if not events:
+        return "[\n]\n"
+    if compact:
+        lines = ",\n".join(
+            json.dumps(event, separators=(",", ":"), ensure_ascii=False) for event in events
+        )
+    else:
+        lines = ",\n".join(json.dumps(event) for event in events)
+    return f"[\n{lines}\n]\n"
+
+
+def iter_transcript(path: Path) -> Iterator[dict[str, Any]]:
+    """Parse the events of a transcript file from a memory map.
+
+    Spooled transcripts are decoded one line at a time; any other JSON array (headless
+    output, older logs) is decoded whole.
+    """
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Spooled files start with "[" on its own line followed by unindented events.
+            spooled = mm.readline().rstrip() == b"[" and mm[mm.tell() : mm.tell() + 1] in b"{]"
+            if not spooled:
+                yield from json.loads(mm[:])
+                return
+            for raw_line in iter(mm.readline, b""):
+                line = raw_line.strip().removesuffix(b",")
+                if line and line != b"]":
+                    yield json.loads(line)
+
+
+def _keep_event(
+    event: dict[str, Any],
+    line: str,
+    events: list[dict[str, Any]],
+    spool: Callable[[str], None] | None,
+) -> None:
+    """Append an event to the spool if there is one, otherwise to the in-memory list."""
+    if spool is not None:
+        spool(line)
+    else:
+        events.append(event)
+
+
+def _read_stream_json(
+    stream: IO[str],
+    on_event: Callable[[dict[str, Any]], None],
+    spool: Callable[[str], None] | None = None,
+    arrivals: array | None = None,
+) -> list[dict[str, Any]]:
+    """Parse NDJSON events from a process's stdout as they arrive.
+
+    With a spool, each event's line is written to it instead of being kept in memory.
+    The time.monotonic() arrival time of each event is appended to arrivals.
+    """
+    events: list[dict[str, Any]] = []
+    for raw_line in stream:
+        arrived = time.monotonic()
+        stripped = raw_line.strip()
+        if not stripped:
+            continue
+        try:
+            event = json.loads(stripped)
+        except json.JSONDecodeError:
+            continue
+        _keep_event(event, stripped, events, spool)
+        if arrivals is not None:
+            arrivals.append(arrived)
+        on_event(event)
+    return events
 
 
 def execute_prompt_stream_json(
@@ -224,10 +955,24 @@ def execute_prompt_stream_json(
     target_dir: str,
     extra_args: list[str] | None = None,
     timeout: int = 300,
+    metrics: LiveRunMetrics | None = None,
+    budget: RunBudget | None = None,
+    transcript_path: Path | None = None,
+    prompt_caching: bool = False,
 ) -> ClaudeExecutionResult:
     """Run Claude CLI with stream-json output format.
 
-    Parses NDJSON stdout into a JSON array for ClaudeExecutionResult._json_output.
+    Events are parsed incrementally while the session runs; pass ``metrics`` to observe
+    running token, cost, turn and tool counts. The parsed events are handed to
+    ClaudeExecutionResult as they are, so the transcript is decoded only once.
+
+    If ``budget`` is given, the process is terminated as soon as a limit is crossed and a
+    synthetic result event built from the partial metrics stands in for the real one.
+
+    With ``transcript_path``, events are written to that file as they arrive rather than
+    kept in memory, and the result reads them back from it when needed.
+
+    Prompt caching is disabled unless ``prompt_caching`` is set.
     """
     cmd = [
         "claude",
@@ -238,36 +983,86 @@ def execute_prompt_stream_json(
         "--dangerously-skip-permissions",
         "--verbose",
         "--model",
-        "sonnet",
+        CLAUDE_MODEL,
     ]
 
     if extra_args:
         cmd.extend(extra_args)
 
-    result = subprocess.run(
-        cmd,
-        cwd=target_dir,
-        input=prompt,
-        capture_output=True,
-        text=True,
-        timeout=timeout,
-        check=False,
-        env={**os.environ, "DISABLE_PROMPT_CACHING": "true"},
-    )
+    metrics = metrics if metrics is not None else LiveRunMetrics()
 
-    # Parse NDJSON lines into a list of events
-    events: list[dict] = []
-    for raw_line in result.stdout.splitlines():
-        stripped = raw_line.strip()
-        if stripped:
-            with contextlib.suppress(json.JSONDecodeError):
-                events.append(json.loads(stripped))
+    with _transcript_spool(transcript_path) as spool:
+        with subprocess.Popen(
+            cmd,
+            cwd=target_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=_claude_env(prompt_caching),
+        ) as proc:
+            stderr_chunks: list[str] = []
+            stderr_reader = threading.Thread(
+                target=_drain, args=(proc.stderr, stderr_chunks), daemon=True
+            )
+            stderr_reader.start()
+
+            timed_out = threading.Event()
+            abort_reason: str | None = None
+            start = time.monotonic()
+            event_times = array("d")
+
+            def _on_event(event: dict[str, Any]) -> None:
+                nonlocal abort_reason
+                metrics.observe(event)
+                if budget is not None and abort_reason is None and not metrics.finished:
+                    abort_reason = budget.exceeded(metrics)
+                    if abort_reason is not None:
+                        proc.terminate()
+
+            def _kill_on_timeout() -> None:
+                timed_out.set()
+                proc.kill()
+
+            watchdog = threading.Timer(timeout, _kill_on_timeout)
+            watchdog.start()
+            try:
+                if proc.stdin is not None:
+                    with contextlib.suppress(BrokenPipeError):
+                        proc.stdin.write(prompt)
+                        proc.stdin.close()
+                events = (
+                    _read_stream_json(proc.stdout, _on_event, spool, event_times)
+                    if proc.stdout
+                    else []
+                )
+                proc.wait()
+            except BaseException:
+                proc.kill()
+                raise
+            finally:
+                watchdog.cancel()
+            stderr_reader.join()
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout, stderr="".join(stderr_chunks))
+
+        if abort_reason is not None and not metrics.finished:
+            event_times.append(time.monotonic())
+            duration_ms = int((event_times[-1] - start) * 1000)
+            aborted_event = _budget_aborted_event(metrics, abort_reason, duration_ms)
+            # Serialized like the CLI's own lines, so the transcript keeps a single layout.
+            line = json.dumps(aborted_event, separators=(",", ":"), ensure_ascii=False)
+            _keep_event(aborted_event, line, events, spool)
 
     completed = subprocess.CompletedProcess(
-        args=cmd,
-        returncode=result.returncode,
-        stdout=json.dumps(events),
-        stderr=result.stderr,
+        args=cmd, returncode=proc.returncode, stdout=None, stderr="".join(stderr_chunks)
     )
 
-    return ClaudeExecutionResult(cli_result=completed)
+    return ClaudeExecutionResult(
+        cli_result=completed,
+        parsed_events=None if spool is not None else events,
+        transcript_path=transcript_path,
+        started_at=start,
+        event_times=event_times,
+    )
@@ -0,0 +1,104 @@
+import contextlib
+import fcntl
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+
+@contextlib.contextmanager
+def file_lock(path: Path, *, shared: bool = False, blocking: bool = True) -> Iterator[bool]:
+    """Hold an advisory lock on ``path`` for the duration of the block.
+
+    The lock is exclusive unless shared=True. Yields whether the lock was acquired; with
+    blocking=False it may yield False instead of waiting.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+    with path.open("a") as f:
+        try:
+            fcntl.flock(f, operation | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write a file so that readers see either the old or the new contents, never a mix."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        Path(tmp_path).replace(path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    atomic_write_bytes(path, text.encode())
+
+
+def _reflink_tree(src: Path, dst: Path) -> bool:
+    """Clone a tree with copy-on-write extents, if the platform and filesystem support it."""
+    if sys.platform == "darwin":
+        cmd = ["cp", "-Rc", str(src), str(dst)]
+    elif sys.platform.startswith("linux"):
+        cmd = ["cp", "-a", "--reflink=always", str(src), str(dst)]
+    else:
+        return False
+    result = subprocess.run(cmd, capture_output=True, check=False)
+    if result.returncode != 0:
+        shutil.rmtree(dst, ignore_errors=True)
+        return False
+    return True
+
+
+def clone_tree(src: Path, dst: Path) -> None:
+    """Cheaply copy a directory tree to a new location.
+
+    Uses a reflink/clonefile copy when the filesystem supports it, and a full copy
+    otherwise. Files are never hardlinked: a test or agent writing to a file in place, even
+    inside a virtualenv, must not change the source.
+    """
+    if _reflink_tree(src, dst):
+        return
+    shutil.copytree(src, dst, symlinks=True)
+
+
+def relocate_tree(root: Path, old_prefix: str, new_prefix: str) -> None:
+    """Rewrite absolute paths left behind by tools that are not relocatable.
+
+    Virtualenv entry-point shebangs, activate scripts, pyvenv.cfg and editable-install
+    ``.pth`` files embed the directory they were created in. Matching files are replaced
+    rather than edited in place.
+    """
+    old, new = old_prefix.encode(), new_prefix.encode()
+    patterns = [
+        "**/.venv/pyvenv.cfg",
+        "**/.venv/bin/*",
+        "**/site-packages/*.pth",
+        "**/site-packages/__editable__*",
+        "**/site-packages/*.dist-info/direct_url.json",
+    ]
+    for pattern in patterns:
+        for path in root.glob(pattern):
+            if path.is_symlink() or not path.is_file():
+                continue
+            data = path.read_bytes()
+            if old not in data:
+                continue
+            mode = path.stat().st_mode
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}-", dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data.replace(old, new))
+            Path(tmp_path).chmod(mode)
+            Path(tmp_path).replace(path)
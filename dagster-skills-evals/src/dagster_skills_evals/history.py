@@ -0,0 +1,254 @@
+import contextlib
+import sqlite3
+import subprocess
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from dagster_shared.serdes import deserialize_value, serialize_value
+
+from dagster_skills_evals.cache import default_cache_dir, hash_path
+from dagster_skills_evals.execution import CLAUDE_MODEL, PLUGINS_DIR, ClaudeExecutionResultSummary
+from dagster_skills_evals.stats import SUMMARY_METRICS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    test TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    model TEXT NOT NULL,
+    skill_tree_hash TEXT,
+    git_commit TEXT,
+    is_baseline INTEGER NOT NULL DEFAULT 0,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    execution_time_ms INTEGER NOT NULL,
+    tool_calls INTEGER NOT NULL,
+    budget_aborted INTEGER NOT NULL DEFAULT 0,
+    regressed INTEGER NOT NULL DEFAULT 0,
+    run_dir TEXT,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_test_timestamp ON runs (test, timestamp DESC);
+CREATE INDEX IF NOT EXISTS runs_skill_tree_hash ON runs (skill_tree_hash);
+"""
+
+# Summary metrics that can be queried; each is also a column of the runs table.
+METRIC_COLUMNS = tuple(metric.name for metric in SUMMARY_METRICS)
+
+
+def default_history_path() -> Path:
+    return default_cache_dir() / "history.sqlite3"
+
+
+def _git_commit(path: Path) -> str | None:
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=path, capture_output=True, text=True, check=False
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+@dataclass(frozen=True)
+class Provenance:
+    """What a run was measured against: the skill tree contents and the repo commit."""
+
+    skill_tree_hash: str | None
+    git_commit: str | None
+
+    @classmethod
+    def current(cls) -> "Provenance":
+        if not PLUGINS_DIR.exists():
+            return cls(skill_tree_hash=None, git_commit=None)
+        return cls(skill_tree_hash=hash_path(PLUGINS_DIR), git_commit=_git_commit(PLUGINS_DIR))
+
+
+@dataclass(frozen=True)
+class HistoryRun:
+    """A single recorded run."""
+
+    id: int
+    test: str
+    timestamp: float
+    model: str
+    skill_tree_hash: str | None
+    git_commit: str | None
+    is_baseline: bool
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+    execution_time_ms: int
+    tool_calls: int
+    budget_aborted: bool
+    regressed: bool
+    run_dir: str | None
+
+    def metric(self, name: str) -> float:
+        return getattr(self, name)
+
+
+_RUN_COLUMNS = ", ".join(HistoryRun.__dataclass_fields__)
+
+
+def _row_to_run(row: sqlite3.Row) -> HistoryRun:
+    values = dict(row)
+    values["is_baseline"] = bool(values["is_baseline"])
+    values["budget_aborted"] = bool(values["budget_aborted"])
+    values["regressed"] = bool(values["regressed"])
+    return HistoryRun(**values)
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Add columns introduced after a store was created."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+    if "regressed" not in columns:
+        # A concurrent process may add it first.
+        with contextlib.suppress(sqlite3.OperationalError):
+            conn.execute("ALTER TABLE runs ADD COLUMN regressed INTEGER NOT NULL DEFAULT 0")
+
+
+class HistoryStore:
+    """SQLite store of every recorded execution summary.
+
+    Opens a short-lived connection per call and uses WAL mode, so it can be shared by
+    threads and by concurrent test worker processes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _migrate(conn)
+            with conn:
+                yield conn
+
+    def record(
+        self,
+        test: str,
+        summary: ClaudeExecutionResultSummary,
+        provenance: Provenance,
+        *,
+        is_baseline: bool = False,
+        regressed: bool = False,
+        run_dir: Path | None = None,
+        timestamp: float | None = None,
+    ) -> int:
+        """Store a summary and return its row id.
+
+        regressed marks a run that failed the regression gate.
+        """
+        models = sorted({usage.model for usage in summary.model_usage}) or [CLAUDE_MODEL]
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO runs (
+                    test, timestamp, model, skill_tree_hash, git_commit, is_baseline,
+                    input_tokens, output_tokens, cost_usd, execution_time_ms, tool_calls,
+                    budget_aborted, regressed, run_dir, summary
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    test,
+                    timestamp if timestamp is not None else time.time(),
+                    ",".join(models),
+                    provenance.skill_tree_hash,
+                    provenance.git_commit,
+                    is_baseline,
+                    summary.input_tokens,
+                    summary.output_tokens,
+                    summary.cost_usd,
+                    summary.execution_time_ms,
+                    len(summary.tools_used),
+                    summary.budget_aborted,
+                    regressed,
+                    str(run_dir) if run_dir else None,
+                    serialize_value(summary),
+                ),
+            )
+            return cursor.lastrowid or 0
+
+    def tests(self) -> list[tuple[str, int, float]]:
+        """Return (test, run count, latest timestamp) for every recorded test."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT test, COUNT(*), MAX(timestamp) FROM runs GROUP BY test ORDER BY test"
+            ).fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    def runs(
+        self,
+        test: str,
+        *,
+        last: int | None = None,
+        skill_tree_hash: str | None = None,
+        baselines_only: bool = False,
+    ) -> list[HistoryRun]:
+        """Return the most recent runs of a test, newest first."""
+        query = f"SELECT {_RUN_COLUMNS} FROM runs WHERE test = ?"
+        params: list[object] = [test]
+        if skill_tree_hash is not None:
+            query += " AND skill_tree_hash = ?"
+            params.append(skill_tree_hash)
+        if baselines_only:
+            query += " AND is_baseline = 1"
+        query += " ORDER BY timestamp DESC"
+        if last is not None:
+            query += " LIMIT ?"
+            params.append(last)
+        with self._connect() as conn:
+            return [_row_to_run(row) for row in conn.execute(query, params)]
+
+    def baseline_run_dirs(self) -> list[Path]:
+        """Log directories of every run recorded as a baseline."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT run_dir FROM runs WHERE is_baseline = 1 AND run_dir IS NOT NULL"
+            ).fetchall()
+        return [Path(row[0]) for row in rows]
+
+    def metric_values(self, test: str, metric: str, *, last: int | None = None) -> list[float]:
+        """Return one metric for the most recent runs of a test, newest first."""
+        if metric not in METRIC_COLUMNS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {METRIC_COLUMNS}")
+        return [run.metric(metric) for run in self.runs(test, last=last)]
+
+    def summary(self, run_id: int) -> ClaudeExecutionResultSummary | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT summary FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        return deserialize_value(row[0], ClaudeExecutionResultSummary)
+
+    def export_parquet(self, output: Path, *, test: str | None = None) -> int:
+        """Write runs (without the serialized summaries) to a Parquet file.
+
+        Requires pyarrow. Returns the number of rows written.
+        """
+        if pa is None or pq is None:
+            raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+        query = f"SELECT {_RUN_COLUMNS} FROM runs"
+        params: tuple[str, ...] = ()
+        if test is not None:
+            query += " WHERE test = ?"
+            params = (test,)
+        with self._connect() as conn:
+            rows = [
+                vars(_row_to_run(row))
+                for row in conn.execute(query + " ORDER BY timestamp", params)
+            ]
+        table = pa.Table.from_pylist(rows) if rows else pa.table({})
+        pq.write_table(table, output)
+        return len(rows)
@@ -0,0 +1,273 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from dagster_skills_evals.execution import (
+    ClaudeExecutionResult,
+    format_transcript,
+    iter_transcript,
+)
+from dagster_skills_evals.fs import atomic_write_bytes, atomic_write_text, file_lock
+
+MANIFEST_NAME = "manifest.json"
+# Every manifest written against a store is listed here, so unreferenced blobs can be
+# found without knowing where the run directories live.
+_REGISTRY_NAME = "manifests.txt"
+
+# Strings at least this long (tool results, file contents, long messages) are stored as
+# separate blobs so identical ones are kept once across runs.
+_BLOB_MIN_CHARS = 512
+_BLOB_KEY = "__blob__"
+# Manifest layouts of transcripts in the one-event-per-line layout, by whether their events
+# are serialized compactly.
+_TRANSCRIPT_LAYOUTS = {"transcript": False, "compact-transcript": True}
+
+
+def log_files(result: ClaudeExecutionResult) -> dict[str, str | Path]:
+    """The files written for every run: the messages, the raw event stream and stderr.
+
+    A transcript spooled to disk is given as its path, so that it can be streamed from
+    there rather than read into one string.
+    """
+    return {
+        "summary.json": json.dumps(result.messages, indent=2),
+        "stdout.txt": result.transcript_path
+        if result.transcript_path is not None
+        else result.stdout,
+        "stderr.txt": result.stderr,
+    }
+
+
+class BlobStore:
+    """Content-addressed store of gzip-compressed blobs, keyed by the SHA-256 of their data.
+
+    Writes are atomic and idempotent, so concurrent writers of the same blob are safe.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.gz"
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        try:
+            # A reused blob counts as fresh, so sweep() leaves it alone until the manifest
+            # that references it is registered.
+            os.utime(path)
+        except FileNotFoundError:
+            atomic_write_bytes(path, gzip.compress(data, mtime=0))
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        return gzip.decompress(self.path(digest).read_bytes())
+
+    def register(self, manifest_path: Path) -> None:
+        with (
+            file_lock(self.root / f"{_REGISTRY_NAME}.lock"),
+            (self.root / _REGISTRY_NAME).open("a") as f,
+        ):
+            f.write(f"{manifest_path.resolve()}\n")
+
+    def sweep(
+        self,
+        *,
+        is_dead: Callable[[Path], bool] = lambda _: False,
+        grace_seconds: float = 3600,
+        only_dead: bool = False,
+        dry_run: bool = False,
+    ) -> tuple[int, int]:
+        """Remove blobs that no live manifest references. Returns (blobs, bytes) removed.
+
+        A registered manifest is live if it still exists and is_dead(manifest) is False.
+        Blobs written or reused within grace_seconds are kept, since their manifest may not
+        be registered yet. With only_dead, the only blobs removed are those of registered
+        manifests that is_dead marks; blobs no registered manifest references (e.g. those of
+        a moved or copied run dir) are kept.
+        """
+        with file_lock(self.root / f"{_REGISTRY_NAME}.lock"):
+            registry = self.root / _REGISTRY_NAME
+            lines = registry.read_text().splitlines() if registry.exists() else []
+            live: list[Path] = []
+            dead: list[Path] = []
+            for path in dict.fromkeys(Path(line) for line in lines if line):
+                if path.exists():
+                    (dead if is_dead(path) else live).append(path)
+            referenced = set().union(*(_manifest_blobs(path, self) for path in live))
+            doomed = set().union(*(_manifest_blobs(path, self) for path in dead))
+            if not dry_run:
+                atomic_write_text(registry, "".join(f"{path}\n" for path in live))
+
+            cutoff = time.time() - grace_seconds
+            removed = reclaimed = 0
+            for blob in self.root.glob("*/*.gz"):
+                digest = blob.name.removesuffix(".gz")
+                if digest in referenced or (only_dead and digest not in doomed):
+                    continue
+                stat = blob.stat()
+                if stat.st_mtime > cutoff:
+                    continue
+                if not dry_run:
+                    blob.unlink(missing_ok=True)
+                removed += 1
+                reclaimed += stat.st_size
+        return removed, reclaimed
+
+
+def _extract_blobs(value: Any, store: BlobStore) -> Any:
+    if isinstance(value, str) and len(value) >= _BLOB_MIN_CHARS:
+        return {_BLOB_KEY: store.put(value.encode())}
+    if isinstance(value, dict):
+        return {key: _extract_blobs(item, store) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_extract_blobs(item, store) for item in value]
+    return value
+
+
+def _has_blob_marker(value: Any) -> bool:
+    if isinstance(value, dict):
+        return value.keys() == {_BLOB_KEY} or any(_has_blob_marker(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_blob_marker(item) for item in value)
+    return False
+
+
+def _inline_blobs(value: Any, store: BlobStore) -> Any:
+    if isinstance(value, dict):
+        if value.keys() == {_BLOB_KEY}:
+            return store.get(value[_BLOB_KEY]).decode()
+        return {key: _inline_blobs(item, store) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_inline_blobs(item, store) for item in value]
+    return value
+
+
+def _store_skeleton(parsed: Any, store: BlobStore, **layout: Any) -> dict[str, Any]:
+    skeleton = json.dumps(_extract_blobs(parsed, store))
+    return {"skeleton": store.put(skeleton.encode()), **layout}
+
+
+def _store_file(text: str, store: BlobStore) -> dict[str, Any]:
+    """Store one log file, splitting JSON documents into a skeleton plus shared blobs.
+
+    JSON is only split when re-serializing it (plainly, indented, or in the transcript
+    layout) reproduces the original text exactly and it holds nothing that looks like a
+    blob reference; anything else is stored as one blob.
+    """
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        parsed = None
+    if isinstance(parsed, dict | list) and not _has_blob_marker(parsed):
+        for indent in (None, 2):
+            if json.dumps(parsed, indent=indent) == text:
+                return _store_skeleton(parsed, store, indent=indent)
+        if isinstance(parsed, list):
+            for layout, compact in _TRANSCRIPT_LAYOUTS.items():
+                if format_transcript(parsed, compact=compact) == text:
+                    return _store_skeleton(parsed, store, layout=layout)
+    return {"blob": store.put(text.encode())}
+
+
+def _store_transcript(path: Path, store: BlobStore) -> dict[str, Any]:
+    """Store a transcript file like _store_file, parsing it with iter_transcript.
+
+    A file in the spooled one-event-per-line layout is split without ever being read into
+    one string; the split is checked by comparing the digest of the rebuilt text with the
+    file's.
+    """
+    try:
+        events = list(iter_transcript(path))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        events = None
+    if isinstance(events, list) and not _has_blob_marker(events):
+        with path.open("rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        for layout, compact in _TRANSCRIPT_LAYOUTS.items():
+            text = format_transcript(events, compact=compact)
+            if hashlib.sha256(text.encode()).hexdigest() == digest:
+                return _store_skeleton(events, store, layout=layout)
+    return _store_file(path.read_text(), store)
+
+
+def _read_file(entry: dict[str, Any], store: BlobStore) -> str:
+    if "blob" in entry:
+        return store.get(entry["blob"]).decode()
+    parsed = _inline_blobs(json.loads(store.get(entry["skeleton"])), store)
+    if "layout" in entry:
+        return format_transcript(parsed, compact=_TRANSCRIPT_LAYOUTS[entry["layout"]])
+    return json.dumps(parsed, indent=entry["indent"])
+
+
+def write_logs(run_dir: Path, files: dict[str, str | Path], store: BlobStore) -> None:
+    """Store log files in the blob store and write a manifest to run_dir in their place.
+
+    Files given as a path are transcripts, streamed from disk.
+    """
+    manifest = {
+        "store": str(store.root.resolve()),
+        "files": {
+            name: (
+                _store_transcript(content, store)
+                if isinstance(content, Path)
+                else _store_file(content, store)
+            )
+            for name, content in files.items()
+        },
+    }
+    atomic_write_text(run_dir / MANIFEST_NAME, json.dumps(manifest, indent=2))
+    store.register(run_dir / MANIFEST_NAME)
+
+
+def _load_manifest(run_dir: Path) -> tuple[dict[str, Any], BlobStore]:
+    manifest = json.loads((run_dir / MANIFEST_NAME).read_text())
+    return manifest, BlobStore(Path(manifest["store"]))
+
+
+def read_log(run_dir: Path, name: str) -> str:
+    """Rebuild a single log file of a run stored with write_logs."""
+    manifest, store = _load_manifest(run_dir)
+    return _read_file(manifest["files"][name], store)
+
+
+def restore_logs(run_dir: Path, dest: Path | None = None) -> list[Path]:
+    """Rebuild every log file of a run into dest (default: the run directory itself)."""
+    manifest, store = _load_manifest(run_dir)
+    dest = dest or run_dir
+    written = []
+    for name, entry in manifest["files"].items():
+        atomic_write_text(dest / name, _read_file(entry, store))
+        written.append(dest / name)
+    return written
+
+
+def _manifest_blobs(manifest_path: Path, store: BlobStore) -> set[str]:
+    """Digests of every blob a manifest depends on."""
+    manifest = json.loads(manifest_path.read_text())
+    digests: set[str] = set()
+
+    def _collect(value: Any) -> None:
+        if isinstance(value, dict):
+            if value.keys() == {_BLOB_KEY}:
+                digests.add(value[_BLOB_KEY])
+                return
+            for item in value.values():
+                _collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                _collect(item)
+
+    for entry in manifest["files"].values():
+        if "blob" in entry:
+            digests.add(entry["blob"])
+        elif store.path(entry["skeleton"]).exists():
+            digests.add(entry["skeleton"])
+            _collect(json.loads(store.get(entry["skeleton"])))
+    return digests
@@ -1,6 +1,8 @@
+import re
+from pathlib import Path
 from typing import Literal
 
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class ReferenceFrontmatter(BaseModel):
@@ -18,3 +20,69 @@ class ReferenceFrontmatter(BaseModel):
         if not v:
             raise ValueError("'triggers' must be a non-empty list")
         return v
+
+
+# Case and arm names become directory names under the logs dir and temp dir prefixes.
+_PATH_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+def _check_path_name(kind: str, name: str) -> str:
+    if not _PATH_NAME.fullmatch(name) or ".." in name or name == ".":
+        raise ValueError(
+            f"{kind} name {name!r} must be made of letters, digits, '_', '.' and '-', "
+            "and must not be '.' or contain '..'"
+        )
+    return name
+
+
+class SuiteArm(BaseModel):
+    """Per-arm overrides for a suite case."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    setup_script: Path | None = None
+    claude_args: str | None = None
+
+
+class SuiteCase(BaseModel):
+    """A prompt to run through one or more arms."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    name: str
+    prompt: str
+    setup_script: Path | None = None
+    claude_args: str | None = None
+    timeout: int | None = None
+    arms: dict[str, SuiteArm] = Field(default_factory=lambda: {"run": SuiteArm()})
+
+    @field_validator("name")
+    @classmethod
+    def name_is_path_safe(cls, v: str) -> str:
+        return _check_path_name("case", v)
+
+    @field_validator("arms")
+    @classmethod
+    def arms_non_empty(cls, v: dict[str, SuiteArm]) -> dict[str, SuiteArm]:
+        if not v:
+            raise ValueError("'arms' must define at least one arm")
+        for name in v:
+            _check_path_name("arm", name)
+        return v
+
+
+class SuiteConfig(BaseModel):
+    """Validates a `dg-eval suite` file."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    cases: list[SuiteCase]
+
+    @field_validator("cases")
+    @classmethod
+    def case_names_unique(cls, v: list[SuiteCase]) -> list[SuiteCase]:
+        names = [case.name for case in v]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"duplicate case names: {', '.join(duplicates)}")
+        return v
@@ -0,0 +1,121 @@
+import functools
+import json
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+# Token classes priced separately, in the order they are reported.
+TOKEN_CLASSES = ("input", "output", "cache_read", "cache_write")
+
+# Cost in USD per model, then per token class.
+CostBreakdown = dict[str, dict[str, float]]
+
+
+@dataclass(frozen=True)
+class ModelPricing:
+    """USD price per million tokens for each token class."""
+
+    input: float
+    output: float
+    cache_read: float
+    cache_write: float
+
+    def breakdown(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_input_tokens: int = 0,
+        cache_creation_input_tokens: int = 0,
+    ) -> dict[str, float]:
+        """Cost of each token class, keyed as in TOKEN_CLASSES."""
+        return {
+            "input": input_tokens * self.input / 1_000_000,
+            "output": output_tokens * self.output / 1_000_000,
+            "cache_read": cache_read_input_tokens * self.cache_read / 1_000_000,
+            "cache_write": cache_creation_input_tokens * self.cache_write / 1_000_000,
+        }
+
+    def cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_input_tokens: int = 0,
+        cache_creation_input_tokens: int = 0,
+    ) -> float:
+        return sum(
+            self.breakdown(
+                input_tokens, output_tokens, cache_read_input_tokens, cache_creation_input_tokens
+            ).values()
+        )
+
+
+# Keyed by model family; a model id matches the first family name it contains.
+DEFAULT_PRICING: dict[str, ModelPricing] = {
+    "opus": ModelPricing(input=5.0, output=25.0, cache_read=0.50, cache_write=6.25),
+    "sonnet": ModelPricing(input=3.0, output=15.0, cache_read=0.30, cache_write=3.75),
+    "haiku": ModelPricing(input=1.0, output=5.0, cache_read=0.10, cache_write=1.25),
+}
+
+
+def load_pricing(path: Path) -> dict[str, ModelPricing]:
+    """Read pricing overrides from a JSON file.
+
+    The file maps model ids or family names to prices per million tokens, e.g.
+    ``{"sonnet": {"input": 3.0, "output": 15.0}}``. Prices left out of an entry are taken
+    from the default family it names or contains, if any.
+    """
+    data = json.loads(path.read_text())
+    if not isinstance(data, dict):
+        raise TypeError(f"{path}: expected an object mapping models to prices")
+    names = {field.name for field in fields(ModelPricing)}
+    table: dict[str, ModelPricing] = {}
+    for model, prices in data.items():
+        if not isinstance(prices, dict) or not set(prices) <= names:
+            raise ValueError(f"{path}: prices for {model!r} must be an object with keys {names}")
+        base = _match(model, DEFAULT_PRICING)
+        missing = names - set(prices)
+        if missing and base is None:
+            raise ValueError(f"{path}: {model!r} is missing prices for {sorted(missing)}")
+        defaults = {name: getattr(base, name) for name in missing} if base else {}
+        table[model] = ModelPricing(**defaults, **{k: float(v) for k, v in prices.items()})
+    return table
+
+
+@functools.cache
+def _pricing_table(overrides_path: str | None) -> dict[str, ModelPricing]:
+    overrides = load_pricing(Path(overrides_path)) if overrides_path else {}
+    return {**overrides, **{k: v for k, v in DEFAULT_PRICING.items() if k not in overrides}}
+
+
+def pricing_table() -> dict[str, ModelPricing]:
+    """DEFAULT_PRICING, overridden by the JSON file named by ``DG_EVAL_PRICING``."""
+    return _pricing_table(os.environ.get("DG_EVAL_PRICING"))
+
+
+def _match(model: str, table: dict[str, ModelPricing]) -> ModelPricing | None:
+    if model in table:
+        return table[model]
+    for family, pricing in table.items():
+        if family in model:
+            return pricing
+    return None
+
+
+def pricing_for_model(model: str) -> ModelPricing | None:
+    """Look up pricing for a model id such as ``claude-sonnet-4-6``.
+
+    An exact model id in the table wins over a family name it contains.
+    """
+    return _match(model, pricing_table())
+
+
+def merge_breakdowns(breakdowns: Iterable[CostBreakdown]) -> CostBreakdown:
+    """Sum per-model, per-token-class costs, e.g. across the sessions of a suite."""
+    total: CostBreakdown = {}
+    for breakdown in breakdowns:
+        for model, costs in breakdown.items():
+            entry = total.setdefault(model, dict.fromkeys(TOKEN_CLASSES, 0.0))
+            for token_class, cost in costs.items():
+                entry[token_class] += cost
+    return total
@@ -0,0 +1,207 @@
+import json
+import subprocess
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from dagster_skills_evals.execution import (
+    PLUGINS_DIR,
+    ClaudeExecutionResult,
+    ToolCall,
+    iter_transcript,
+)
+from dagster_skills_evals.logstore import MANIFEST_NAME, read_log
+from dagster_skills_evals.tokens import estimate_tokens
+
+_FILE_TOOLS = frozenset({"Read", "Grep", "Glob"})
+_TRANSCRIPT_NAME = "stdout.txt"
+
+
+@dataclass(frozen=True)
+class ReferenceRead:
+    """Tokens a tool call put into context from one skill file.
+
+    reference is relative to the plugin dir, e.g. skills/dagster-expert/references/env-vars.md.
+    """
+
+    reference: str
+    tool: str
+    tokens: int
+
+
+def _result_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(item.get("text", "") for item in content if isinstance(item, dict))
+    return ""
+
+
+def _to_reference(path: str, plugins_dir: Path) -> str | None:
+    """Map a path seen in a session to a file of the plugin dir.
+
+    Sessions may read a copy of the plugin (e.g. an installed one), so a path that is not
+    under plugins_dir still matches on its trailing skills/<name>/... segments.
+    """
+    candidate = Path(path)
+    root = plugins_dir.resolve()
+    if candidate.is_absolute() and candidate.is_relative_to(root):
+        return candidate.relative_to(root).as_posix()
+    parts = candidate.parts
+    # The innermost match, since plugin roots are often named after their skill.
+    for i in reversed(range(len(parts) - 2)):
+        if parts[i] == "skills" and (plugins_dir / "skills" / parts[i + 1]).is_dir():
+            return Path(*parts[i:]).as_posix()
+    return None
+
+
+def _skill_reference(call: ToolCall, plugins_dir: Path) -> ReferenceRead | None:
+    name = call.input.get("skill") if isinstance(call.input, dict) else None
+    if not isinstance(name, str):
+        return None
+    # Plugin skills may be invoked as <plugin>:<skill>.
+    skill_file = plugins_dir / "skills" / name.rpartition(":")[2] / "SKILL.md"
+    if not skill_file.is_file():
+        return None
+    # The skill's content is injected after the tool result, so it is sized from disk.
+    return ReferenceRead(
+        skill_file.relative_to(plugins_dir).as_posix(),
+        "Skill",
+        estimate_tokens(skill_file.read_text()),
+    )
+
+
+def _file_tool_reads(call: ToolCall, plugins_dir: Path) -> list[ReferenceRead]:
+    tool_input = call.input if isinstance(call.input, dict) else {}
+    text = _result_text(call.result)
+    target = tool_input.get("file_path") or tool_input.get("path")
+    reference = _to_reference(target, plugins_dir) if isinstance(target, str) else None
+    if call.name == "Read" or (reference is not None and (plugins_dir / reference).is_file()):
+        # A single file: everything the call returned came from it.
+        return [ReferenceRead(reference, call.name, estimate_tokens(text))] if reference else []
+
+    # Grep and Glob over a directory list one match per line, prefixed by its file path.
+    tokens: dict[str, int] = {}
+    for line in text.splitlines():
+        line_reference = _to_reference(line.split(":", 1)[0], plugins_dir)
+        if line_reference is not None:
+            tokens[line_reference] = tokens.get(line_reference, 0) + estimate_tokens(line)
+    return [ReferenceRead(ref, call.name, count) for ref, count in tokens.items()]
+
+
+def reference_reads(
+    result: ClaudeExecutionResult, plugins_dir: Path = PLUGINS_DIR
+) -> list[ReferenceRead]:
+    """Skill files loaded by a session's Read, Grep, Glob and Skill calls, in call order."""
+    reads: list[ReferenceRead] = []
+    for call in result.tool_calls:
+        if call.name == "Skill":
+            skill_read = _skill_reference(call, plugins_dir)
+            if skill_read is not None:
+                reads.append(skill_read)
+        elif call.name in _FILE_TOOLS and not call.is_error:
+            reads.extend(_file_tool_reads(call, plugins_dir))
+    return reads
+
+
+@dataclass
+class ReferenceHeat:
+    """How often one reference was loaded across runs, and what it cost in context."""
+
+    reference: str
+    runs: int = 0
+    reads: int = 0
+    tokens: int = 0
+    tools: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class ReferenceHeatmap:
+    total_runs: int
+    references: list[ReferenceHeat]
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(heat.tokens for heat in self.references)
+
+
+def build_heatmap(
+    runs: Iterable[list[ReferenceRead]],
+    *,
+    plugins_dir: Path | None = None,
+) -> ReferenceHeatmap:
+    """Aggregate the reads of several runs, hottest references (by tokens) first.
+
+    With plugins_dir, every markdown file under it is listed, including those never read.
+    """
+    heat: dict[str, ReferenceHeat] = {}
+    if plugins_dir is not None:
+        for path in sorted(plugins_dir.rglob("*.md")):
+            reference = path.relative_to(plugins_dir).as_posix()
+            heat[reference] = ReferenceHeat(reference)
+    total_runs = 0
+    for reads in runs:
+        total_runs += 1
+        for reference in dict.fromkeys(read.reference for read in reads):
+            heat.setdefault(reference, ReferenceHeat(reference)).runs += 1
+        for read in reads:
+            entry = heat[read.reference]
+            entry.reads += 1
+            entry.tokens += read.tokens
+            entry.tools[read.tool] = entry.tools.get(read.tool, 0) + 1
+    return ReferenceHeatmap(
+        total_runs=total_runs,
+        references=sorted(heat.values(), key=lambda h: (-h.tokens, -h.reads, h.reference)),
+    )
+
+
+def find_run_dirs(root: Path) -> Iterator[Path]:
+    """Directories under root (inclusive) holding a saved session transcript."""
+    for path in sorted({*root.rglob(_TRANSCRIPT_NAME), *root.rglob(MANIFEST_NAME)}):
+        if path.name == _TRANSCRIPT_NAME or not (path.parent / _TRANSCRIPT_NAME).exists():
+            yield path.parent
+
+
+def _events_before_cut(events: Iterator[dict[str, Any]], source: Path) -> list[dict[str, Any]]:
+    """The events of a transcript up to where it was cut off, e.g. by a timeout or a killed
+    session. Raises ValueError if not even the first event parses."""
+    parsed: list[dict[str, Any]] = []
+    try:
+        for event in events:
+            parsed.append(event)
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        if not parsed:
+            raise ValueError(f"{source} is not a readable transcript: {exc}") from exc
+    return parsed
+
+
+def _iter_text_events(text: str) -> Iterator[dict[str, Any]]:
+    """Events of a transcript held in a string, in either layout iter_transcript reads."""
+    try:
+        events = json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    else:
+        yield from events
+        return
+    for raw_line in text.splitlines():
+        line = raw_line.strip().removesuffix(",")
+        if line not in ("", "[", "]"):
+            yield json.loads(line)
+
+
+def load_run(run_dir: Path) -> ClaudeExecutionResult:
+    """Rebuild the result of a session from its saved logs, deduplicated or not.
+
+    A transcript that was cut off mid-stream keeps the events before the cut. Raises
+    ValueError if the transcript cannot be read at all.
+    """
+    cli_result = subprocess.CompletedProcess(args=[], returncode=0, stdout=None, stderr="")
+    transcript = run_dir / _TRANSCRIPT_NAME
+    if transcript.exists():
+        events = _events_before_cut(iter_transcript(transcript), transcript)
+    else:
+        text = read_log(run_dir, _TRANSCRIPT_NAME)
+        events = _events_before_cut(_iter_text_events(text), run_dir / MANIFEST_NAME)
+    return ClaudeExecutionResult(cli_result=cli_result, parsed_events=events)
@@ -0,0 +1,244 @@
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from dagster_skills_evals.fs import file_lock
+from dagster_skills_evals.logstore import BlobStore
+from dagster_skills_evals.workspace import WorkspaceRegistry
+
+# Prefix of every temp dir created by the CLI (log dirs and workspaces).
+TEMP_PREFIX = "dg-eval-"
+# Nothing younger than this is removed, so directories of sessions still in progress are
+# never touched regardless of policy.
+_MIN_AGE_SECONDS = 60 * 60
+# Directories under a baseline logs dir that are not per-test run directories.
+_RESERVED_LOG_DIRS = frozenset({"blobs", "sessions", ".locks"})
+# How often commands apply the retention policy on their own.
+_AUTO_GC_INTERVAL_SECONDS = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """What to keep.
+
+    Entries older than max_age_days are removed, then the oldest remaining ones until the
+    total fits in max_total_bytes. The keep_last newest runs of each test and protected
+    entries (baseline runs) are always kept.
+    """
+
+    max_age_days: float | None = 14.0
+    max_total_bytes: int | None = None
+    keep_last: int = 20
+
+
+@dataclass(frozen=True)
+class _Entry:
+    path: Path
+    group: str | None
+    mtime: float
+    size: int
+    protected: bool = False
+
+
+@dataclass
+class GcReport:
+    removed: list[Path] = field(default_factory=list)
+    reclaimed_bytes: int = 0
+    kept: int = 0
+    blobs_removed: int = 0
+    dry_run: bool = False
+
+    def describe(self) -> str:
+        verb = "Would remove" if self.dry_run else "Removed"
+        return (
+            f"{verb} {len(self.removed)} directories and {self.blobs_removed} log blobs, "
+            f"reclaiming {format_size(self.reclaimed_bytes)}; kept {self.kept}."
+        )
+
+
+def format_size(size: int) -> str:
+    for power, unit in ((4, "T"), (3, "G"), (2, "M"), (1, "K")):
+        if size >= 1024**power:
+            return f"{size / 1024**power:.1f} {unit}iB"
+    return f"{size} B"
+
+
+def _tree_size(path: Path) -> int:
+    """Total size of the files under path, without following symlinks."""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+    return total
+
+
+def _list_dirs(root: Path) -> list[os.DirEntry]:
+    try:
+        with os.scandir(root) as it:
+            return [entry for entry in it if entry.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
+        return []
+
+
+def temp_dirs() -> list[tuple[Path, str | None]]:
+    """dg-eval directories left in the system temp dir: workspaces, but also the log dirs of
+    commands run without --logs-dir."""
+    return [
+        (Path(entry.path), None)
+        for entry in _list_dirs(Path(tempfile.gettempdir()))
+        if entry.name.startswith(TEMP_PREFIX)
+    ]
+
+
+def baseline_log_dirs(logs_dir: Path) -> list[tuple[Path, str | None]]:
+    """Per-run directories under a benchmark logs dir, grouped by test name."""
+    runs: list[tuple[Path, str | None]] = []
+    for test_dir in _list_dirs(logs_dir):
+        if test_dir.name in _RESERVED_LOG_DIRS:
+            continue
+        runs.extend((Path(run.path), test_dir.name) for run in _list_dirs(Path(test_dir.path)))
+    # Merged session reports are kept like the runs of a single test.
+    runs.extend((Path(entry.path), "sessions") for entry in _list_dirs(logs_dir / "sessions"))
+    return runs
+
+
+def _scan(
+    dirs: Iterable[tuple[Path, str | None]], protected: set[Path], max_workers: int
+) -> list[_Entry]:
+    def _entry(item: tuple[Path, str | None]) -> _Entry | None:
+        path, group = item
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        return _Entry(
+            path=path,
+            group=group,
+            mtime=mtime,
+            size=_tree_size(path),
+            protected=path.resolve() in protected,
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return [entry for entry in pool.map(_entry, dirs) if entry is not None]
+
+
+def _select(entries: list[_Entry], policy: RetentionPolicy, now: float) -> list[_Entry]:
+    """Pick the entries to remove under the policy."""
+    pinned: set[Path] = {entry.path for entry in entries if entry.protected}
+    groups: dict[str, list[_Entry]] = {}
+    for entry in entries:
+        if entry.group is not None:
+            groups.setdefault(entry.group, []).append(entry)
+    for group in groups.values():
+        group.sort(key=lambda entry: entry.mtime, reverse=True)
+        pinned.update(entry.path for entry in group[: policy.keep_last])
+    pinned.update(entry.path for entry in entries if now - entry.mtime < _MIN_AGE_SECONDS)
+
+    candidates = sorted(
+        (entry for entry in entries if entry.path not in pinned), key=lambda entry: entry.mtime
+    )
+    selected: list[_Entry] = []
+    if policy.max_age_days is not None:
+        cutoff = now - policy.max_age_days * 24 * 60 * 60
+        selected = [entry for entry in candidates if entry.mtime < cutoff]
+
+    if policy.max_total_bytes is not None:
+        chosen = {entry.path for entry in selected}
+        total = sum(entry.size for entry in entries if entry.path not in chosen)
+        for entry in candidates:
+            if total <= policy.max_total_bytes:
+                break
+            if entry.path not in chosen:
+                selected.append(entry)
+                total -= entry.size
+    return selected
+
+
+def collect_garbage(
+    *,
+    logs_dirs: Iterable[Path] = (),
+    include_temp: bool = True,
+    workspaces: WorkspaceRegistry | None = None,
+    blob_stores: Iterable[BlobStore] = (),
+    protected: Iterable[Path] = (),
+    policy: RetentionPolicy | None = None,
+    sweep_unregistered: bool = False,
+    dry_run: bool = False,
+    max_workers: int = 8,
+) -> GcReport:
+    """Apply a retention policy to dg-eval temp dirs, recorded workspaces and benchmark log
+    dirs.
+
+    Directories are sized in parallel. Blobs of the removed runs that no remaining run
+    references are swept from blob_stores. With sweep_unregistered, so is every other blob
+    no registered manifest references, including those of run dirs that were moved or
+    copied elsewhere, whose manifests then can no longer be restored.
+    """
+    policy = policy or RetentionPolicy()
+    candidates = temp_dirs() if include_temp else []
+    if workspaces is not None:
+        candidates.extend((path, None) for path in workspaces.workspaces())
+    for logs_dir in logs_dirs:
+        candidates.extend(baseline_log_dirs(logs_dir))
+    # A recorded workspace is also found by the temp dir scan.
+    dirs = {path.resolve(): (path, group) for path, group in candidates}.values()
+    entries = _scan(dirs, {path.resolve() for path in protected}, max_workers)
+
+    removed = _select(entries, policy, time.time())
+    report = GcReport(
+        removed=[entry.path for entry in removed],
+        reclaimed_bytes=sum(entry.size for entry in removed),
+        kept=len(entries) - len(removed),
+        dry_run=dry_run,
+    )
+    # Sweep first, while the manifests of the runs being removed can still be read.
+    removed_roots = [path.resolve() for path in report.removed]
+    for store in blob_stores:
+        blobs, reclaimed = store.sweep(
+            is_dead=lambda manifest: any(manifest.is_relative_to(root) for root in removed_roots),
+            only_dead=not sweep_unregistered,
+            dry_run=dry_run,
+        )
+        report.blobs_removed += blobs
+        report.reclaimed_bytes += reclaimed
+
+    if not dry_run:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(lambda path: shutil.rmtree(path, ignore_errors=True), report.removed))
+        if workspaces is not None:
+            workspaces.prune()
+    return report
+
+
+def collect_garbage_periodically(stamp: Path, **kwargs: Any) -> GcReport | None:
+    """Run collect_garbage at most once a day per stamp file.
+
+    Skips (returning None) when another process is already collecting. Unless the caller
+    says otherwise, the temp dir is not scanned, so only recorded workspaces and the given
+    logs dirs are collected: log dirs in the temp dir are left for an explicit `dg-eval gc`.
+    """
+    with file_lock(stamp.with_name(f"{stamp.name}.lock"), blocking=False) as acquired:
+        if not acquired:
+            return None
+        try:
+            if time.time() - stamp.stat().st_mtime < _AUTO_GC_INTERVAL_SECONDS:
+                return None
+        except FileNotFoundError:
+            pass
+        stamp.touch()
+        return collect_garbage(**{"include_temp": False, **kwargs})
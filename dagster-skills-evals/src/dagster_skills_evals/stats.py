@@ -0,0 +1,325 @@
+import itertools
+import math
+import random
+import statistics
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Literal
+
+from dagster_skills_evals.execution import ClaudeExecutionResultSummary
+
+Verdict = Literal["improved", "regressed", "inconclusive"]
+
+
+@dataclass(frozen=True)
+class SummaryMetric:
+    """A numeric metric extracted from an execution summary."""
+
+    name: str
+    label: str
+    extract: Callable[[ClaudeExecutionResultSummary], float]
+    lower_is_better: bool = True
+
+
+SUMMARY_METRICS: list[SummaryMetric] = [
+    SummaryMetric("input_tokens", "Input Tokens", lambda s: s.input_tokens),
+    SummaryMetric("output_tokens", "Output Tokens", lambda s: s.output_tokens),
+    SummaryMetric("cost_usd", "Cost", lambda s: s.cost_usd),
+    SummaryMetric("execution_time_ms", "Execution Time", lambda s: s.execution_time_ms),
+    SummaryMetric("tool_calls", "Tool Calls", lambda s: len(s.tools_used)),
+]
+
+
+@dataclass(frozen=True)
+class SampleStats:
+    """Descriptive statistics for a sample, with a bootstrap confidence interval on the mean."""
+
+    n: int
+    mean: float
+    median: float
+    stdev: float
+    ci_low: float
+    ci_high: float
+
+
+@dataclass(frozen=True)
+class MetricComparison:
+    """Baseline vs treatment statistics for a single metric."""
+
+    metric: SummaryMetric
+    baseline: SampleStats
+    treatment: SampleStats
+    delta_mean: float
+    delta_ci_low: float
+    delta_ci_high: float
+    verdict: Verdict
+
+    @property
+    def delta_pct(self) -> float | None:
+        if self.baseline.mean == 0:
+            return None
+        return self.delta_mean / self.baseline.mean * 100
+
+
+# Fewest values per arm for compare_samples to call a difference significant.
+MIN_COMPARE_SAMPLES = 3
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile of pre-sorted values, q in [0, 1]."""
+    if not sorted_values:
+        raise ValueError("Cannot compute a percentile of an empty sample")
+    pos = (len(sorted_values) - 1) * q
+    lower = int(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    frac = pos - lower
+    return sorted_values[lower] * (1 - frac) + sorted_values[upper] * frac
+
+
+def _bootstrap_ci(
+    resample_stat: Callable[[random.Random], float],
+    confidence: float,
+    resamples: int,
+    seed: int,
+) -> tuple[float, float]:
+    rng = random.Random(seed)
+    stats = sorted(resample_stat(rng) for _ in range(resamples))
+    alpha = (1 - confidence) / 2
+    return percentile(stats, alpha), percentile(stats, 1 - alpha)
+
+
+def describe(
+    values: Sequence[float],
+    *,
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 0,
+) -> SampleStats:
+    """Compute mean/median/stdev and a percentile-bootstrap CI on the mean."""
+    if not values:
+        raise ValueError("Cannot describe an empty sample")
+    n = len(values)
+    ci_low, ci_high = _bootstrap_ci(
+        lambda rng: statistics.fmean(rng.choices(values, k=n)),
+        confidence=confidence,
+        resamples=resamples,
+        seed=seed,
+    )
+    return SampleStats(
+        n=n,
+        mean=statistics.fmean(values),
+        median=statistics.median(values),
+        stdev=statistics.stdev(values) if n > 1 else 0.0,
+        ci_low=ci_low,
+        ci_high=ci_high,
+    )
+
+
+def compare_samples(
+    metric: SummaryMetric,
+    baseline: Sequence[float],
+    treatment: Sequence[float],
+    *,
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 0,
+) -> MetricComparison:
+    """Compare two samples of a metric.
+
+    The difference is significant when the bootstrap CI of (treatment mean - baseline mean)
+    excludes zero and a one-sided Mann-Whitney test in that direction rejects at half the
+    remaining significance level. The bootstrap alone is overconfident on a handful of
+    trials, so with fewer than MIN_COMPARE_SAMPLES values per arm, or samples too small for
+    the test to ever reject, the verdict is always inconclusive.
+    """
+    delta_low, delta_high = _bootstrap_ci(
+        lambda rng: (
+            statistics.fmean(rng.choices(treatment, k=len(treatment)))
+            - statistics.fmean(rng.choices(baseline, k=len(baseline)))
+        ),
+        confidence=confidence,
+        resamples=resamples,
+        seed=seed,
+    )
+
+    verdict: Verdict = "inconclusive"
+    alpha = (1 - confidence) / 2
+    enough = min(len(baseline), len(treatment)) >= MIN_COMPARE_SAMPLES
+    testable = 1 / math.comb(len(baseline) + len(treatment), len(treatment)) <= alpha
+    if enough and testable and (delta_low > 0 or delta_high < 0):
+        got_lower = delta_high < 0
+        higher, lower = (baseline, treatment) if got_lower else (treatment, baseline)
+        if mann_whitney_greater(higher, lower) < alpha:
+            verdict = "improved" if got_lower == metric.lower_is_better else "regressed"
+
+    baseline_stats = describe(baseline, confidence=confidence, resamples=resamples, seed=seed)
+    treatment_stats = describe(treatment, confidence=confidence, resamples=resamples, seed=seed)
+    return MetricComparison(
+        metric=metric,
+        baseline=baseline_stats,
+        treatment=treatment_stats,
+        delta_mean=treatment_stats.mean - baseline_stats.mean,
+        delta_ci_low=delta_low,
+        delta_ci_high=delta_high,
+        verdict=verdict,
+    )
+
+
+def compare_summaries(
+    baseline: Sequence[ClaudeExecutionResultSummary],
+    treatment: Sequence[ClaudeExecutionResultSummary],
+    *,
+    confidence: float = 0.95,
+) -> list[MetricComparison]:
+    """Compare every summary metric across baseline and treatment trials."""
+    return [
+        compare_samples(
+            metric,
+            [metric.extract(s) for s in baseline],
+            [metric.extract(s) for s in treatment],
+            confidence=confidence,
+        )
+        for metric in SUMMARY_METRICS
+    ]
+
+
+# Relative change in the worse direction that is tolerated before a metric can count as
+# regressed. Wall-clock time is much noisier than token counts.
+DEFAULT_TOLERANCES: dict[str, float] = {
+    "input_tokens": 0.10,
+    "output_tokens": 0.20,
+    "cost_usd": 0.10,
+    "execution_time_ms": 0.25,
+    "tool_calls": 0.25,
+}
+
+
+# Limits for computing exact Mann-Whitney p-values: the number of (x, y) pairs for the
+# tie-free distribution, and the number of relabelings to enumerate when there are ties.
+_EXACT_MAX_PAIRS = 2500
+_EXACT_MAX_RELABELINGS = 20_000
+
+
+def _u_distribution(m: int, n: int) -> list[int]:
+    """Number of orderings of m + n distinct values giving each Mann-Whitney U statistic.
+
+    These are the coefficients of the Gaussian binomial [m + n choose m].
+    """
+    coeffs = [1] + [0] * (m * n)
+    for k in range(1, m + 1):
+        step = n + k
+        for i in range(len(coeffs) - 1, step - 1, -1):
+            coeffs[i] -= coeffs[i - step]
+        for i in range(k, len(coeffs)):
+            coeffs[i] += coeffs[i - k]
+    return coeffs
+
+
+def mann_whitney_greater(x: Sequence[float], y: Sequence[float]) -> float:
+    """One-sided Mann-Whitney U p-value for the hypothesis that x tends to exceed y.
+
+    Exact for small samples, otherwise a tie-corrected normal approximation.
+    """
+    m, n = len(x), len(y)
+    if not m or not n:
+        raise ValueError("Mann-Whitney U needs two non-empty samples")
+
+    def _u(xs: Sequence[float], ys: Sequence[float]) -> float:
+        return sum(1.0 if a > b else 0.5 if a == b else 0.0 for a in xs for b in ys)
+
+    u = _u(x, y)
+    pooled = [*x, *y]
+    ties = [pooled.count(v) for v in set(pooled)]
+    if all(t == 1 for t in ties) and m * n <= _EXACT_MAX_PAIRS:
+        counts = _u_distribution(m, n)
+        return sum(counts[math.ceil(u) :]) / math.comb(m + n, m)
+    if math.comb(m + n, m) <= _EXACT_MAX_RELABELINGS:
+        relabelings = [
+            _u([pooled[i] for i in chosen], [pooled[i] for i in range(m + n) if i not in chosen])
+            for chosen in itertools.combinations(range(m + n), m)
+        ]
+        return sum(value >= u for value in relabelings) / len(relabelings)
+
+    total = m + n
+    tie_term = sum(t**3 - t for t in ties) / (total * (total - 1))
+    variance = m * n / 12 * ((total + 1) - tie_term)
+    if variance <= 0:
+        return 1.0
+    z = (u - m * n / 2 - 0.5) / math.sqrt(variance)
+    return 1 - statistics.NormalDist().cdf(z)
+
+
+@dataclass(frozen=True)
+class GateCheck:
+    """Outcome of checking one metric of the current run(s) against a reference sample."""
+
+    metric: SummaryMetric
+    reference_median: float
+    current_mean: float
+    limit: float
+    p_value: float | None
+    regressed: bool
+
+
+def check_regression(
+    metric: SummaryMetric,
+    reference: Sequence[float],
+    current: Sequence[float],
+    *,
+    tolerance: float,
+    alpha: float = 0.05,
+    min_reference: int = 3,
+) -> GateCheck:
+    """Decide whether current is a regression from reference for a single metric.
+
+    A regression needs both a practical and a statistical effect: the current mean must lie
+    beyond the reference median by more than tolerance (relative), and a one-sided
+    Mann-Whitney test must reject at alpha. When the samples are too small for the test to
+    ever reach alpha (fewer than min_reference values, or e.g. a single run against fewer
+    than 19 at alpha=0.05), only the tolerance band applies.
+    """
+    if not reference or not current:
+        raise ValueError("Cannot gate on an empty sample")
+    sign = 1 if metric.lower_is_better else -1
+    reference_median = statistics.median(reference)
+    current_mean = statistics.fmean(current)
+    limit = reference_median * (1 + sign * tolerance)
+    outside = (current_mean - limit) * sign > 0
+
+    p_value = None
+    regressed = outside
+    testable = 1 / math.comb(len(reference) + len(current), len(current)) <= alpha
+    if len(reference) >= min_reference and testable:
+        worse, better = (current, reference) if metric.lower_is_better else (reference, current)
+        p_value = mann_whitney_greater(worse, better)
+        regressed = outside and p_value < alpha
+
+    return GateCheck(
+        metric=metric,
+        reference_median=reference_median,
+        current_mean=current_mean,
+        limit=limit,
+        p_value=p_value,
+        regressed=regressed,
+    )
+
+
+def gate_summaries(
+    reference: Sequence[ClaudeExecutionResultSummary],
+    current: Sequence[ClaudeExecutionResultSummary],
+    *,
+    tolerances: dict[str, float] | None = None,
+    alpha: float = 0.05,
+) -> list[GateCheck]:
+    """Check every summary metric of current against reference."""
+    tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+    return [
+        check_regression(
+            metric,
+            [metric.extract(s) for s in reference],
+            [metric.extract(s) for s in current],
+            tolerance=tolerances[metric.name],
+            alpha=alpha,
+        )
+        for metric in SUMMARY_METRICS
+    ]
@@ -0,0 +1,32 @@
+import math
+import re
+
+# Words, digit runs, punctuation runs and whitespace runs, roughly how BPE tokenizers
+# split markdown before merging.
+_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|\s+|[^\w\s]+|_+")
+# Characters a single token typically covers within each kind of piece.
+_WORD_CHARS = 6
+_DIGIT_CHARS = 3
+_PUNCTUATION_CHARS = 2
+_INDENT_CHARS = 8
+
+
+def _piece_tokens(piece: str) -> int:
+    if piece[0].isalpha():
+        return math.ceil(len(piece) / _WORD_CHARS)
+    if piece[0].isdigit():
+        return math.ceil(len(piece) / _DIGIT_CHARS)
+    if piece.isspace():
+        # Single spaces merge into the next word; line breaks and indentation do not.
+        newlines = piece.count("\n")
+        return newlines + len(piece.rsplit("\n", 1)[-1]) // _INDENT_CHARS
+    return math.ceil(len(piece) / _PUNCTUATION_CHARS)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate Claude's token count for text, without calling a tokenizer.
+
+    Splits text into words, numbers, punctuation and whitespace and charges each by
+    length. Meant for comparing and budgeting skill files, not for billing.
+    """
+    return sum(_piece_tokens(piece) for piece in _PIECE_RE.findall(text))
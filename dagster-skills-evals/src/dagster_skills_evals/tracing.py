@@ -0,0 +1,192 @@
+import contextlib
+import json
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from dagster_skills_evals.execution import ClaudeExecutionResult, ToolCall
+from dagster_skills_evals.fs import atomic_write_text
+
+TRACE_FILE_NAME = "trace.json"
+# Longest Bash command shown in a tool span's name; the full command is in its args.
+_MAX_LABEL_CHARS = 60
+# Longer tool input values (e.g. file contents) are left out of span args.
+_MAX_ARG_CHARS = 200
+
+
+@dataclass(frozen=True)
+class Span:
+    """A timed interval on a named track. start and end are time.monotonic() values."""
+
+    name: str
+    category: str
+    track: str
+    start: float
+    end: float
+    args: dict[str, Any] = field(default_factory=dict)
+
+
+def _tool_label(call: ToolCall) -> str:
+    tool_input = call.input if isinstance(call.input, dict) else {}
+    detail = tool_input.get("command") or tool_input.get("skill")
+    lines = detail.strip().splitlines() if isinstance(detail, str) else []
+    if not lines:
+        return call.name or "tool"
+    detail = lines[0]
+    if len(detail) > _MAX_LABEL_CHARS:
+        detail = detail[: _MAX_LABEL_CHARS - 1] + "…"
+    return f"{call.name}: {detail}"
+
+
+def _span_input(call: ToolCall) -> dict[str, Any]:
+    if not isinstance(call.input, dict):
+        return {}
+    return {
+        key: value
+        for key, value in call.input.items()
+        if not (isinstance(value, str) and len(value) > _MAX_ARG_CHARS)
+    }
+
+
+class Timeline:
+    """Spans recorded while running sessions, exported in the Chrome trace event format.
+
+    The trace opens in Perfetto (ui.perfetto.dev) or chrome://tracing. Spans may be added
+    from several threads.
+    """
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    @contextlib.contextmanager
+    def span(self, name: str, *, track: str, category: str, **args: Any) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(Span(name, category, track, start, time.monotonic(), args))
+
+    def add_session(self, result: ClaudeExecutionResult, *, track: str) -> None:
+        """Add the turns and tool calls of a streamed session, timed by event arrival.
+
+        A turn runs from the arrival of the event before it (the CLI's init event or the
+        last tool result) to the arrival of its last content block. A tool call runs from
+        its tool_use block to its tool_result. Sessions without arrival times (cache hits,
+        headless runs) are skipped.
+        """
+        times = result.event_times
+        if not times or result.started_at is None:
+            return
+        self.add(Span("session", "session", track, result.started_at, times[-1]))
+        for number, turn in enumerate(result.turns, start=1):
+            start = times[turn.first_event - 1] if turn.first_event > 0 else result.started_at
+            self.add(
+                Span(
+                    f"turn {number}",
+                    "turn",
+                    track,
+                    start,
+                    times[turn.last_event],
+                    {"message_id": turn.message_id},
+                )
+            )
+        for call in result.tool_calls:
+            end_index = call.result_event_index
+            self.add(
+                Span(
+                    _tool_label(call),
+                    "tool",
+                    track,
+                    times[call.event_index],
+                    times[end_index] if end_index is not None else times[-1],
+                    {
+                        "tool": call.name,
+                        "tool_use_id": call.id,
+                        "input": _span_input(call),
+                        "is_error": call.is_error,
+                        "completed": end_index is not None,
+                    },
+                )
+            )
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """Build the trace as complete ("X") events, one thread per lane of each track.
+
+        Spans on the same thread must nest, so overlapping spans that do not (e.g. parallel
+        tool calls) are moved to extra lanes of their track.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        origin = min((span.start for span in spans), default=0.0)
+        events: list[dict[str, Any]] = [
+            {"ph": "M", "pid": 1, "name": "process_name", "args": {"name": "dg-eval"}}
+        ]
+        tid = 0
+        for track in dict.fromkeys(span.track for span in spans):
+            for lane_number, lane in enumerate(_lanes([s for s in spans if s.track == track])):
+                tid += 1
+                name = track if lane_number == 0 else f"{track} ({lane_number + 1})"
+                events.append(
+                    {"ph": "M", "pid": 1, "tid": tid, "name": "thread_name", "args": {"name": name}}
+                )
+                events.append(
+                    {
+                        "ph": "M",
+                        "pid": 1,
+                        "tid": tid,
+                        "name": "thread_sort_index",
+                        "args": {"sort_index": tid},
+                    }
+                )
+                events.extend(
+                    {
+                        "ph": "X",
+                        "pid": 1,
+                        "tid": tid,
+                        "name": span.name,
+                        "cat": span.category,
+                        "ts": round((span.start - origin) * 1e6, 3),
+                        "dur": round(max(span.end - span.start, 0.0) * 1e6, 3),
+                        "args": span.args,
+                    }
+                    for span in lane
+                )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Path) -> None:
+        atomic_write_text(path, json.dumps(self.chrome_trace(), default=str))
+
+
+def _lanes(spans: list[Span]) -> list[list[Span]]:
+    """Split spans into lanes within which every pair of spans is nested or disjoint."""
+    lanes: list[list[Span]] = []
+    open_spans: list[list[Span]] = []
+    for span in sorted(spans, key=lambda s: (s.start, -s.end)):
+        for lane, stack in zip(lanes, open_spans, strict=True):
+            while stack and stack[-1].end <= span.start:
+                stack.pop()
+            if not stack or span.end <= stack[-1].end:
+                lane.append(span)
+                stack.append(span)
+                break
+        else:
+            lanes.append([span])
+            open_spans.append([span])
+    return lanes
+
+
+def traced(
+    timeline: Timeline | None, name: str, *, track: str, category: str, **args: Any
+) -> contextlib.AbstractContextManager[None]:
+    """timeline.span(...), or a no-op without a timeline."""
+    if timeline is None:
+        return contextlib.nullcontext()
+    return timeline.span(name, track=track, category=category, **args)
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from dagster_skills_evals.cache import hash_path
+from dagster_skills_evals.fs import atomic_write_text, clone_tree, file_lock, relocate_tree
+
+_DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+_DEFAULT_MAX_SNAPSHOTS = 20
+_WORKSPACE_REGISTRY_NAME = "workspaces.txt"
+
+
+def run_setup_scripts(
+    tmp_dir: str,
+    setup_script: Path | None,
+    run_specific_script: Path | None = None,
+) -> None:
+    """Run setup scripts in the given directory."""
+    if setup_script:
+        subprocess.run(str(setup_script.resolve()), cwd=tmp_dir, shell=True, check=True)
+    if run_specific_script:
+        subprocess.run(str(run_specific_script.resolve()), cwd=tmp_dir, shell=True, check=True)
+
+
+class WorkspaceRegistry:
+    """The session workspaces dg-eval created, so that automatic cleanup only removes
+    directories known to be workspaces, never log dirs or anything else in the temp dir."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @classmethod
+    def in_cache(cls, cache_root: Path) -> "WorkspaceRegistry":
+        return cls(cache_root / _WORKSPACE_REGISTRY_NAME)
+
+    @property
+    def _lock_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.lock")
+
+    def record(self, workspace: str | Path) -> None:
+        with file_lock(self._lock_path), self.path.open("a") as f:
+            f.write(f"{Path(workspace).resolve()}\n")
+
+    def workspaces(self) -> list[Path]:
+        """Recorded workspaces that still exist."""
+        if not self.path.exists():
+            return []
+        lines = self.path.read_text().splitlines()
+        return [
+            path for path in dict.fromkeys(Path(line) for line in lines if line) if path.exists()
+        ]
+
+    def prune(self) -> None:
+        """Forget workspaces that no longer exist."""
+        with file_lock(self._lock_path):
+            atomic_write_text(self.path, "".join(f"{path}\n" for path in self.workspaces()))
+
+
+def snapshot_key(setup_script: Path | None, run_specific_script: Path | None) -> str:
+    """Key a workspace snapshot by the contents of the scripts that produced it."""
+    hashes = [hash_path(s) if s is not None else "" for s in (setup_script, run_specific_script)]
+    return hashlib.sha256("\0".join(hashes).encode()).hexdigest()
+
+
+class WorkspaceSnapshots:
+    """Workspaces that are expensive to build, built once per key and cloned for each use.
+
+    materialize keys snapshots by the contents of setup scripts, so a script that resolves
+    the latest versions of its dependencies keeps getting the workspace it first built. With
+    refresh, each snapshot is rebuilt the first time it is used by this instance. Snapshots
+    unused for longer than max_age_seconds are evicted, as are the least recently used ones
+    beyond max_snapshots.
+
+    ``reused`` maps the key of every snapshot that was cloned rather than built to the time
+    it was built, so that callers can say that a workspace may be stale.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_age_seconds: float = _DEFAULT_MAX_AGE_SECONDS,
+        max_snapshots: int = _DEFAULT_MAX_SNAPSHOTS,
+        refresh: bool = False,
+    ):
+        self.root = root
+        self.max_age_seconds = max_age_seconds
+        self.max_snapshots = max_snapshots
+        self.refresh = refresh
+        self.reused: dict[str, float] = {}
+        self._built: set[str] = set()
+
+    def _build(self, snapshot_dir: Path, build: Callable[[Path], None]) -> None:
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        building = Path(tempfile.mkdtemp(prefix=".building-", dir=snapshot_dir))
+        try:
+            build(building)
+            building.rename(snapshot_dir / "tree")
+        except BaseException:
+            shutil.rmtree(building, ignore_errors=True)
+            raise
+        atomic_write_text(
+            snapshot_dir / "meta.json",
+            json.dumps({"origin": str(building), "created": time.time()}),
+        )
+
+    def checkout(self, key: str, build: Callable[[Path], None], dest: Path) -> None:
+        """Clone the snapshot stored under key to dest, which must not exist yet.
+
+        If there is no such snapshot, or refresh is set and this instance has not built it
+        yet, build is first called with an empty directory to populate it. Absolute paths
+        that pointed at the build directory are rewritten to point at dest.
+        """
+        snapshot_dir = self.root / key
+        meta_path = snapshot_dir / "meta.json"
+        lock_path = self.root / f"{key}.lock"
+
+        while True:
+            with file_lock(lock_path):
+                if not meta_path.exists() or (self.refresh and key not in self._built):
+                    shutil.rmtree(snapshot_dir, ignore_errors=True)
+                    self._build(snapshot_dir, build)
+                    self._built.add(key)
+            # Concurrent runs clone under a shared lock; eviction needs an exclusive one.
+            with file_lock(lock_path, shared=True):
+                if not meta_path.exists():
+                    continue
+                meta = json.loads(meta_path.read_text())
+                meta_path.touch()
+                clone_tree(snapshot_dir / "tree", dest)
+                break
+
+        if key not in self._built:
+            self.reused[key] = meta["created"]
+        relocate_tree(dest, meta["origin"], str(dest))
+        self.evict()
+
+    def materialize(
+        self,
+        setup_script: Path | None,
+        run_specific_script: Path | None = None,
+        tmp_prefix: str = "dg-eval-",
+    ) -> str:
+        """Return a fresh temp dir holding the workspace the setup scripts would produce.
+
+        The scripts only run the first time a given pair of script contents is seen; later
+        calls clone the stored snapshot.
+        """
+        dest = Path(tempfile.mkdtemp(prefix=tmp_prefix))
+        dest.rmdir()
+        self.checkout(
+            snapshot_key(setup_script, run_specific_script),
+            lambda tree: run_setup_scripts(str(tree), setup_script, run_specific_script),
+            dest,
+        )
+        return str(dest)
+
+    def evict(self) -> None:
+        """Remove stale snapshots. Snapshots currently locked by another run are skipped."""
+        snapshots = sorted(
+            (meta.stat().st_mtime, meta.parent) for meta in self.root.glob("*/meta.json")
+        )
+        now = time.time()
+        excess = len(snapshots) - self.max_snapshots
+        for i, (last_used, snapshot_dir) in enumerate(snapshots):
+            if i >= excess and now - last_used <= self.max_age_seconds:
+                continue
+            with file_lock(self.root / f"{snapshot_dir.name}.lock", blocking=False) as locked:
+                if locked:
+                    shutil.rmtree(snapshot_dir, ignore_errors=True)